@@ -1,5 +1,5 @@
 import os
-from dataclasses import dataclass, fields, is_dataclass
+from dataclasses import dataclass, fields, is_dataclass, MISSING
 import yaml
 
 @dataclass
@@ -19,6 +19,8 @@ class ChunksConfig:
     overlap: int
     model_name: str
     encoder_max_seq_length: int
+    workers: int = 0
+    strategy: str = "window"
 
 @dataclass
 class LoggingConfig:
@@ -37,21 +39,67 @@ class QdrantConfig:
     vector_size: int
     top_samples: int
     batch_size: int
+    encode_batch_size: int = 32
+    encode_processes: int = 0
+    upload_parallelism: int = 4
+    upload_retries: int = 3
+    prefer_grpc: bool = False
+    grpc_port: int = 6334
+    query_batch_size: int = 32
+    query_batch_wait_ms: int = 5
+    query_cache_size: int = 2048
+    backend: str = "torch"
+    quantization: str = "avx2"
 
 @dataclass
 class RerankerConfig:
     model_name: str
     top_samples: int
+    inference_threads: int = 1
+    batch_size: int = 32
+    max_length: int = 512
+    truncate_chars: int = 2000
+    cache_size: int = 10000
+    cache_ttl_seconds: int = 3600
+    early_exit_margin: float = 0.0
+    backend: str = "torch"
+    quantization: str = "avx2"
 
 @dataclass
 class BM25Config:
     top_samples: int
+    incremental: bool = True
+    compaction_threshold: int = 1000
+    lemma_cache_size: int = 200000
+    tokenize_workers: int = 0
+    sync_page_size: int = 1000
+    verify_id_hash: bool = True
+
+@dataclass
+class HybridConfig:
+    strategy: str = "rrf"
+    bm25_candidates: int = 30
+    vector_candidates: int = 30
+    fused_candidates: int = 20
+    rrf_k: int = 60
+    bm25_weight: float = 0.4
+    vector_weight: float = 0.6
 
 @dataclass
 class LLMConfig:
     url: str
     token: str
     model: str
+    max_attempts: int = 3
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 20.0
+    request_deadline_seconds: float = 120.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry_seconds: float = 30.0
+    http2: bool = False
 
 @dataclass
 class RagConfig:
@@ -64,6 +112,46 @@ class TavilyConfig:
     search_depth: str
     include_raw_content: bool
 
+@dataclass
+class CityApiConfig:
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry_seconds: float = 30.0
+    per_host_limit: int = 4
+    connect_timeout_seconds: float = 3.0
+    timeout_seconds: float = 10.0
+    tool_call_timeout_seconds: float = 10.0
+    tool_calls_deadline_seconds: float = 20.0
+
+@dataclass
+class AnswerCacheConfig:
+    enabled: bool = True
+    similarity_threshold: float = 0.95
+    ttl_seconds: int = 86400
+    max_size: int = 1000
+
+@dataclass
+class StartupConfig:
+    parallel: bool = True
+    background: bool = True
+    lazy_chunker: bool = True
+
+@dataclass
+class AgentsConfig:
+    speculative: bool = False
+    preclassifier: bool = False
+
+@dataclass
+class FastPathConfig:
+    enabled: bool = False
+    log_decisions: bool = False
+    decisions_path: str = "./core/data/fast_path/decisions.jsonl"
+    model_path: str = "./core/data/fast_path/heads.npz"
+    device: str = "cpu"
+    toxicity_threshold: float = 0.95
+    route_threshold: float = 0.9
+    shadow_rate: float = 0.05
+
 @dataclass
 class Config:
     llm: LLMConfig
@@ -71,9 +159,15 @@ class Config:
     qdrant: QdrantConfig
     reranker: RerankerConfig
     bm25: BM25Config
+    hybrid: HybridConfig
     rag: RagConfig
     tavily: TavilyConfig
     logging: LoggingConfig
+    startup: StartupConfig
+    answer_cache: AnswerCacheConfig
+    agents: AgentsConfig
+    fast_path: FastPathConfig
+    city_api: CityApiConfig
 
 class ConfigLoader:
 
@@ -115,6 +209,8 @@ class ConfigLoader:
             res = os.getenv(env_name)
             if res.isdigit():
                 return int(res)
+            elif res.lower() in ("true", "false"):
+                return res.lower() == "true"
             else:
                 return res
 
@@ -136,6 +232,9 @@ class ConfigLoader:
                 # Получаем значение для обычного поля
                 fname = f"{outer_name}{field.name}"
                 val = get_value_func(fname)
+                if val is None and (field.default is not MISSING or field.default_factory is not MISSING):
+                    # Необязательное поле — используем значение по умолчанию из дата-класса
+                    continue
                 if val is None:
                     msg = f"Field {fname} is not specified"
                     raise Exception(msg)
@@ -1,7 +1,9 @@
 import asyncio
+from typing import Optional
 from langgraph.graph import StateGraph, END
 from core.langgraph_multi_agent.agents.clarification_agent.state import ClarificationState
 from core.langgraph_multi_agent.agents.clarification_agent.models import ClarificationCheck
+from openai import AsyncOpenAI
 from core.services.LLMService import LLMService
 from utils.logger import get_logger
 from utils.prompt_loader import render_prompt
@@ -9,8 +11,8 @@ from utils.prompt_loader import render_prompt
 log = get_logger("ClarificationAgent")
 
 class ClarificationAgent:
-    def __init__(self):
-        self.llm_service = LLMService()
+    def __init__(self, llm_client: Optional[AsyncOpenAI] = None):
+        self.llm_service = LLMService("clarification", llm_client)
 
     async def check_clarification(self, state: ClarificationState) -> ClarificationState:
         message = state["message"]
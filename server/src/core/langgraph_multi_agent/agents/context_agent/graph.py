@@ -1,17 +1,20 @@
 import asyncio
 import json
+from typing import Optional
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import trim_messages, HumanMessage, AIMessage
 from core.langgraph_multi_agent.agents.context_agent.state import ContextState
+from openai import AsyncOpenAI
 from core.services.LLMService import LLMService
+from core.services.TokenUsage import current_request_usage
 from utils.logger import get_logger
 from utils.prompt_loader import render_prompt
 
 log = get_logger("ContextAgent")
 
 class ContextAgent:
-    def __init__(self):
-        self.llm_service = LLMService()
+    def __init__(self, llm_client: Optional[AsyncOpenAI] = None):
+        self.llm_service = LLMService("context", llm_client)
 
     async def prepare_system_prompt(self, state: ContextState) -> ContextState:
         message = state["message"]
@@ -112,11 +115,16 @@ class ContextAgent:
         return {**state, "history": trimmed_history}
 
     async def update_tokens(self, state: ContextState) -> ContextState:
-        total_tokens = self.llm_service.total_input_token + self.llm_service.total_output_token
+        # Токены всех агентов (общий учёт LLMService), а не только этого агента
+        total_tokens = LLMService.usage_totals.total()
+        request_usage = current_request_usage()
+        token_usage = request_usage.as_dict() if request_usage is not None else None
 
         log.info(f"Всего токенов использовано: {total_tokens}")
+        if token_usage:
+            log.info(f"Токены текущего запроса по агентам: {token_usage}")
 
-        return {**state, "total_tokens": total_tokens}
+        return {**state, "total_tokens": total_tokens, "token_usage": token_usage}
 
     def build_graph(self):
         workflow = StateGraph(ContextState)
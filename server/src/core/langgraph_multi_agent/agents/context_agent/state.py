@@ -10,4 +10,5 @@ class ContextState(TypedDict):
     user_documents: Optional[List[dict]]
     system_prompt: Optional[str]
     context: Optional[str]
-    total_tokens: int
\ No newline at end of file
+    total_tokens: int
+    token_usage: Optional[dict]
\ No newline at end of file
@@ -1,6 +1,10 @@
 import asyncio
+from contextlib import aclosing
+from typing import Optional
 from langgraph.graph import StateGraph, END
+from langgraph.config import get_stream_writer
 from core.langgraph_multi_agent.agents.conversational_agent.state import ConversationalState
+from openai import AsyncOpenAI
 from core.services.LLMService import LLMService
 from utils.logger import get_logger
 from utils.prompt_loader import render_prompt
@@ -8,8 +12,15 @@ from utils.prompt_loader import render_prompt
 log = get_logger("ConversationalAgent")
 
 class ConversationalAgent:
-    def __init__(self):
-        self.llm_service = LLMService()
+    def __init__(self, stream: bool = False, llm_client: Optional[AsyncOpenAI] = None):
+        """
+        Args:
+            stream: Генерировать ответ потоково — фрагменты отдаются через
+                graph.astream(..., stream_mode="custom") как {"token": str}
+            llm_client: Общий клиент LLM (по умолчанию — клиент процесса)
+        """
+        self.llm_service = LLMService("conversational", llm_client)
+        self.stream = stream
 
     async def generate_response(self, state: ConversationalState) -> ConversationalState:
         message = state["message"]
@@ -21,7 +32,16 @@ class ConversationalAgent:
                              context=context,
                              message=message)
 
-        response = await self.llm_service.fetch_completion(prompt)
+        if self.stream:
+            writer = get_stream_writer()
+            parts = []
+            async with aclosing(self.llm_service.stream_completion(prompt)) as stream:
+                async for part in stream:
+                    parts.append(part)
+                    writer({"token": part})
+            response = "".join(parts)
+        else:
+            response = await self.llm_service.fetch_completion(prompt)
 
         log.info(f"Ответ сгенерирован")
 
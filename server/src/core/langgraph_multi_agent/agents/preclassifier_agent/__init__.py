@@ -0,0 +1,5 @@
+from core.langgraph_multi_agent.agents.preclassifier_agent.graph import PreClassifierAgent
+from core.langgraph_multi_agent.agents.preclassifier_agent.models import PreClassification
+from core.langgraph_multi_agent.agents.preclassifier_agent.state import PreClassifierState
+
+__all__ = ["PreClassifierAgent", "PreClassifierState", "PreClassification"]
\ No newline at end of file
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Optional
+
+from langgraph.graph import END, StateGraph
+from openai import AsyncOpenAI
+
+from core.langgraph_multi_agent.agents.preclassifier_agent.models import PreClassification
+from core.langgraph_multi_agent.agents.preclassifier_agent.state import PreClassifierState
+from core.services.LLMService import LLMService
+from utils.logger import get_logger
+from utils.prompt_loader import render_prompt
+
+log = get_logger("PreClassifierAgent")
+
+class PreClassifierAgent:
+    """Токсичность, маршрутизация и необходимость уточнений одним структурированным запросом
+    вместо трёх отдельных вызовов ToxicityAgent, RouterAgent и ClarificationAgent"""
+
+    def __init__(self, llm_client: Optional[AsyncOpenAI] = None):
+        self.llm_service = LLMService("preclassifier", llm_client)
+
+    async def classify(self, state: PreClassifierState) -> PreClassifierState:
+        message = state["message"]
+        classification = state.get("classification", "")
+        history = state.get("history", [])
+
+        log.info(f"Предварительная классификация сообщения: {message}")
+
+        prompt = render_prompt("preclassifier_prompt",
+                             message=message,
+                             classification=classification,
+                             history=history)
+
+        response: PreClassification = await self.llm_service.fetch_structured_completion(prompt, PreClassification)
+
+        # Как и в цепочке агентов: уточнения запрашиваются только для нетоксичного и неясного запроса
+        in_clarification_mode = not response.is_toxic and not response.is_clear and response.needs_clarification
+
+        log.info(f"Предклассификация: toxic={response.is_toxic}, RAG={response.requires_rag}, API={response.requires_api}, "
+                 f"Web={response.requires_web_search}, Clear={response.is_clear}, Clarify={in_clarification_mode}")
+        log.info(f"Reasoning: {response.reasoning}")
+
+        return {
+            **state,
+            "is_toxic": response.is_toxic,
+            "requires_rag": response.requires_rag,
+            "requires_api": response.requires_api,
+            "requires_web_search": response.requires_web_search,
+            "is_clear": response.is_clear,
+            "in_clarification_mode": in_clarification_mode,
+            "clarification_questions": response.questions if in_clarification_mode else None
+        }
+
+    def build_graph(self):
+        workflow = StateGraph(PreClassifierState)
+
+        workflow.add_node("classify", self.classify)
+
+        workflow.set_entry_point("classify")
+        workflow.add_edge("classify", END)
+
+        return workflow.compile()
+
+async def main():
+    agent = PreClassifierAgent()
+    graph = agent.build_graph()
+
+    test_messages = [
+        "Где находится МФЦ на Невском проспекте 1?",
+        "Где МФЦ?",
+        "Ты тупой бот, от тебя никакой пользы"
+    ]
+
+    for message in test_messages:
+        result = await graph.ainvoke({"message": message, "classification": "", "history": []})
+        print(f"Сообщение: {message}")
+        print(f"Токсичное: {result['is_toxic']}")
+        print(f"Маршрут: RAG={result['requires_rag']}, API={result['requires_api']}, Web={result['requires_web_search']}")
+        print(f"Вопросы: {result['clarification_questions']}\n")
+
+if __name__ == "__main__":
+    asyncio.run(main())
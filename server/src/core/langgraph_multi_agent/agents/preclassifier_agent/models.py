@@ -0,0 +1,14 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class PreClassification(BaseModel):
+    is_toxic: bool = Field(description="True если сообщение токсичное, False если нет")
+    requires_rag: bool = Field(description="True если нужен поиск в базе знаний (нормативно-правовая информация, FAQ, госуслуги)")
+    requires_api: bool = Field(description="True если нужно обратиться к городским API (МФЦ, поликлиники, школы, детсады, афиша, места)")
+    requires_web_search: bool = Field(description="True если нужна актуальная информация из интернета")
+    is_clear: bool = Field(description="True если запрос понятен и можно дать ответ, False если нужны уточнения")
+    needs_clarification: bool = Field(description="True если нужны уточнения для ответа")
+    questions: List[str] = Field(description="Список вопросов для уточнения (если нужны)")
+    reasoning: str = Field(description="Краткое объяснение принятого решения")
@@ -0,0 +1,14 @@
+from typing import List, Optional, TypedDict
+
+
+class PreClassifierState(TypedDict):
+    message: str
+    classification: str
+    history: List[dict]
+    is_toxic: bool
+    requires_rag: bool
+    requires_api: bool
+    requires_web_search: bool
+    is_clear: bool
+    in_clarification_mode: bool
+    clarification_questions: Optional[List[str]]
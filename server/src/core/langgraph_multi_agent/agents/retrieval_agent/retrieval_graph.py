@@ -1,11 +1,12 @@
 import asyncio
 import json
 import requests
-from typing import List, Dict
+from typing import List, Dict, Optional
 from tavily import TavilyClient
 from langgraph.graph import StateGraph, END
 from core.langgraph_multi_agent.agents.retrieval_agent.state import RetrievalState
 from core.langgraph_multi_agent.agents.retrieval_agent import tools
+from openai import AsyncOpenAI
 from core.services.LLMService import LLMService
 from config.Config import CONFIG
 from utils.logger import get_logger
@@ -163,8 +164,8 @@ CITY_API_TOOLS = [
 ]
 
 class RetrievalAgent:
-    def __init__(self):
-        self.llm_service = LLMService()
+    def __init__(self, llm_client: Optional[AsyncOpenAI] = None):
+        self.llm_service = LLMService("retrieval", llm_client)
         self.rag_endpoint_url = CONFIG.rag.endpoint_url
         self.tavily_client = TavilyClient(api_key=CONFIG.tavily.api_key)
 
@@ -179,7 +180,9 @@ class RetrievalAgent:
         log.info(f"Выполнение RAG поиска")
 
         try:
-            response = requests.get(
+            # Синхронный запрос в отдельном потоке, чтобы не блокировать остальные агенты
+            response = await asyncio.to_thread(
+                requests.get,
                 self.rag_endpoint_url,
                 params={"user_question": message},
                 timeout=30
@@ -221,44 +224,86 @@ class RetrievalAgent:
                 return {"api_data": {"error": "No tool calls returned"}}
 
             tool_calls = raw_response.choices[0].message.tool_calls
-            results = []
-
-            for tool_call in tool_calls:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-
-                log.info(f"Вызов функции {function_name} с аргументами {function_args}")
-
-                if function_name in FUNCTION_MAP:
-                    function_to_call = FUNCTION_MAP[function_name]
-                    try:
-                        function_result = function_to_call(**function_args)
-                        results.append({
-                            "function": function_name,
-                            "arguments": function_args,
-                            "result": function_result
-                        })
-                        log.info(f"Результат {function_name}: успешно")
-                        log.info(f"Данные: {function_result}")
-                    except Exception as func_error:
-                        log.error(f"Ошибка выполнения функции {function_name}: {str(func_error)}")
-                        results.append({
-                            "function": function_name,
-                            "arguments": function_args,
-                            "error": str(func_error)
-                        })
-                else:
-                    log.error(f"Функция {function_name} не найдена в FUNCTION_MAP")
-                    results.append({
-                        "function": function_name,
-                        "error": "Function not found"
-                    })
+            results = await self.execute_tool_calls(tool_calls)
 
             return {"api_data": {"tool_calls": results}}
         except Exception as e:
             log.error(f"Ошибка API поиска: {str(e)}")
             return {"api_data": None}
 
+    async def run_tool_call(self, function_name: str, function_args: dict) -> Dict:
+        if function_name not in FUNCTION_MAP:
+            log.error(f"Функция {function_name} не найдена в FUNCTION_MAP")
+            return {"function": function_name, "error": "Function not found"}
+
+        log.info(f"Вызов функции {function_name} с аргументами {function_args}")
+        try:
+            function_result = await asyncio.wait_for(
+                FUNCTION_MAP[function_name](**function_args),
+                timeout=CONFIG.city_api.tool_call_timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            log.error(f"Таймаут функции {function_name} ({CONFIG.city_api.tool_call_timeout_seconds} с)")
+            return {"function": function_name, "arguments": function_args, "error": "Timeout"}
+        except Exception as func_error:
+            log.error(f"Ошибка выполнения функции {function_name}: {str(func_error)}")
+            return {"function": function_name, "arguments": function_args, "error": str(func_error)}
+
+        log.info(f"Результат {function_name}: успешно")
+        log.info(f"Данные: {function_result}")
+        return {"function": function_name, "arguments": function_args, "result": function_result}
+
+    async def execute_tool_calls(self, tool_calls) -> List[Dict]:
+        """
+        Выполняет вызовы функций параллельно: одинаковые вызовы выполняются один раз,
+        каждый ограничен таймаутом, все вместе — общим дедлайном. Результаты успевших
+        вызовов сохраняются, даже если остальные упали или не уложились в дедлайн
+        """
+        calls = {}
+        results_by_key = {}
+        for tool_call in tool_calls:
+            function_name = tool_call.function.name
+            try:
+                function_args = json.loads(tool_call.function.arguments or "{}")
+            except json.JSONDecodeError as e:
+                log.error(f"Некорректные аргументы функции {function_name}: {str(e)}")
+                results_by_key[(function_name, tool_call.function.arguments)] = {
+                    "function": function_name, "error": f"Invalid arguments: {str(e)}"
+                }
+                continue
+
+            key = (function_name, json.dumps(function_args, sort_keys=True, ensure_ascii=False))
+            if key in calls or key in results_by_key:
+                log.info(f"Повторный вызов {function_name} с теми же аргументами пропущен")
+                continue
+            calls[key] = (function_name, function_args)
+            results_by_key[key] = None
+
+        tasks = {key: asyncio.create_task(self.run_tool_call(*call)) for key, call in calls.items()}
+        try:
+            if tasks:
+                deadline = CONFIG.city_api.tool_calls_deadline_seconds
+                done, _ = await asyncio.wait(tasks.values(), timeout=deadline)
+
+                for key, task in tasks.items():
+                    function_name, function_args = calls[key]
+                    if task in done:
+                        results_by_key[key] = task.result()
+                    else:
+                        log.error(f"Функция {function_name} не уложилась в общий дедлайн {deadline} с")
+                        results_by_key[key] = {"function": function_name, "arguments": function_args, "error": "Deadline exceeded"}
+        finally:
+            # Незавершённые вызовы отменяются и при дедлайне, и при отмене самого поиска
+            # (спекулятивный режим), чтобы не занимать соединения городских API в фоне
+            pending = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        log.info(f"Выполнено вызовов функций: {len(tasks)} из {len(tool_calls)} запрошенных")
+        return list(results_by_key.values())
+
     async def get_web_data(self, state: RetrievalState) -> RetrievalState:
         message = state["message"]
         requires_web_search = state.get("requires_web_search", False)
@@ -270,7 +315,8 @@ class RetrievalAgent:
         log.info(f"Выполнение web search через Tavily")
 
         try:
-            response = self.tavily_client.search(
+            response = await asyncio.to_thread(
+                self.tavily_client.search,
                 query=message,
                 max_results=CONFIG.tavily.max_results,
                 search_depth=CONFIG.tavily.search_depth,
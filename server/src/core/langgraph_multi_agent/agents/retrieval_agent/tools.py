@@ -1,5 +1,5 @@
-import requests
 from typing import List, Dict, Any, Optional
+from core.services.CityApiClient import get_city_client
 from utils.logger import get_logger
 
 log = get_logger("RetrievalAgentTools")
@@ -7,17 +7,16 @@ log = get_logger("RetrievalAgentTools")
 geo_api = "https://yazzh-geo.gate.petersburg.ru/api/v2"
 main_api = "https://yazzh.gate.petersburg.ru"
 
-def get_building_id_by_address(user_address: str):
+async def get_building_id_by_address(user_address: str):
     try:
-        address_search = requests.get(
+        address_search = await get_city_client().get(
             f"{geo_api}/geo/buildings/search/",
             params={
                 "query": user_address,
                 "count": 5,
                 "region_of_search": "78"
             },
-            headers={"region": "78"},
-            timeout=10
+            headers={"region": "78"}
         )
         result = address_search.json()
         data = result.get("data", [])
@@ -29,17 +28,16 @@ def get_building_id_by_address(user_address: str):
         log.error(f"Ошибка получения building_id: {str(e)}")
         return None
 
-def find_nearest_mfc(user_address: str):
-    building_id = get_building_id_by_address(user_address)
+async def find_nearest_mfc(user_address: str):
+    building_id = await get_building_id_by_address(user_address)
     if building_id is None:
         return None
 
     try:
-        mfc_info = requests.get(
+        mfc_info = await get_city_client().get(
             f"{main_api}/mfc/",
             params={"id_building": building_id},
-            headers={"region": "78"},
-            timeout=10
+            headers={"region": "78"}
         )
 
         if mfc_info.status_code != 200:
@@ -61,12 +59,11 @@ def find_nearest_mfc(user_address: str):
         log.error(f"Ошибка find_nearest_mfc: {str(e)}")
         return None
 
-def get_mfc_by_district(district: str):
+async def get_mfc_by_district(district: str):
     try:
-        resp = requests.get(
+        resp = await get_city_client().get(
             f"{main_api}/mfc/district/",
-            params={"district": district},
-            timeout=10
+            params={"district": district}
         )
 
         if resp.status_code != 200:
@@ -88,17 +85,16 @@ def get_mfc_by_district(district: str):
         log.error(f"Ошибка get_mfc_by_district: {str(e)}")
         return None
 
-def get_polyclinics_by_address(user_address: str):
-    building_id = get_building_id_by_address(user_address)
+async def get_polyclinics_by_address(user_address: str):
+    building_id = await get_building_id_by_address(user_address)
     if building_id is None:
         return None
 
     try:
-        response = requests.get(
+        response = await get_city_client().get(
             f"{main_api}/polyclinics/",
             params={"id": building_id},
-            headers={"region": "78"},
-            timeout=10
+            headers={"region": "78"}
         )
 
         if response.status_code != 200:
@@ -119,9 +115,9 @@ def get_polyclinics_by_address(user_address: str):
         log.error(f"Ошибка get_polyclinics_by_address: {str(e)}")
         return None
 
-def get_schools_by_district(district: str):
+async def get_schools_by_district(district: str):
     try:
-        resp = requests.get(f"{main_api}/school/map/", timeout=10)
+        resp = await get_city_client().get(f"{main_api}/school/map/")
 
         if resp.status_code != 200:
             log.error(f"Ошибка получения школ: {resp.status_code}")
@@ -139,13 +135,13 @@ def get_schools_by_district(district: str):
         log.error(f"Ошибка get_schools_by_district: {str(e)}")
         return None
 
-def get_linked_schools(user_address: str):
-    building_id = get_building_id_by_address(user_address)
+async def get_linked_schools(user_address: str):
+    building_id = await get_building_id_by_address(user_address)
     if building_id is None:
         return None
 
     try:
-        url = requests.get(f"{main_api}/school/linked/{building_id}", timeout=10)
+        url = await get_city_client().get(f"{main_api}/school/linked/{building_id}")
 
         if url.status_code != 200:
             log.error(f"Ошибка получения привязанных школ: {url.status_code}")
@@ -156,7 +152,7 @@ def get_linked_schools(user_address: str):
         log.error(f"Ошибка get_linked_schools: {str(e)}")
         return None
 
-def get_dou(district: str, age_year: int = 0, age_month: int = 0):
+async def get_dou(district: str, age_year: int = 0, age_month: int = 0):
     try:
         params = {
             "district": district,
@@ -166,7 +162,7 @@ def get_dou(district: str, age_year: int = 0, age_month: int = 0):
             "doo_status": "Функционирует",
         }
 
-        resp = requests.get(f"{main_api}/dou/", params=params, timeout=10)
+        resp = await get_city_client().get(f"{main_api}/dou/", params=params)
 
         if resp.status_code != 200:
             log.error(f"Ошибка получения детских садов: {resp.status_code}")
@@ -177,9 +173,9 @@ def get_dou(district: str, age_year: int = 0, age_month: int = 0):
         log.error(f"Ошибка get_dou: {str(e)}")
         return None
 
-def pensioner_service_category():
+async def pensioner_service_category():
     try:
-        resp = requests.get(f"{main_api}/pensioner/services/category/", timeout=10)
+        resp = await get_city_client().get(f"{main_api}/pensioner/services/category/")
 
         if resp.status_code != 200:
             log.error(f"Ошибка получения категорий услуг: {resp.status_code}")
@@ -190,7 +186,7 @@ def pensioner_service_category():
         log.error(f"Ошибка pensioner_service_category: {str(e)}")
         return None
 
-def pensioner_service(district: str, category: str = ""):
+async def pensioner_service(district: str, category: str = ""):
     try:
         if isinstance(category, (list, tuple, set)):
             category_str = ",".join(str(c).strip() for c in category)
@@ -204,7 +200,7 @@ def pensioner_service(district: str, category: str = ""):
             "page": 1,
         }
 
-        resp = requests.get(f"{main_api}/pensioner/services/", params=params, timeout=10)
+        resp = await get_city_client().get(f"{main_api}/pensioner/services/", params=params)
 
         if resp.status_code != 200:
             log.error(f"Ошибка получения услуг для пенсионеров: {resp.status_code}")
@@ -215,14 +211,14 @@ def pensioner_service(district: str, category: str = ""):
         log.error(f"Ошибка pensioner_service: {str(e)}")
         return None
 
-def afisha_all_category(start_date: str, end_date: str):
+async def afisha_all_category(start_date: str, end_date: str):
     try:
         params = {
             "start_date": start_date,
             "end_date": end_date,
         }
 
-        resp = requests.get(f"{main_api}/afisha/category/all/", params=params, timeout=10)
+        resp = await get_city_client().get(f"{main_api}/afisha/category/all/", params=params)
 
         if resp.status_code != 200:
             log.error(f"Ошибка получения категорий афиши: {resp.status_code}")
@@ -233,7 +229,7 @@ def afisha_all_category(start_date: str, end_date: str):
         log.error(f"Ошибка afisha_all_category: {str(e)}")
         return None
 
-def afisha_all(start_date: str, end_date: str, categoria: str = "", kids: bool = None, free: bool = None):
+async def afisha_all(start_date: str, end_date: str, categoria: str = "", kids: bool = None, free: bool = None):
     try:
         params = {
             "start_date": start_date,
@@ -243,7 +239,7 @@ def afisha_all(start_date: str, end_date: str, categoria: str = "", kids: bool =
             "free": free,
         }
 
-        resp = requests.get(f"{main_api}/afisha/all/", params=params, timeout=10)
+        resp = await get_city_client().get(f"{main_api}/afisha/all/", params=params)
 
         if resp.status_code != 200:
             log.error(f"Ошибка получения афиши: {resp.status_code}")
@@ -254,9 +250,9 @@ def afisha_all(start_date: str, end_date: str, categoria: str = "", kids: bool =
         log.error(f"Ошибка afisha_all: {str(e)}")
         return None
 
-def get_beautiful_places_area():
+async def get_beautiful_places_area():
     try:
-        resp = requests.get(f"{main_api}/beautiful_places/area/", timeout=10)
+        resp = await get_city_client().get(f"{main_api}/beautiful_places/area/")
 
         if resp.status_code != 200:
             log.error(f"Ошибка получения областей красивых мест: {resp.status_code}")
@@ -267,9 +263,9 @@ def get_beautiful_places_area():
         log.error(f"Ошибка get_beautiful_places_area: {str(e)}")
         return None
 
-def get_beautiful_categoria():
+async def get_beautiful_categoria():
     try:
-        resp = requests.get(f"{main_api}/beautiful_places/categoria/", timeout=10)
+        resp = await get_city_client().get(f"{main_api}/beautiful_places/categoria/")
 
         if resp.status_code != 200:
             log.error(f"Ошибка получения категорий красивых мест: {resp.status_code}")
@@ -280,7 +276,7 @@ def get_beautiful_categoria():
         log.error(f"Ошибка get_beautiful_categoria: {str(e)}")
         return None
 
-def get_beautiful_places(area: str = None, categoria: str = None, district: str = None):
+async def get_beautiful_places(area: str = None, categoria: str = None, district: str = None):
     try:
         params = {
             "area": area,
@@ -288,7 +284,7 @@ def get_beautiful_places(area: str = None, categoria: str = None, district: str
             "categoria": categoria,
         }
 
-        resp = requests.get(f"{main_api}/beautiful_places/", params=params, timeout=10)
+        resp = await get_city_client().get(f"{main_api}/beautiful_places/", params=params)
 
         if resp.status_code != 200:
             log.error(f"Ошибка получения красивых мест: {resp.status_code}")
@@ -1,16 +1,22 @@
 import asyncio
+from typing import Optional
 from langgraph.graph import StateGraph, END
 from core.langgraph_multi_agent.agents.router_agent.state import RouterState
 from core.langgraph_multi_agent.agents.router_agent.models import RouteClassification
+from openai import AsyncOpenAI
 from core.services.LLMService import LLMService
+from core.services.FastPathClassifier import FastPathClassifier, DecisionLog, ROUTE_LABELS
 from utils.logger import get_logger
 from utils.prompt_loader import render_prompt
 
 log = get_logger("RouterAgent")
 
 class RouterAgent:
-    def __init__(self):
-        self.llm_service = LLMService()
+    def __init__(self, llm_client: Optional[AsyncOpenAI] = None, fast_path: Optional[FastPathClassifier] = None,
+                 decision_log: Optional[DecisionLog] = None):
+        self.llm_service = LLMService("router", llm_client)
+        self.fast_path = fast_path
+        self.decision_log = decision_log
 
     async def classify_route(self, state: RouterState) -> RouterState:
         message = state["message"]
@@ -19,6 +25,11 @@ class RouterAgent:
 
         log.info(f"Классификация маршрута для сообщения")
 
+        # Эмбеддинг модели быстрого пути считается в пуле потоков, чтобы не блокировать другие агенты
+        fast_decision = await asyncio.to_thread(self.fast_path.route, message, history) if self.fast_path else None
+        if fast_decision is not None and not self.fast_path.should_shadow():
+            return {**state, **fast_decision}
+
         prompt = render_prompt("router_classify_prompt",
                              message=message,
                              classification=classification,
@@ -29,6 +40,12 @@ class RouterAgent:
         log.info(f"Маршрутизация: RAG={response.requires_rag}, API={response.requires_api}, Web={response.requires_web_search}, Clear={response.is_clear}")
         log.info(f"Reasoning: {response.reasoning}")
 
+        decision = {label: getattr(response, label) for label in ROUTE_LABELS}
+        if fast_decision is not None:
+            self.fast_path.record_shadow("route", fast_decision == decision)
+        if self.decision_log:
+            await asyncio.to_thread(self.decision_log.write, "route", message, history, decision)
+
         return {
             **state,
             "requires_rag": response.requires_rag,
@@ -1,10 +1,13 @@
 import asyncio
+from typing import Optional
 from langgraph.graph import StateGraph, END
 
 from core.langgraph_multi_agent.agents.toxicity_agent.state import ToxicityState
 from core.langgraph_multi_agent.agents.toxicity_agent.models import ToxicityCheckResult
 from config.Config import CONFIG
+from openai import AsyncOpenAI
 from core.services.LLMService import LLMService
+from core.services.FastPathClassifier import FastPathClassifier, DecisionLog
 from utils.logger import get_logger
 from utils.prompt_loader import render_prompt
 
@@ -13,19 +16,33 @@ log = get_logger("ToxicityAgent")
 
 
 class ToxicityAgent:
-    def __init__(self):
-        self.llm_service = LLMService()
+    def __init__(self, llm_client: Optional[AsyncOpenAI] = None, fast_path: Optional[FastPathClassifier] = None,
+                 decision_log: Optional[DecisionLog] = None):
+        self.llm_service = LLMService("toxicity", llm_client)
+        self.fast_path = fast_path
+        self.decision_log = decision_log
 
     async def check_toxicity(self, state: ToxicityState) -> ToxicityState:
         message = state["message"]
         log.info(f"Проверка токсичности сообщения: {message}")
 
+        # Эмбеддинг модели быстрого пути считается в пуле потоков, чтобы не блокировать другие агенты
+        fast_decision = await asyncio.to_thread(self.fast_path.toxicity, message) if self.fast_path else None
+        if fast_decision is not None and not self.fast_path.should_shadow():
+            return {"message": message, "is_toxic": fast_decision}
+
         prompt = render_prompt("toxicity_check_prompt", message=message)
 
         response: ToxicityCheckResult = await self.llm_service.fetch_structured_completion(
             prompt, ToxicityCheckResult
         )
 
+        if fast_decision is not None:
+            self.fast_path.record_shadow("toxicity", fast_decision == response.is_toxic)
+        if self.decision_log:
+            await asyncio.to_thread(self.decision_log.write, "toxicity", message, state.get("history", []),
+                                    {"is_toxic": response.is_toxic})
+
         toxicity_status = "токсичное" if response.is_toxic else "чистое"
         log.info(f"Результат проверки токсичности: {toxicity_status}")
 
@@ -1,6 +1,7 @@
 import asyncio
 import os
 from pathlib import Path
+from typing import Optional
 from langgraph.graph import StateGraph, END
 from core.langgraph_multi_agent.state import UrbanAdvisorState
 from core.langgraph_multi_agent.agents.toxicity_agent import ToxicityAgent
@@ -10,19 +11,39 @@ from core.langgraph_multi_agent.agents.retrieval_agent import RetrievalAgent
 from core.langgraph_multi_agent.agents.clarification_agent import ClarificationAgent
 from core.langgraph_multi_agent.agents.context_agent import ContextAgent
 from core.langgraph_multi_agent.agents.conversational_agent import ConversationalAgent
+from core.langgraph_multi_agent.agents.preclassifier_agent import PreClassifierAgent
+from core.services.LLMService import LLMService, get_shared_client
+from core.services.TokenUsage import track_request_usage
+from core.services.FastPathClassifier import FastPathClassifier, DecisionLog
+from core.services.CityApiClient import close_city_client
+from config.Config import CONFIG
 from utils.logger import get_logger
 
 log = get_logger("UrbanAdvisorSystem")
 
 class UrbanAdvisorSystem:
-    def __init__(self):
-        self.toxicity_agent = ToxicityAgent()
+    def __init__(self, stream: bool = False, speculative: Optional[bool] = None, preclassifier: Optional[bool] = None,
+                 fast_path: Optional[bool] = None):
+        self.speculative = CONFIG.agents.speculative if speculative is None else speculative
+        self.preclassifier = CONFIG.agents.preclassifier if preclassifier is None else preclassifier
+
+        # Локальный быстрый путь для очевидных сообщений; журнал решений LLM для его обучения
+        # включается явно (fast_path.log_decisions): в нём сохраняются тексты сообщений пользователей
+        use_fast_path = CONFIG.fast_path.enabled if fast_path is None else fast_path
+        self.fast_path = FastPathClassifier() if use_fast_path else None
+        decision_log = DecisionLog(CONFIG.fast_path.decisions_path) if CONFIG.fast_path.log_decisions else None
+
+        # Один клиент и пул соединений LLM на все агенты
+        llm_client = get_shared_client()
+
+        self.toxicity_agent = ToxicityAgent(llm_client, self.fast_path, decision_log)
         self.parser_agent = ParserAgent()
-        self.router_agent = RouterAgent()
-        self.retrieval_agent = RetrievalAgent()
-        self.clarification_agent = ClarificationAgent()
-        self.context_agent = ContextAgent()
-        self.conversational_agent = ConversationalAgent()
+        self.router_agent = RouterAgent(llm_client, self.fast_path, decision_log)
+        self.retrieval_agent = RetrievalAgent(llm_client)
+        self.clarification_agent = ClarificationAgent(llm_client)
+        self.context_agent = ContextAgent(llm_client)
+        self.conversational_agent = ConversationalAgent(stream=stream, llm_client=llm_client)
+        self.preclassifier_agent = PreClassifierAgent(llm_client)
 
     def should_end_toxic(self, state: UrbanAdvisorState) -> str:
         if state["is_toxic"]:
@@ -36,7 +57,66 @@ class UrbanAdvisorSystem:
             return "end"
         return "continue"
 
+    def should_end_pre_check(self, state: UrbanAdvisorState) -> str:
+        if self.should_end_toxic(state) == "end" or self.should_clarify(state) == "end":
+            return "end"
+        return "continue"
+
+    async def route_and_retrieve(self, state: UrbanAdvisorState) -> UrbanAdvisorState:
+        """Маршрутизация, затем уточнение и спекулятивный поиск параллельно.
+        Поиск отменяется, если запросу нужны уточнения"""
+        routed = {**state, **await self.router_agent.classify_route(state)}
+
+        retrieval = asyncio.create_task(self.retrieval_agent.retrieve_all_parallel(routed))
+        try:
+            clarified = await self.clarification_agent.check_clarification(routed)
+            if clarified.get("in_clarification_mode", False):
+                log.info("Требуются уточнения, спекулятивный поиск отменён")
+                return clarified
+
+            retrieved = await retrieval
+        finally:
+            if not retrieval.done():
+                retrieval.cancel()
+
+        return {
+            **clarified,
+            "rag_context": retrieved.get("rag_context"),
+            "api_data": retrieved.get("api_data"),
+            "web_search_results": retrieved.get("web_search_results")
+        }
+
+    async def speculative_pre_check(self, state: UrbanAdvisorState) -> UrbanAdvisorState:
+        """Проверка токсичности, разбор документов и маршрутизация с поиском выполняются
+        одновременно: промпты токсичности и роутера зависят только от сообщения и истории.
+        Если сообщение токсичное, маршрутизация и поиск отменяются"""
+        log.info("Спекулятивный запуск: токсичность + маршрутизация + поиск")
+
+        toxicity = asyncio.create_task(self.toxicity_agent.check_toxicity(state))
+        pipeline = asyncio.create_task(self.route_and_retrieve(state))
+        parsing = asyncio.create_task(self.parser_agent.process_documents(state))
+
+        try:
+            if (await toxicity)["is_toxic"]:
+                log.info("Сообщение токсичное, спекулятивная работа отменена")
+                return {**state, "is_toxic": True}
+
+            result = await pipeline
+            parsed = await parsing
+        finally:
+            for task in (pipeline, parsing):
+                if not task.done():
+                    task.cancel()
+
+        return {**result, "is_toxic": False, "user_documents": parsed.get("user_documents")}
+
     def build_graph(self):
+        # Один объединённый запрос заменяет все три проверки, спекулировать в нём нечем
+        if self.preclassifier:
+            return self.build_preclassifier_graph()
+        if self.speculative:
+            return self.build_speculative_graph()
+
         workflow = StateGraph(UrbanAdvisorState)
 
         workflow.add_node("toxicity_check", self.toxicity_agent.check_toxicity)
@@ -44,12 +124,6 @@ class UrbanAdvisorSystem:
         workflow.add_node("route", self.router_agent.classify_route)
         workflow.add_node("clarify", self.clarification_agent.check_clarification)
         workflow.add_node("retrieve_all", self.retrieval_agent.retrieve_all_parallel)
-        workflow.add_node("prepare_system_prompt", self.context_agent.prepare_system_prompt)
-        workflow.add_node("prepare_context", self.context_agent.prepare_context)
-        workflow.add_node("save_to_history", self.context_agent.save_to_history)
-        workflow.add_node("update_tokens", self.context_agent.update_tokens)
-        workflow.add_node("generate_response", self.conversational_agent.generate_response)
-        workflow.add_node("save_response_to_history", self.conversational_agent.save_response_to_history)
 
         workflow.set_entry_point("toxicity_check")
 
@@ -75,6 +149,62 @@ class UrbanAdvisorSystem:
         )
 
         workflow.add_edge("retrieve_all", "prepare_system_prompt")
+        self.add_response_nodes(workflow)
+
+        return workflow.compile()
+
+    def build_speculative_graph(self):
+        workflow = StateGraph(UrbanAdvisorState)
+
+        workflow.add_node("pre_check", self.speculative_pre_check)
+        workflow.set_entry_point("pre_check")
+
+        workflow.add_conditional_edges(
+            "pre_check",
+            self.should_end_pre_check,
+            {
+                "end": END,
+                "continue": "prepare_system_prompt"
+            }
+        )
+
+        self.add_response_nodes(workflow)
+
+        return workflow.compile()
+
+    def build_preclassifier_graph(self):
+        workflow = StateGraph(UrbanAdvisorState)
+
+        workflow.add_node("pre_classify", self.preclassifier_agent.classify)
+        workflow.add_node("parse_documents", self.parser_agent.process_documents)
+        workflow.add_node("retrieve_all", self.retrieval_agent.retrieve_all_parallel)
+
+        workflow.set_entry_point("pre_classify")
+
+        workflow.add_conditional_edges(
+            "pre_classify",
+            self.should_end_pre_check,
+            {
+                "end": END,
+                "continue": "parse_documents"
+            }
+        )
+
+        workflow.add_edge("parse_documents", "retrieve_all")
+        workflow.add_edge("retrieve_all", "prepare_system_prompt")
+        self.add_response_nodes(workflow)
+
+        return workflow.compile()
+
+    def add_response_nodes(self, workflow: StateGraph):
+        """Общая для всех режимов часть графа: от системного промпта до сохранения ответа"""
+        workflow.add_node("prepare_system_prompt", self.context_agent.prepare_system_prompt)
+        workflow.add_node("prepare_context", self.context_agent.prepare_context)
+        workflow.add_node("save_to_history", self.context_agent.save_to_history)
+        workflow.add_node("update_tokens", self.context_agent.update_tokens)
+        workflow.add_node("generate_response", self.conversational_agent.generate_response)
+        workflow.add_node("save_response_to_history", self.conversational_agent.save_response_to_history)
+
         workflow.add_edge("prepare_system_prompt", "prepare_context")
         workflow.add_edge("prepare_context", "save_to_history")
         workflow.add_edge("save_to_history", "update_tokens")
@@ -82,8 +212,6 @@ class UrbanAdvisorSystem:
         workflow.add_edge("generate_response", "save_response_to_history")
         workflow.add_edge("save_response_to_history", END)
 
-        return workflow.compile()
-
     def save_graph_visualization(self, graph, filename="urban_advisor_graph"):
         try:
             project_root = Path(__file__).parent.parent.parent.parent.parent
@@ -135,6 +263,7 @@ def create_initial_state(message: str, history: list) -> UrbanAdvisorState:
         "system_prompt": None,
         "context": None,
         "total_tokens": 0,
+        "token_usage": None,
         "response": None
     }
 
@@ -145,7 +274,7 @@ async def main():
 
     log.info("Запуск системы Городской советник")
 
-    system = UrbanAdvisorSystem()
+    system = UrbanAdvisorSystem(stream=True)
     graph = system.build_graph()
 
     graph_path = system.save_graph_visualization(graph)
@@ -174,9 +303,23 @@ async def main():
             print("\n⏳ Обработка запроса...")
             log.info(f"История перед запросом: {len(conversation_history)} сообщений")
 
-            result = await graph.ainvoke(state)
-
-            print("-" * 80)
+            result = None
+            streamed = False
+            with track_request_usage() as request_usage:
+                async for mode, chunk in graph.astream(state, stream_mode=["custom", "values"]):
+                    if mode == "values":
+                        result = chunk
+                        continue
+                    if not streamed:
+                        print("-" * 80)
+                        print("🤖 Городской советник:\n")
+                        streamed = True
+                    print(chunk["token"], end="", flush=True)
+
+            if streamed:
+                print("\n")
+            else:
+                print("-" * 80)
 
             if result.get('is_toxic'):
                 print("🚫 Обнаружено токсичное сообщение. Пожалуйста, общайтесь уважительно.\n")
@@ -192,18 +335,29 @@ async def main():
 
             response = result.get('response')
             if response:
-                print(f"🤖 Городской советник:\n\n{response}\n")
+                if not streamed:
+                    print(f"🤖 Городской советник:\n\n{response}\n")
             else:
                 print("⚠️  Не удалось сгенерировать ответ. Попробуйте переформулировать вопрос.\n")
 
             conversation_history = result.get('history', [])
             log.info(f"История после запроса: {len(conversation_history)} сообщений")
 
-            session_tokens = result.get('total_tokens', 0)
+            # total_tokens в состоянии считается до финального ответа, поэтому берём общий счётчик
+            session_tokens = max(result.get('total_tokens', 0), LLMService.usage_totals.total())
             if session_tokens > total_tokens_used:
                 total_tokens_used = session_tokens
 
-            print(f"📊 Использовано токенов: {session_tokens}")
+            print(f"📊 Использовано токенов: {session_tokens} (за запрос: {request_usage.total()})")
+            for agent, counters in request_usage.as_dict().items():
+                print(f"   {agent}: {counters['requests']} запр., "
+                      f"{counters['prompt_tokens']} + {counters['completion_tokens']} токенов")
+            if system.fast_path:
+                for task, counters in system.fast_path.stats().items():
+                    agreement = "-" if counters["agreement"] is None else f"{counters['agreement']:.0%}"
+                    print(f"⚡ Быстрый путь ({task}): покрытие {counters['coverage']:.0%}, "
+                          f"правила {counters['rules']}, модель {counters['model']}, LLM {counters['deferred']}, "
+                          f"согласие с LLM {agreement} из {counters['shadow_checked']}")
             print(f"💬 Сообщений в истории: {len(conversation_history)}")
             print("-" * 80)
 
@@ -216,5 +370,7 @@ async def main():
             print(f"\n❌ Произошла ошибка: {str(e)}")
             print("Попробуйте снова или введите другой вопрос.\n")
 
+    await close_city_client()
+
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -20,4 +20,5 @@ class UrbanAdvisorState(TypedDict):
     system_prompt: Optional[str]
     context: Optional[str]
     total_tokens: int
+    token_usage: Optional[dict]
     response: Optional[str]
\ No newline at end of file
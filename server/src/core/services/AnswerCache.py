@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.services.EmbeddingBatcher import normalize_query
+from utils.logger import get_logger
+
+log = get_logger("AnswerCache")
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    vector: np.ndarray
+    created_at: float
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class AnswerCache:
+    """Семантический кэш ответов RAG
+
+    Сначала ищется точное совпадение нормализованного вопроса, затем — ближайший
+    по косинусу эмбеддинга вопрос не ниже порога. Записи живут ttl секунд, при
+    переполнении вытесняются самые давно использованные. Изменение базы знаний
+    сбрасывает кэш целиком (invalidate), а ответы, посчитанные до сброса, не сохраняются.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int, similarity_threshold: float):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+
+    def get_exact(self, query: str) -> Optional[str]:
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry):
+                return None
+            self._entries.move_to_end(key)
+            self._record_hit(entry, semantic=False)
+            return entry.answer
+
+    def get_similar(self, query_vector: List[float]) -> Optional[Tuple[str, float]]:
+        """Ближайший сохранённый вопрос с косинусом не ниже порога: (ответ, сходство)"""
+        vector = self._unit(query_vector)
+        with self._lock:
+            self._evict_expired()
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            keys = list(self._entries)
+            similarities = np.stack([self._entries[key].vector for key in keys]) @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+
+            if similarity < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            entry = self._entries[keys[best]]
+            self._entries.move_to_end(keys[best])
+            self._record_hit(entry, semantic=True)
+            return entry.answer, similarity
+
+    def put(self, query: str, query_vector: List[float], answer: str, generation: int,
+            prompt_tokens: int = 0, completion_tokens: int = 0):
+        with self._lock:
+            if generation != self.generation:
+                log.info("База знаний изменилась во время ответа, ответ не кэшируется")
+                return
+
+            key = normalize_query(query)
+            self._entries[key] = CachedAnswer(answer, self._unit(query_vector), time.monotonic(), prompt_tokens, completion_tokens)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self.generation += 1
+        log.info(f"Кэш ответов сброшен ({dropped} записей)")
+
+    def _expired(self, entry: CachedAnswer) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl
+
+    def _evict_expired(self):
+        for key in [key for key, entry in self._entries.items() if self._expired(entry)]:
+            del self._entries[key]
+
+    def _record_hit(self, entry: CachedAnswer, semantic: bool):
+        if semantic:
+            self.semantic_hits += 1
+        else:
+            self.exact_hits += 1
+        self.saved_prompt_tokens += entry.prompt_tokens
+        self.saved_completion_tokens += entry.completion_tokens
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm > 0 else array
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "saved_prompt_tokens": self.saved_prompt_tokens,
+            "saved_completion_tokens": self.saved_completion_tokens
+        }
@@ -0,0 +1,305 @@
+import heapq
+import json
+import math
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+log = get_logger("BM25Index")
+
+
+class IncrementalBM25Index:
+    """Инвертированный BM25 индекс с инкрементальным обновлением
+
+    Для каждого документа хранятся идентификаторы токенов, для каждого терма —
+    частота документов (df) и постинги {слот документа: tf}. Добавление и удаление
+    документов обновляют только постинги и статистику затронутых термов.
+
+    Изменения дописываются в delta-лог рядом со снапшотом индекса. Когда лог
+    разрастается, фоновая компакция удаляет «дыры» от удалённых документов,
+    записывает новый снапшот и обрезает лог.
+    """
+
+    def __init__(self, data_dir: Path, compaction_threshold: int = 1000, k1: float = 1.5, b: float = 0.75):
+        self.data_dir = data_dir
+        self.snapshot_path = data_dir / "incremental_index.json"
+        self.delta_path = data_dir / "delta.jsonl"
+        self.compacting_delta_path = data_dir / "delta.jsonl.compacting"
+        self.compaction_threshold = compaction_threshold
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._reset()
+
+    def _reset(self):
+        self.vocab: Dict[str, int] = {}
+        self.doc_freqs: Dict[int, int] = {}
+        self.postings: Dict[int, Dict[int, int]] = {}
+        self.doc_tokens: List[Optional[List[int]]] = []
+        self.doc_lengths: List[int] = []
+        self.metadata: List[Optional[Dict[str, Any]]] = []
+        self.id_to_slot: Dict[str, int] = {}
+        self.num_docs = 0
+        self.total_length = 0
+        self.delta_ops = 0
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """Живые (не удалённые) документы индекса"""
+        with self._lock:
+            return [doc for doc in self.metadata if doc is not None]
+
+    def add(self, documents: List[Dict[str, Any]], corpus_tokens: List[List[str]], log_delta: bool = True):
+        """Добавление документов с уже токенизированным текстом
+
+        Документ с уже существующим "id" заменяет старую версию, поэтому
+        повторное применение delta-лога идемпотентно.
+        """
+        with self._lock:
+            for doc, tokens in zip(documents, corpus_tokens, strict=True):
+                doc_id = doc.get("id")
+                if doc_id is not None:
+                    self._remove_slot(self.id_to_slot.get(str(doc_id)))
+                self._add_one(doc, tokens)
+
+            if log_delta:
+                self._append_delta([
+                    {"op": "add", "doc": doc, "tokens": tokens}
+                    for doc, tokens in zip(documents, corpus_tokens, strict=True)
+                ])
+
+    def delete(self, ids: List[Any], log_delta: bool = True) -> int:
+        """Удаление документов по "id"
+
+        Returns:
+            Количество удалённых документов
+        """
+        with self._lock:
+            removed = 0
+            for doc_id in ids:
+                if self._remove_slot(self.id_to_slot.get(str(doc_id))):
+                    removed += 1
+
+            if log_delta and removed:
+                self._append_delta([{"op": "delete", "ids": [str(doc_id) for doc_id in ids]}])
+
+            return removed
+
+    def _add_one(self, doc: Dict[str, Any], tokens: List[str]):
+        slot = len(self.metadata)
+        token_ids = []
+        for token in tokens:
+            token_id = self.vocab.get(token)
+            if token_id is None:
+                token_id = len(self.vocab)
+                self.vocab[token] = token_id
+            token_ids.append(token_id)
+
+        for token_id, tf in Counter(token_ids).items():
+            self.postings.setdefault(token_id, {})[slot] = tf
+            self.doc_freqs[token_id] = self.doc_freqs.get(token_id, 0) + 1
+
+        self.doc_tokens.append(token_ids)
+        self.doc_lengths.append(len(token_ids))
+        self.metadata.append(doc)
+        if doc.get("id") is not None:
+            self.id_to_slot[str(doc["id"])] = slot
+
+        self.num_docs += 1
+        self.total_length += len(token_ids)
+
+    def _remove_slot(self, slot: Optional[int]) -> bool:
+        if slot is None or self.metadata[slot] is None:
+            return False
+
+        for token_id in set(self.doc_tokens[slot]):
+            postings = self.postings[token_id]
+            postings.pop(slot, None)
+            self.doc_freqs[token_id] -= 1
+            if not postings:
+                del self.postings[token_id]
+                del self.doc_freqs[token_id]
+
+        doc_id = self.metadata[slot].get("id")
+        if doc_id is not None:
+            self.id_to_slot.pop(str(doc_id), None)
+
+        self.num_docs -= 1
+        self.total_length -= self.doc_lengths[slot]
+        self.doc_tokens[slot] = None
+        self.doc_lengths[slot] = 0
+        self.metadata[slot] = None
+        return True
+
+    def search(self, query_tokens: List[str], k: int) -> List[Tuple[int, float, Dict[str, Any]]]:
+        """Поиск top-k документов
+
+        Документы берутся под той же блокировкой, что и scores: компакция перенумеровывает
+        слоты, а удаление обнуляет их, поэтому слот вне блокировки может указывать на другой документ.
+
+        Returns:
+            Список кортежей (слот документа, score, документ), отсортированный по убыванию score
+        """
+        with self._lock:
+            if self.num_docs == 0:
+                return []
+
+            avg_length = self.total_length / self.num_docs or 1.0
+            scores: Dict[int, float] = {}
+
+            for token in set(query_tokens):
+                token_id = self.vocab.get(token)
+                if token_id is None or token_id not in self.postings:
+                    continue
+
+                df = self.doc_freqs[token_id]
+                idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+                for slot, tf in self.postings[token_id].items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[slot] / avg_length)
+                    scores[slot] = scores.get(slot, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(slot, score, self.metadata[slot]) for slot, score in top]
+
+    def clear(self):
+        """Очистка индекса в памяти и на диске"""
+        with self._lock:
+            self._reset()
+            for path in (self.snapshot_path, self.delta_path, self.compacting_delta_path):
+                path.unlink(missing_ok=True)
+
+    def _append_delta(self, ops: List[Dict[str, Any]]):
+        try:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.delta_path, "a", encoding="utf-8") as f:
+                for op in ops:
+                    f.write(json.dumps(op, ensure_ascii=False, default=str) + "\n")
+            self.delta_ops += len(ops)
+        except Exception as e:
+            log.error(f"Ошибка при записи delta-лога BM25: {e}")
+
+        if self.delta_ops >= self.compaction_threshold:
+            self.compact_in_background()
+
+    def _replay_delta(self, path: Path) -> int:
+        if not path.exists():
+            return 0
+
+        applied = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    op = json.loads(line)
+                except json.JSONDecodeError:
+                    log.warning(f"Пропущена повреждённая запись delta-лога BM25 в {path.name}")
+                    continue
+
+                if op["op"] == "add":
+                    self.add([op["doc"]], [op["tokens"]], log_delta=False)
+                elif op["op"] == "delete":
+                    self.delete(op["ids"], log_delta=False)
+                applied += 1
+
+        return applied
+
+    def load(self) -> bool:
+        """Загрузка снапшота и применение delta-лога
+
+        Returns:
+            True если на диске найден снапшот или delta-лог, False иначе
+        """
+        with self._lock:
+            paths = (self.snapshot_path, self.delta_path, self.compacting_delta_path)
+            if not any(path.exists() for path in paths):
+                return False
+
+            self._reset()
+
+            if self.snapshot_path.exists():
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+
+                vocab = snapshot["vocab"]
+                for doc, token_ids in zip(snapshot["documents"], snapshot["tokens"], strict=True):
+                    self._add_one(doc, [vocab[token_id] for token_id in token_ids])
+
+            # Лог, оставшийся от прерванной компакции, применяется раньше текущего
+            replayed = self._replay_delta(self.compacting_delta_path)
+            self.delta_ops = self._replay_delta(self.delta_path)
+            replayed += self.delta_ops
+
+            log.info(f"BM25 инкрементальный индекс загружен: {self.num_docs} документов, применено {replayed} delta-записей")
+            return True
+
+    def save(self):
+        """Синхронная компакция: снапшот всего индекса и очистка delta-лога"""
+        self._compact()
+
+    def compact_in_background(self):
+        """Запуск компакции в фоновом потоке, если она ещё не выполняется"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+
+        self._compaction_thread = threading.Thread(target=self._compact, name="bm25-compaction", daemon=True)
+        self._compaction_thread.start()
+
+    def _compact(self):
+        try:
+            with self._lock:
+                snapshot = self._compact_in_memory()
+                self.data_dir.mkdir(parents=True, exist_ok=True)
+                # Новые изменения пойдут в свежий лог, пока снапшот пишется на диск
+                if self.delta_path.exists():
+                    if self.compacting_delta_path.exists():
+                        # Лог прерванной компакции уже применён в памяти и войдёт в новый снапшот;
+                        # до его записи лог нужно сохранить, поэтому текущий дописывается в конец
+                        with open(self.delta_path, "r", encoding="utf-8") as src, \
+                                open(self.compacting_delta_path, "a", encoding="utf-8") as dst:
+                            # Пустая строка отделяет возможную оборванную последнюю запись старого лога
+                            dst.write("\n" + src.read())
+                        self.delta_path.unlink()
+                    else:
+                        os.replace(self.delta_path, self.compacting_delta_path)
+                self.delta_ops = 0
+
+            tmp_path = self.snapshot_path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.snapshot_path)
+            self.compacting_delta_path.unlink(missing_ok=True)
+
+            log.info(f"Компакция BM25 индекса завершена: {len(snapshot['documents'])} документов")
+
+        except Exception as e:
+            log.error(f"Ошибка при компакции BM25 индекса: {e}")
+
+    def _compact_in_memory(self) -> Dict[str, Any]:
+        """Удаление «дыр» от удалённых документов и неиспользуемых термов"""
+        live = [(doc, tokens) for doc, tokens in zip(self.metadata, self.doc_tokens, strict=True) if doc is not None]
+        id_to_token = {token_id: token for token, token_id in self.vocab.items()}
+
+        self._reset()
+        for doc, token_ids in live:
+            self._add_one(doc, [id_to_token[token_id] for token_id in token_ids])
+
+        vocab = [None] * len(self.vocab)
+        for token, token_id in self.vocab.items():
+            vocab[token_id] = token
+
+        return {
+            "vocab": vocab,
+            "documents": list(self.metadata),
+            "tokens": [list(tokens) for tokens in self.doc_tokens],
+        }
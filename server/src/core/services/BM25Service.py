@@ -1,13 +1,18 @@
-import re
+import time
+import asyncio
+import hashlib
 import bm25s
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
-from pymorphy3 import MorphAnalyzer
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Any, Iterable, Iterator, Optional
 
 from config.Config import CONFIG
+from core.services.BM25Index import IncrementalBM25Index
+from core.services.Lemmatizer import Lemmatizer
 from utils.logger import get_logger
 
 BM25_DATA_DIR = Path("/data/bm25")
+LEMMA_CACHE_PATH = BM25_DATA_DIR / "lemma_cache.json"
 from core.services.QdrantService import QdrantService
 
 log = get_logger("BM25Service")
@@ -17,75 +22,157 @@ class BM25Service:
 
     def __init__(self):
         self.top_samples = CONFIG.bm25.top_samples
+        self.incremental = CONFIG.bm25.incremental
+        self.sync_page_size = CONFIG.bm25.sync_page_size
+        self.verify_id_hash = CONFIG.bm25.verify_id_hash
         self.metadata: List[Dict[str, Any]] = []
         self.bm25: bm25s.BM25 | None = None
-        self.morph = MorphAnalyzer()
+        self.index: IncrementalBM25Index | None = None
+        self.lemmatizer = Lemmatizer(CONFIG.bm25.lemma_cache_size, workers=CONFIG.bm25.tokenize_workers)
 
-        log.info("BM25Service инициализирован")
+        if self.incremental:
+            self.index = IncrementalBM25Index(BM25_DATA_DIR, compaction_threshold=CONFIG.bm25.compaction_threshold)
+
+        log.info(f"BM25Service инициализирован (инкрементальный режим: {self.incremental})")
 
     def sync_with_qdrant(self, qdrant_service: 'QdrantService'):
         """Синхронизация BM25 индекса с коллекцией Qdrant
 
+        Индекс с диска используется только если он совпадает с коллекцией по числу
+        точек и хэшу множества id. Иначе коллекция читается постранично и
+        индексируется по мере чтения.
+
         Args:
             qdrant_service: Экземпляр QdrantService для получения данных
         """
         try:
-            if self.load():
-                log.info("BM25 индекс загружен с диска, пропускаем синхронизацию с Qdrant")
-                return
-
             collection_info = qdrant_service.get_collection_info()
-            points_count = collection_info.get("points_count", 0)
+            points_count = collection_info.get("points_count", 0) or 0
+
+            if self.load():
+                if not self._is_stale(qdrant_service, points_count):
+                    log.info("BM25 индекс загружен с диска и актуален, пропускаем синхронизацию с Qdrant")
+                    return
+                log.info("BM25 индекс на диске не совпадает с Qdrant, выполняем полную синхронизацию")
+                self.clear()
 
             if points_count == 0:
                 log.info("Коллекция Qdrant пуста, пропускаем синхронизацию BM25")
                 return
 
-            scroll_result = qdrant_service.client.scroll(
-                collection_name=qdrant_service.collection_name,
-                limit=10000,
-                with_payload=True,
-                with_vectors=False
-            )
+            processed = self._stream_from_qdrant(qdrant_service, points_count)
 
-            points, _ = scroll_result
-
-            documents = []
-            for point in points:
-                doc = {
-                    "text": point.payload.get("text", ""),
-                    "id": point.id,
-                    "url": point.payload.get("url", ""),
-                    "title": point.payload.get("title", ""),
-                    "filename": point.payload.get("filename", ""),
-                    "chunk_id": point.payload.get("chunk_id", "")
-                }
-                documents.append(doc)
-
-            if documents:
-                self.index_documents(documents)
+            if processed:
                 self.save()
-                log.info(f"BM25 синхронизирован с Qdrant: {len(documents)} документов")
+                log.info(f"BM25 синхронизирован с Qdrant: {processed} документов")
 
         except Exception as e:
             log.error(f"Ошибка при синхронизации BM25 с Qdrant: {e}")
 
+    def _scroll_pages(self, qdrant_service: 'QdrantService', with_payload: bool = True) -> Iterator[List[Any]]:
+        """Постраничное чтение всей коллекции Qdrant по смещению следующей страницы"""
+        offset = None
+        while True:
+            points, offset = qdrant_service.client.scroll(
+                collection_name=qdrant_service.collection_name,
+                limit=self.sync_page_size,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=False
+            )
+            if points:
+                yield points
+            if offset is None:
+                return
+
+    def _stream_from_qdrant(self, qdrant_service: 'QdrantService', points_count: int) -> int:
+        """Потоковая индексация коллекции: следующая страница читается, пока токенизируется текущая
+
+        Returns:
+            Количество проиндексированных документов
+        """
+        all_documents: List[Dict[str, Any]] = []
+        all_tokens: List[List[str]] = []
+        processed = 0
+        start_time = time.perf_counter()
+        pages = self._scroll_pages(qdrant_service)
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="bm25-scroll") as prefetcher:
+            next_page = prefetcher.submit(next, pages, None)
+            while True:
+                points = next_page.result()
+                if points is None:
+                    break
+                next_page = prefetcher.submit(next, pages, None)
+
+                documents = [self._point_to_document(point) for point in points]
+                corpus_tokens = self._tokenize_corpus(documents)
+
+                if self.incremental:
+                    self.index.add(documents, corpus_tokens, log_delta=False)
+                else:
+                    all_documents.extend(documents)
+                    all_tokens.extend(corpus_tokens)
+
+                processed += len(documents)
+                elapsed = time.perf_counter() - start_time
+                log.info(f"Синхронизация BM25: {processed}/{points_count} документов, {processed / elapsed:.0f} док/с")
+
+        if not self.incremental and all_documents:
+            self.metadata = all_documents
+            self.bm25 = bm25s.BM25()
+            self.bm25.index(all_tokens)
+
+        return processed
+
+    @staticmethod
+    def _point_to_document(point) -> Dict[str, Any]:
+        return {
+            "text": point.payload.get("text", ""),
+            "id": point.id,
+            "url": point.payload.get("url", ""),
+            "title": point.payload.get("title", ""),
+            "filename": point.payload.get("filename", ""),
+            "chunk_id": point.payload.get("chunk_id", ""),
+            "section_path": point.payload.get("section_path", [])
+        }
+
+    @staticmethod
+    def _id_set_hash(ids: Iterable[Any]) -> str:
+        digest = hashlib.sha256()
+        for doc_id in sorted(str(doc_id) for doc_id in ids):
+            digest.update(doc_id.encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def _is_stale(self, qdrant_service: 'QdrantService', points_count: int) -> bool:
+        """Проверка расхождения индекса с коллекцией по числу точек и хэшу множества id"""
+        index_size = self.get_index_size()
+        if index_size != points_count:
+            log.info(f"Расхождение BM25 и Qdrant: {index_size} документов в индексе, {points_count} точек в коллекции")
+            return True
+
+        if not self.verify_id_hash:
+            return False
+
+        qdrant_ids = (point.id for page in self._scroll_pages(qdrant_service, with_payload=False) for point in page)
+        index_ids = (doc.get("id") for doc in self.get_documents())
+
+        if self._id_set_hash(qdrant_ids) != self._id_set_hash(index_ids):
+            log.info("Расхождение BM25 и Qdrant: не совпадает хэш множества id")
+            return True
+
+        return False
+
     def _tokenize(self, text: str) -> List[str]:
         """Токенизация текста с лемматизацией для русского языка"""
-        # Remove punctuation and split into words
-        words = re.findall(r'[а-яёa-z0-9]+', text.lower())
+        return self.lemmatizer.tokenize(text)
 
-        # Lemmatize each word
-        lemmas = []
-        for word in words:
-            parsed = self.morph.parse(word)
-            if parsed:
-                lemma = parsed[0].normal_form
-                lemmas.append(lemma)
-            else:
-                lemmas.append(word)
-
-        return lemmas
+    def _tokenize_corpus(self, documents: List[Dict[str, Any]]) -> List[List[str]]:
+        """Пакетная токенизация корпуса документов"""
+        corpus_tokens = self.lemmatizer.tokenize_batch([doc.get("text", "") for doc in documents])
+        log.info(f"Кэш лемм: {self.lemmatizer.stats()}")
+        return corpus_tokens
 
     def index_documents(self, documents: List[Dict[str, Any]]):
         """Индексация документов для BM25 поиска
@@ -93,39 +180,50 @@ class BM25Service:
         Args:
             documents: Список документов с полями 'text' и опциональными метаданными
         """
-        self.metadata = documents
-
-        corpus_tokens = [self._tokenize(doc.get("text", "")) for doc in documents]
+        corpus_tokens = self._tokenize_corpus(documents)
 
-        self.bm25 = bm25s.BM25()
-        self.bm25.index(corpus_tokens)
+        if self.incremental:
+            self.index.clear()
+            self.index.add(documents, corpus_tokens, log_delta=False)
+        else:
+            self.metadata = documents
+            self.bm25 = bm25s.BM25()
+            self.bm25.index(corpus_tokens)
 
         log.info(f"Проиндексировано {len(documents)} документов для BM25")
 
-    def search(self, query: str) -> List[Tuple[int, str, float, Dict[str, Any]]]:
+    def search(self, query: str, k: Optional[int] = None) -> List[Tuple[int, str, float, Dict[str, Any]]]:
         """Поиск документов с использованием BM25
 
         Args:
             query: Поисковый запрос
+            k: Количество кандидатов (по умолчанию bm25.top_samples)
 
         Returns:
             Список кортежей (индекс, текст, score, метаданные)
         """
-        if self.bm25 is None or len(self.metadata) == 0:
+        if self.get_index_size() == 0:
             log.warning("BM25 индекс пуст. Необходимо проиндексировать документы.")
             return []
 
-        tokenized_query = [self._tokenize(query)]
+        k = k or self.top_samples
+        results = []
 
-        results_obj, scores = self.bm25.retrieve(tokenized_query, k=self.top_samples)
+        if self.incremental:
+            for idx, score, doc in self.index.search(self._tokenize(query), k=k):
+                if score > 0:
+                    results.append((idx, doc.get("text", ""), float(score), doc))
+        else:
+            tokenized_query = [self._tokenize(query)]
 
-        results = []
-        for i, idx in enumerate(results_obj[0]):
-            score = scores[0][i]
-            if score > 0:
-                doc = self.metadata[idx]
-                text = doc.get("text", "")
-                results.append((idx, text, float(score), doc))
+            results_obj, scores = self.bm25.retrieve(tokenized_query, k=min(k, len(self.metadata)))
+
+            for i, idx in enumerate(results_obj[0]):
+                score = scores[0][i]
+                if score > 0:
+                    doc = self.metadata[idx]
+                    text = doc.get("text", "")
+                    results.append((idx, text, float(score), doc))
 
         log.info(f"BM25 поиск: найдено {len(results)} релевантных документов")
         for i, (idx, doc_text, score, _) in enumerate(results[:5], 1):
@@ -134,6 +232,10 @@ class BM25Service:
 
         return results
 
+    async def asearch(self, query: str, k: Optional[int] = None) -> List[Tuple[int, str, float, Dict[str, Any]]]:
+        """Поиск BM25 в пуле потоков, чтобы не блокировать event loop"""
+        return await asyncio.to_thread(self.search, query, k)
+
     def add_documents(self, new_documents: List[Dict[str, Any]]):
         """Добавление новых документов к существующему индексу
 
@@ -143,9 +245,17 @@ class BM25Service:
         if not new_documents:
             return
 
+        if self.incremental:
+            # Токенизируются только новые документы, изменения пишутся в delta-лог
+            corpus_tokens = self._tokenize_corpus(new_documents)
+            self.index.add(new_documents, corpus_tokens)
+            self.lemmatizer.save(LEMMA_CACHE_PATH)
+            log.info(f"Добавлено {len(new_documents)} документов. Всего в индексе: {self.get_index_size()}")
+            return
+
         self.metadata.extend(new_documents)
 
-        corpus_tokens = [self._tokenize(doc.get("text", "")) for doc in self.metadata]
+        corpus_tokens = self._tokenize_corpus(self.metadata)
 
         self.bm25 = bm25s.BM25()
         self.bm25.index(corpus_tokens)
@@ -153,18 +263,59 @@ class BM25Service:
         log.info(f"Добавлено {len(new_documents)} документов. Всего в индексе: {len(self.metadata)}")
         self.save()
 
+    def delete_documents(self, ids: List[Any]) -> int:
+        """Удаление документов из индекса по id точек Qdrant
+
+        Args:
+            ids: Список id удаляемых документов
+
+        Returns:
+            Количество удалённых документов
+        """
+        if not ids:
+            return 0
+
+        if self.incremental:
+            removed = self.index.delete(ids)
+        else:
+            id_set = {str(doc_id) for doc_id in ids}
+            remaining = [doc for doc in self.metadata if str(doc.get("id")) not in id_set]
+            removed = len(self.metadata) - len(remaining)
+            if removed:
+                self.index_documents(remaining)
+                self.save()
+
+        log.info(f"Удалено {removed} документов. Всего в индексе: {self.get_index_size()}")
+        return removed
+
     def clear(self):
         """Очистка индекса BM25"""
         self.metadata = []
         self.bm25 = None
+        if self.incremental:
+            self.index.clear()
         log.info("BM25 индекс очищен")
 
+    def get_documents(self) -> List[Dict[str, Any]]:
+        """Получение всех документов индекса"""
+        if self.incremental:
+            return self.index.documents()
+        return self.metadata
+
     def get_index_size(self) -> int:
         """Получение количества документов в индексе"""
+        if self.incremental:
+            return len(self.index)
         return len(self.metadata)
 
     def save(self):
         """Сохранение BM25 индекса на диск"""
+        self.lemmatizer.save(LEMMA_CACHE_PATH)
+
+        if self.incremental:
+            self.index.save()
+            return
+
         try:
             BM25_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -182,6 +333,15 @@ class BM25Service:
         Returns:
             True если загрузка успешна, False иначе
         """
+        self.lemmatizer.load(LEMMA_CACHE_PATH)
+
+        if self.incremental:
+            try:
+                return self.index.load()
+            except Exception as e:
+                log.error(f"Ошибка при загрузке инкрементального BM25 индекса: {e}")
+                return False
+
         try:
             index_path = BM25_DATA_DIR / "index.json"
 
@@ -0,0 +1,100 @@
+import asyncio
+import time
+import weakref
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from config.Config import CONFIG
+from utils.logger import get_logger
+
+log = get_logger("CityApiClient")
+
+# Клиент и семафоры привязаны к event loop, в котором созданы, поэтому у каждого loop свой клиент;
+# запись удаляется вместе с loop (скрипты и тесты запускают asyncio.run несколько раз)
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, CityApiClient]" = weakref.WeakKeyDictionary()
+
+
+def clean_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Параметры запроса в том виде, в каком их отправлял requests: None пропускаются, bool — True/False"""
+    if params is None:
+        return None
+    return {key: str(value) if isinstance(value, bool) else value for key, value in params.items() if value is not None}
+
+
+class CityApiClient:
+    """Асинхронный клиент городских API: общий пул соединений с keep-alive,
+    ограничение одновременных запросов к каждому хосту и таймауты"""
+
+    def __init__(self):
+        self.per_host_limit = CONFIG.city_api.per_host_limit
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=CONFIG.city_api.max_connections,
+                max_keepalive_connections=CONFIG.city_api.max_keepalive_connections,
+                keepalive_expiry=float(CONFIG.city_api.keepalive_expiry_seconds)
+            ),
+            timeout=httpx.Timeout(float(CONFIG.city_api.timeout_seconds),
+                                  connect=float(CONFIG.city_api.connect_timeout_seconds))
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        log.info(f"Клиент городских API создан: до {CONFIG.city_api.max_connections} соединений, "
+                 f"{self.per_host_limit} одновременных запросов на хост")
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                  timeout: Optional[float] = None) -> httpx.Response:
+        """GET-запрос через общий пул
+
+        Args:
+            timeout: Таймаут запроса в секундах; по умолчанию — city_api.timeout_seconds
+        """
+        kwargs = {} if timeout is None else {"timeout": httpx.Timeout(timeout, connect=min(timeout, CONFIG.city_api.connect_timeout_seconds))}
+
+        async with self._host_limit(url):
+            start = time.perf_counter()
+            self.requests += 1
+            try:
+                return await self.http.get(url, params=clean_params(params), headers=headers, **kwargs)
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.total_seconds += time.perf_counter() - start
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_ms": self.total_seconds / self.requests * 1000 if self.requests else 0.0
+        }
+
+
+def get_city_client() -> CityApiClient:
+    """Общий для всех инструментов клиент городских API (один пул соединений на event loop)"""
+    loop = asyncio.get_running_loop()
+    client = _loop_clients.get(loop)
+    if client is None:
+        client = _loop_clients[loop] = CityApiClient()
+    return client
+
+
+async def close_city_client():
+    """Закрытие клиента текущего event loop при остановке приложения"""
+    client = _loop_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+        log.info("Клиент городских API закрыт")
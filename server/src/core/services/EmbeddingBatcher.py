@@ -0,0 +1,132 @@
+import asyncio
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+log = get_logger("EmbeddingBatcher")
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class QueryEmbeddingBatcher:
+    """Микро-батчинг эмбеддингов запросов с LRU-кэшем
+
+    Запросы, пришедшие в течение окна ожидания, кодируются одним батчем
+    в отдельном потоке, чтобы не блокировать event loop.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], Any], batch_size: int, wait_ms: int, cache_size: int):
+        self.encode = encode
+        self.batch_size = batch_size
+        self.wait_seconds = wait_ms / 1000
+        self.cache_size = cache_size
+
+        self.cache: OrderedDict[str, List[float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_queries = 0
+
+        self._cache_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-encoder")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def get_cached(self, query: str) -> Optional[List[float]]:
+        key = normalize_query(query)
+        with self._cache_lock:
+            vector = self.cache.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put_cached(self, query: str, vector: List[float]):
+        key = normalize_query(query)
+        with self._cache_lock:
+            self.cache[key] = vector
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def embed_sync(self, query: str) -> List[float]:
+        """Синхронное получение эмбеддинга запроса (для вызовов вне event loop)"""
+        vector = self.get_cached(query)
+        if vector is None:
+            vector = self.encode([normalize_query(query)])[0].tolist()
+            self.put_cached(query, vector)
+        return vector
+
+    async def embed(self, query: str) -> List[float]:
+        vector = self.get_cached(query)
+        if vector is not None:
+            return vector
+
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((normalize_query(query), future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.wait_seconds
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            texts = list(dict.fromkeys(text for text, _ in batch))
+
+            try:
+                embeddings = await loop.run_in_executor(self._executor, self.encode, texts)
+                vectors = {text: embeddings[i].tolist() for i, text in enumerate(texts)}
+            except Exception as e:
+                log.error(f"Ошибка при кодировании батча запросов: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for text, vector in vectors.items():
+                self.put_cached(text, vector)
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(vectors[text])
+
+            self.batches += 1
+            self.batched_queries += len(batch)
+            log.debug(f"Закодирован батч из {len(texts)} запросов ({len(batch)} ожидающих)")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cache_size": len(self.cache),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": self.hits / lookups if lookups else 0.0,
+            "batches": self.batches,
+            "avg_batch_size": self.batched_queries / self.batches if self.batches else 0.0
+        }
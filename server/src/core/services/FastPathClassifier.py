@@ -0,0 +1,223 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.Config import CONFIG
+from core.services.EmbeddingBatcher import normalize_query
+from core.services.ModelRegistry import ModelRegistry
+from utils.logger import get_logger
+
+log = get_logger("FastPathClassifier")
+
+TOXICITY_LABELS = ("is_toxic",)
+ROUTE_LABELS = ("requires_rag", "requires_api", "requires_web_search", "is_clear")
+
+# Нецензурная лексика: однозначно токсичное сообщение без обращения к LLM
+PROFANITY_PATTERN = re.compile(
+    r"\b(?:(?:на|по|от|[ао])?ху[йяеёи]\w*|\w*пизд\w*|(?:за|на|по|от|вы|раз|до)?[её]б(?:а|ан|ал|ать|[её][тш]|ну|уч|ыв)\w*|бл[яь]|бляд\w*"
+    r"|сук[аиу]|муд[ао]к\w*|мудил\w*|долбо[её]б\w*|пид[оа]р\w*|гандон\w*|шлюх\w*|у[её]б(?:ищ|ок|ан)\w*)\b",
+    re.IGNORECASE
+)
+
+# Сообщение целиком из приветствий и благодарностей: не токсично, поиск не нужен
+SMALL_TALK_PATTERN = re.compile(
+    r"^(?:(?:привет\w*|здравствуй\w*|здрасьте|добр\w+\s+(?:утро|день|вечер|ночи)|доброе\s+утро|спасибо|благодарю"
+    r"|пока|до\s+свидания|хорошо|ок|окей|понятно|ясно)[\s!.,)]*)+$",
+    re.IGNORECASE
+)
+
+# Просьба о ссылке или актуальных данных: роутер обязан включить Web Search
+WEB_SEARCH_PATTERN = re.compile(r"\b(?:в\s+интернете|в\s+сети|ссылк\w*|погод\w*|новост\w*)", re.IGNORECASE)
+
+
+def toxicity_rules(message: str) -> Optional[bool]:
+    if PROFANITY_PATTERN.search(message):
+        return True
+    if SMALL_TALK_PATTERN.match(message.strip()):
+        return False
+    return None
+
+
+def route_rules(message: str) -> Dict[str, bool]:
+    """Решения роутера, однозначно следующие из текста; недостающие метки решает модель"""
+    if SMALL_TALK_PATTERN.match(message.strip()):
+        return {"requires_rag": False, "requires_api": False, "requires_web_search": False, "is_clear": True}
+    if WEB_SEARCH_PATTERN.search(message):
+        return {"requires_web_search": True}
+    return {}
+
+
+def load_heads(path: str, model_name: str) -> Dict[str, Tuple[np.ndarray, float]]:
+    """Линейные головы (веса, смещение) по меткам из файла, сохранённого utils/train_fast_path.py"""
+    if not os.path.exists(path):
+        log.warning(f"Файл модели быстрого пути {path} не найден, работают только правила")
+        return {}
+
+    data = np.load(path, allow_pickle=False)
+    if str(data["model_name"]) != model_name:
+        log.warning(f"Модель быстрого пути обучена на эмбеддингах {data['model_name']}, а используется {model_name}: "
+                    f"работают только правила")
+        return {}
+
+    return {str(label): (data["weights"][i], float(data["bias"][i])) for i, label in enumerate(data["labels"])}
+
+
+def save_heads(path: str, model_name: str, heads: Dict[str, Tuple[np.ndarray, float]]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    labels = list(heads)
+    np.savez(
+        path,
+        model_name=np.array(model_name),
+        labels=np.array(labels),
+        weights=np.stack([heads[label][0] for label in labels]).astype(np.float32),
+        bias=np.array([heads[label][1] for label in labels], dtype=np.float32)
+    )
+
+
+class DecisionLog:
+    """Журнал решений LLM (JSONL) — обучающие данные для быстрого пути"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, task: str, message: str, history: List[dict], decision: Dict[str, Any]):
+        record = {
+            "task": task,
+            "message": message,
+            "has_history": bool(history),
+            "decision": decision,
+            "timestamp": time.time()
+        }
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            log.warning(f"Не удалось записать решение в {self.path}: {e}")
+
+
+def load_decisions(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class FastPathClassifier:
+    """Локальная проверка токсичности и маршрутизация до обращения к LLM
+
+    Сначала применяются правила (нецензурная лексика, приветствия, просьбы о ссылках),
+    затем логистические головы над эмбеддингами модели поиска. Решение возвращается,
+    только если все метки уверенные (вероятность не ниже порога или не выше 1 - порог),
+    иначе — None, и сообщение уходит в LLM. Маршрут решается только для первого
+    сообщения диалога: для продолжений роутер учитывает историю.
+    """
+
+    def __init__(self, models: Optional[ModelRegistry] = None, model_path: Optional[str] = None):
+        self.toxicity_threshold = CONFIG.fast_path.toxicity_threshold
+        self.route_threshold = CONFIG.fast_path.route_threshold
+        self.shadow_rate = CONFIG.fast_path.shadow_rate
+
+        model_name = CONFIG.qdrant.model_name
+        self.heads = load_heads(model_path or CONFIG.fast_path.model_path, model_name)
+        self.model = None
+        if self.heads:
+            self.model = (models or ModelRegistry()).get_sentence_transformer(
+                model_name, CONFIG.fast_path.device, CONFIG.qdrant.backend, CONFIG.qdrant.quantization
+            )
+            log.info(f"Быстрый путь: загружены головы {', '.join(self.heads)}")
+
+        self._embeddings: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.decisions = {task: {"rules": 0, "model": 0, "deferred": 0} for task in ("toxicity", "route")}
+        self.shadow = {task: {"checked": 0, "agreed": 0} for task in ("toxicity", "route")}
+
+    def embed(self, message: str) -> np.ndarray:
+        """Эмбеддинг сообщения; токсичность и роутер спрашивают одно и то же сообщение, поэтому он кэшируется"""
+        key = normalize_query(message)
+        with self._lock:
+            cached = self._embeddings.get(key)
+            if cached is not None:
+                self._embeddings.move_to_end(key)
+                return cached
+
+        vector = np.asarray(self.model.encode([message], normalize_embeddings=True)[0], dtype=np.float32)
+        with self._lock:
+            self._embeddings[key] = vector
+            while len(self._embeddings) > 256:
+                self._embeddings.popitem(last=False)
+        return vector
+
+    def probabilities(self, message: str, labels: List[str]) -> Optional[Dict[str, float]]:
+        if self.model is None or any(label not in self.heads for label in labels):
+            return None
+        vector = self.embed(message)
+        return {label: float(1 / (1 + np.exp(-(vector @ self.heads[label][0] + self.heads[label][1])))) for label in labels}
+
+    @staticmethod
+    def confident(probabilities: Dict[str, float], threshold: float) -> bool:
+        return all(p >= threshold or p <= 1 - threshold for p in probabilities.values())
+
+    def toxicity(self, message: str) -> Optional[bool]:
+        decision = toxicity_rules(message)
+        if decision is not None:
+            return self._record("toxicity", "rules", decision)
+
+        probabilities = self.probabilities(message, list(TOXICITY_LABELS))
+        if probabilities is None or not self.confident(probabilities, self.toxicity_threshold):
+            return self._record("toxicity", "deferred", None)
+        return self._record("toxicity", "model", probabilities["is_toxic"] >= 0.5)
+
+    def route(self, message: str, history: List[dict]) -> Optional[Dict[str, bool]]:
+        if history:
+            return self._record("route", "deferred", None)
+
+        decision = route_rules(message)
+        missing = [label for label in ROUTE_LABELS if label not in decision]
+        if not missing:
+            return self._record("route", "rules", decision)
+
+        probabilities = self.probabilities(message, missing)
+        if probabilities is None or not self.confident(probabilities, self.route_threshold):
+            return self._record("route", "deferred", None)
+
+        decision.update({label: p >= 0.5 for label, p in probabilities.items()})
+        return self._record("route", "model", decision)
+
+    def _record(self, task: str, source: str, decision):
+        with self._lock:
+            self.decisions[task][source] += 1
+        if decision is not None:
+            log.info(f"Быстрый путь ({task}, {source}): {decision}")
+        return decision
+
+    def should_shadow(self) -> bool:
+        """Доля уверенных решений, которые всё равно проверяются LLM для оценки согласия"""
+        return random.random() < self.shadow_rate
+
+    def record_shadow(self, task: str, agreed: bool):
+        with self._lock:
+            self.shadow[task]["checked"] += 1
+            self.shadow[task]["agreed"] += int(agreed)
+        if not agreed:
+            log.warning(f"Быстрый путь ({task}) разошёлся с LLM")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for task, counters in self.decisions.items():
+                total = sum(counters.values())
+                shadow = self.shadow[task]
+                result[task] = {
+                    **counters,
+                    "coverage": (counters["rules"] + counters["model"]) / total if total else 0.0,
+                    "shadow_checked": shadow["checked"],
+                    "agreement": shadow["agreed"] / shadow["checked"] if shadow["checked"] else None
+                }
+            return result
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.Config import CONFIG
+from utils.logger import get_logger
+
+log = get_logger("HybridRetriever")
+
+FUSION_STRATEGIES = ("rrf", "weighted", "intersection")
+
+
+def bm25_result_to_chunk(result: Tuple[int, str, float, Dict[str, Any]]) -> Dict[str, Any]:
+    """Приведение результата BM25 к формату чанков векторного поиска"""
+    _, text, score, metadata = result
+    return {
+        "id": metadata.get("id"),
+        "score": score,
+        "text": text,
+        "link": metadata.get("url", ""),
+        "title": metadata.get("title", ""),
+        "parsed_at": metadata.get("parsed_at", ""),
+        "filename": metadata.get("filename", ""),
+        "chunk_id": metadata.get("chunk_id", ""),
+        "section_path": metadata.get("section_path", [])
+    }
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[Dict[str, Any]]], weights: List[float], k: int = 60) -> List[Dict[str, Any]]:
+    """Reciprocal Rank Fusion: score = Σ weight / (k + rank)"""
+    scores: Dict[str, float] = {}
+    chunks: Dict[str, Dict[str, Any]] = {}
+
+    for ranked, weight in zip(ranked_lists, weights, strict=True):
+        for rank, chunk in enumerate(ranked, 1):
+            chunk_id = str(chunk["id"])
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + weight / (k + rank)
+            chunks.setdefault(chunk_id, chunk)
+
+    ordered = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [{**chunks[chunk_id], "score": score} for chunk_id, score in ordered]
+
+
+def weighted_score_fusion(ranked_lists: List[List[Dict[str, Any]]], weights: List[float]) -> List[Dict[str, Any]]:
+    """Взвешенная сумма score, нормализованных min-max внутри каждого списка"""
+    scores: Dict[str, float] = {}
+    chunks: Dict[str, Dict[str, Any]] = {}
+
+    for ranked, weight in zip(ranked_lists, weights, strict=True):
+        if not ranked:
+            continue
+        raw = [float(chunk["score"]) for chunk in ranked]
+        low, high = min(raw), max(raw)
+        spread = high - low
+
+        for chunk, score in zip(ranked, raw, strict=True):
+            chunk_id = str(chunk["id"])
+            normalized = (score - low) / spread if spread > 0 else 1.0
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + weight * normalized
+            chunks.setdefault(chunk_id, chunk)
+
+    ordered = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [{**chunks[chunk_id], "score": score} for chunk_id, score in ordered]
+
+
+def intersection_fusion(bm25_chunks: List[Dict[str, Any]], vector_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Прежняя стратегия: пересечение списков в порядке BM25, без пересечений — только векторный поиск"""
+    vector_by_id = {str(chunk["id"]): chunk for chunk in vector_chunks}
+    matched = [vector_by_id[str(chunk["id"])] for chunk in bm25_chunks if str(chunk["id"]) in vector_by_id]
+    return matched or vector_chunks
+
+
+class HybridRetriever:
+    """Гибридный поиск: BM25 и векторный поиск параллельно, затем слияние результатов"""
+
+    def __init__(self, bm25_service, qdrant_service, strategy: Optional[str] = None):
+        self.bm25_service = bm25_service
+        self.qdrant_service = qdrant_service
+        self.strategy = strategy or CONFIG.hybrid.strategy
+        self.bm25_candidates = CONFIG.hybrid.bm25_candidates
+        self.vector_candidates = CONFIG.hybrid.vector_candidates
+        self.fused_candidates = CONFIG.hybrid.fused_candidates
+        self.rrf_k = CONFIG.hybrid.rrf_k
+        self.weights = [float(CONFIG.hybrid.bm25_weight), float(CONFIG.hybrid.vector_weight)]
+
+        if self.strategy not in FUSION_STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия слияния: {self.strategy}")
+
+    async def search_candidates(self, query: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Параллельный поиск кандидатов в BM25 и Qdrant"""
+        bm25_results, vector_chunks = await asyncio.gather(
+            self.bm25_service.asearch(query, self.bm25_candidates),
+            self.qdrant_service.asearch_similar(query, self.vector_candidates)
+        )
+        return [bm25_result_to_chunk(result) for result in bm25_results], vector_chunks
+
+    def fuse(self, bm25_chunks: List[Dict[str, Any]], vector_chunks: List[Dict[str, Any]],
+             strategy: Optional[str] = None) -> List[Dict[str, Any]]:
+        strategy = strategy or self.strategy
+
+        if strategy == "rrf":
+            fused = reciprocal_rank_fusion([bm25_chunks, vector_chunks], self.weights, self.rrf_k)
+        elif strategy == "weighted":
+            fused = weighted_score_fusion([bm25_chunks, vector_chunks], self.weights)
+        else:
+            fused = intersection_fusion(bm25_chunks, vector_chunks)
+
+        return fused[:self.fused_candidates]
+
+    async def retrieve(self, query: str) -> List[Dict[str, Any]]:
+        bm25_chunks, vector_chunks = await self.search_candidates(query)
+        fused = self.fuse(bm25_chunks, vector_chunks)
+
+        log.info(f"Гибридный поиск ({self.strategy}): BM25={len(bm25_chunks)}, вектор={len(vector_chunks)}, после слияния={len(fused)}")
+        return fused
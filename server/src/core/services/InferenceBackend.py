@@ -0,0 +1,78 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from utils.logger import get_logger
+
+log = get_logger("InferenceBackend")
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+MODELS_DIR = Path("/data/models")
+
+ONNX_FILE = "onnx/model.onnx"
+
+
+def quantized_file(quantization: str) -> str:
+    return f"onnx/model_qint8_{quantization}.onnx"
+
+
+def export_path(kind: str, name: str) -> Path:
+    """Директория с ONNX-экспортом модели (kind — sentence_transformer или cross_encoder)"""
+    return MODELS_DIR / kind / name.replace("/", "__")
+
+
+def _model_class(kind: str):
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+    return SentenceTransformer if kind == "sentence_transformer" else CrossEncoder
+
+
+def export_model(kind: str, name: str, backend: str, quantization: str, **kwargs) -> Path:
+    """Экспорт модели в ONNX (и динамическая int8-квантизация для onnx-int8) в MODELS_DIR
+
+    Returns:
+        Путь к ONNX-файлу
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    path = export_path(kind, name)
+    onnx_file = path / ONNX_FILE
+
+    if not onnx_file.exists():
+        log.info(f"Экспорт {name} в ONNX: {path}")
+        model = _model_class(kind)(name, backend="onnx", device="cpu", **kwargs)
+        model.save_pretrained(str(path))
+
+    if backend != "onnx-int8":
+        return onnx_file
+
+    int8_file = path / quantized_file(quantization)
+    if not int8_file.exists():
+        log.info(f"Квантизация {name} в int8 ({quantization})")
+        model = _model_class(kind)(str(path), backend="onnx", device="cpu", **kwargs)
+        export_dynamic_quantized_onnx_model(model, quantization, str(path))
+
+    return int8_file
+
+
+def load_model(kind: str, name: str, backend: str, quantization: str, device: Optional[str] = None,
+               **kwargs) -> Tuple[Any, int]:
+    """Загрузка SentenceTransformer/CrossEncoder с выбранным бэкендом инференса
+
+    Для ONNX-бэкендов модель при первом запуске экспортируется в MODELS_DIR,
+    дальнейшие запуски используют готовый файл.
+
+    Returns:
+        Кортеж (модель, размер ONNX-файла в байтах — 0 для torch)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд инференса: {backend}")
+
+    model_class = _model_class(kind)
+    if backend == "torch":
+        return model_class(name, device=device, **kwargs), 0
+
+    onnx_file = export_model(kind, name, backend, quantization, **kwargs)
+    path = export_path(kind, name)
+    model_kwargs: Dict[str, Any] = {"file_name": str(onnx_file.relative_to(path))}
+    model = model_class(str(path), backend="onnx", device=device, model_kwargs=model_kwargs, **kwargs)
+    return model, onnx_file.stat().st_size
@@ -1,67 +1,167 @@
 import json
 import time
 import asyncio
-from typing import Type, TypeVar
+from typing import Type, TypeVar, Tuple, Dict, AsyncIterator, Optional, Any
 from pydantic import BaseModel
 
+import httpx
 from openai import AsyncOpenAI
 
 from config.Config import CONFIG
+from core.services.RetryPolicy import RetryPolicy
+from core.services.TokenUsage import TokenUsage, current_request_usage
 from utils.logger import get_logger
 
 log = get_logger("LLMService")
 
 T = TypeVar('T', bound=BaseModel)
 
+_shared_client: Optional[AsyncOpenAI] = None
+
+
+def create_llm_client() -> AsyncOpenAI:
+    """HTTP-клиент LLM с настраиваемым пулом соединений, keep-alive и HTTP/2"""
+    http2 = bool(CONFIG.llm.http2)
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            log.warning("Пакет h2 не установлен, клиент LLM работает по HTTP/1.1")
+            http2 = False
+
+    http_client = httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=CONFIG.llm.max_connections,
+            max_keepalive_connections=CONFIG.llm.max_keepalive_connections,
+            keepalive_expiry=float(CONFIG.llm.keepalive_expiry_seconds)
+        ),
+        timeout=httpx.Timeout(float(CONFIG.llm.request_deadline_seconds), connect=10.0)
+    )
+    log.info(f"Клиент LLM создан: до {CONFIG.llm.max_connections} соединений, HTTP/2={http2}")
+
+    return AsyncOpenAI(
+        api_key=CONFIG.llm.token,
+        base_url=CONFIG.llm.url,
+        max_retries=0,
+        http_client=http_client
+    )
+
+
+def get_shared_client() -> AsyncOpenAI:
+    """Общий для всех сервисов и агентов клиент LLM (один пул соединений на процесс)"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = create_llm_client()
+    return _shared_client
+
+
 class LLMService:
-    def __init__(self):
-        self.openai = AsyncOpenAI(
-            api_key=CONFIG.llm.token,
-            base_url=CONFIG.llm.url
-        )
+    # Общая для всех экземпляров политика повторов: circuit breaker отражает состояние провайдера
+    retry_policy: Optional[RetryPolicy] = None
+    # Токены за время жизни процесса в разрезе агентов
+    usage_totals = TokenUsage()
+
+    def __init__(self, agent_name: str = "default", client: Optional[AsyncOpenAI] = None):
+        """
+        Args:
+            agent_name: Имя агента/сервиса для учёта токенов
+            client: Клиент LLM; по умолчанию — общий клиент процесса
+        """
+        self.agent_name = agent_name
+        self.openai = client or get_shared_client()
+        if LLMService.retry_policy is None:
+            LLMService.retry_policy = RetryPolicy.from_config(CONFIG.llm)
         self.request_counter = 0
         self.total_input_token = 0
         self.total_output_token = 0
         log.info("LLMSservice init")
 
+    def _track_usage(self, res) -> Dict[str, int]:
+        usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        if res.usage:
+            usage = {"prompt_tokens": int(res.usage.prompt_tokens), "completion_tokens": int(res.usage.completion_tokens)}
+            self.total_input_token += usage["prompt_tokens"]
+            self.total_output_token += usage["completion_tokens"]
+
+            LLMService.usage_totals.add(self.agent_name, usage["prompt_tokens"], usage["completion_tokens"])
+            request_usage = current_request_usage()
+            if request_usage is not None:
+                request_usage.add(self.agent_name, usage["prompt_tokens"], usage["completion_tokens"])
+        else:
+            log.warning("Нет информации о расходе токенов")
+        return usage
+
     async def fetch_completion(self, prompt: str, args=None) -> str:
+        res, _ = await self.fetch_completion_with_usage(prompt, args)
+        return res
+
+    async def fetch_completion_with_usage(self, prompt: str, args=None) -> Tuple[str, Dict[str, int]]:
+        """Ответ LLM вместе с расходом токенов именно этого запроса"""
         self.request_counter += 1
         request_id = self.request_counter
         log.info(f"Запрос к llm ({request_id}): {prompt}")
 
-        counter = 0
-        while True:
-            try:
-                res = await self.__fetch_completion(prompt, args or {})
-                log.info(f"Ответ от llm ({request_id}): {res}")
-
-                return res
-            except Exception as e:
-                counter += 1
-                if counter < 3:
-                    pass
-                    log.warning(f"Ошибка при запросе к llm: {str(e)}")
-                else:
-                    raise e
-
-    async def __fetch_completion(self, prompt: str, args) -> str:
-        res = await self.openai.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model=CONFIG.llm.model,
-            temperature=0,
-            top_p=0.5,
-            stream=False,
-            **args
+        res = await self.retry_policy.call(
+            lambda timeout: self.openai.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=CONFIG.llm.model,
+                temperature=0,
+                top_p=0.5,
+                stream=False,
+                timeout=timeout,
+                **(args or {})
+            ),
+            request_id
         )
 
-        if res.usage:
-            self.total_input_token += int(res.usage.prompt_tokens)
-            self.total_output_token += int(res.usage.completion_tokens)
-        else:
-            log.warning("Нет информации")
-            pass
+        usage = self._track_usage(res)
+        answer = str(res.choices[0].message.content)
+        log.info(f"Ответ от llm ({request_id}): {answer}")
+        return answer, usage
 
-        return str(res.choices[0].message.content)
+    async def stream_completion(self, prompt: str, args=None, usage: Optional[Dict[str, int]] = None) -> AsyncIterator[str]:
+        """Потоковый ответ LLM: фрагменты текста по мере генерации
+
+        Повторы (через общую политику) возможны только до начала потока, ошибка
+        посреди генерации пробрасывается, чтобы клиент не получил текст дважды.
+
+        Args:
+            usage: Словарь, в который по окончании записывается расход токенов запроса
+        """
+        self.request_counter += 1
+        request_id = self.request_counter
+        log.info(f"Потоковый запрос к llm ({request_id}): {prompt}")
+
+        stream = await self.retry_policy.call(
+            lambda timeout: self.openai.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=CONFIG.llm.model,
+                temperature=0,
+                top_p=0.5,
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+                **(args or {})
+            ),
+            request_id
+        )
+
+        parts = []
+        # Поток закрывается и при досрочном закрытии генератора (клиент отключился):
+        # иначе соединение из общего пула остаётся занятым, а LLM продолжает генерацию
+        async with stream:
+            async for chunk in stream:
+                if chunk.usage:
+                    chunk_usage = self._track_usage(chunk)
+                    if usage is not None:
+                        usage.update(chunk_usage)
+
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+
+        log.info(f"Ответ от llm ({request_id}): {''.join(parts)}")
 
     async def fetch_completion_with_tools(self, prompt: str, args=None):
         """
@@ -72,63 +172,47 @@ class LLMService:
         request_id = self.request_counter
         log.info(f"Запрос к llm с tools ({request_id}): {prompt}")
 
-        counter = 0
-        while True:
-            try:
-                res = await self.openai.chat.completions.create(
-                    messages=[{"role": "user", "content": prompt}],
-                    model=CONFIG.llm.model,
-                    temperature=0,
-                    top_p=0.5,
-                    stream=False,
-                    **(args or {})
-                )
-
-                if res.usage:
-                    self.total_input_token += int(res.usage.prompt_tokens)
-                    self.total_output_token += int(res.usage.completion_tokens)
-
-                log.info(f"Ответ от llm ({request_id}): tool_calls={bool(res.choices[0].message.tool_calls)}")
-                return res
-            except Exception as e:
-                counter += 1
-                if counter < 3:
-                    log.warning(f"Ошибка при запросе к llm: {str(e)}")
-                else:
-                    raise e
+        res = await self.retry_policy.call(
+            lambda timeout: self.openai.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=CONFIG.llm.model,
+                temperature=0,
+                top_p=0.5,
+                stream=False,
+                timeout=timeout,
+                **(args or {})
+            ),
+            request_id
+        )
+
+        self._track_usage(res)
+        log.info(f"Ответ от llm ({request_id}): tool_calls={bool(res.choices[0].message.tool_calls)}")
+        return res
 
     async def fetch_structured_completion(self, prompt: str, response_model: Type[T]) -> T:
         self.request_counter += 1
         request_id = self.request_counter
         log.info(f"Запрос к llm со structured output ({request_id}): {prompt}")
 
-        counter = 0
-        while True:
-            try:
-                res = await self.__fetch_structured_completion(prompt, response_model)
-                log.info(f"Ответ от llm ({request_id}): {res.model_dump_json()}")
-                return res
-            except Exception as e:
-                counter += 1
-                if counter < 3:
-                    log.warning(f"Ошибка при запросе к llm: {str(e)}")
-                else:
-                    raise e
-
-    async def __fetch_structured_completion(self, prompt: str, response_model: Type[T]) -> T:
-        res = await self.openai.beta.chat.completions.parse(
-            messages=[{"role": "user", "content": prompt}],
-            model=CONFIG.llm.model,
-            temperature=0,
-            top_p=0.5,
-            response_format=response_model
+        res = await self.retry_policy.call(
+            lambda timeout: self.openai.beta.chat.completions.parse(
+                messages=[{"role": "user", "content": prompt}],
+                model=CONFIG.llm.model,
+                temperature=0,
+                top_p=0.5,
+                response_format=response_model,
+                timeout=timeout
+            ),
+            request_id
         )
 
-        if res.usage:
-            self.total_input_token += int(res.usage.prompt_tokens)
-            self.total_output_token += int(res.usage.completion_tokens)
+        self._track_usage(res)
+        parsed = res.choices[0].message.parsed
+        log.info(f"Ответ от llm ({request_id}): {parsed.model_dump_json()}")
+        return parsed
 
-        return res.choices[0].message.parsed
+    def stats(self) -> Dict[str, Any]:
+        return {**self.retry_policy.stats(), "tokens_by_agent": LLMService.usage_totals.as_dict()}
 
 async def main():
     service = LLMService()
@@ -0,0 +1,160 @@
+import json
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pymorphy3 import MorphAnalyzer
+
+from utils.logger import get_logger
+
+log = get_logger("Lemmatizer")
+
+WORD_PATTERN = re.compile(r'[а-яёa-z0-9]+')
+
+_worker_morph: Optional[MorphAnalyzer] = None
+
+
+def _init_worker():
+    global _worker_morph
+    _worker_morph = MorphAnalyzer()
+
+
+def _lemmatize_words(words: List[str]) -> List[str]:
+    """Лемматизация списка словоформ в процессе пула"""
+    result = []
+    for word in words:
+        parsed = _worker_morph.parse(word)
+        result.append(parsed[0].normal_form if parsed else word)
+    return result
+
+
+class Lemmatizer:
+    """Токенизатор с лемматизацией и ограниченным LRU-кэшем словоформа→лемма
+
+    Кэш общий для индексации и поиска, сохраняется рядом с BM25 индексом,
+    чтобы после перезапуска не лемматизировать корпус заново.
+    """
+
+    def __init__(self, cache_size: int, workers: int = 0):
+        self.cache_size = cache_size
+        self.workers = workers
+        self.morph = MorphAnalyzer()
+        self.cache: OrderedDict[str, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _lookup(self, word: str) -> Optional[str]:
+        with self._lock:
+            lemma = self.cache.get(word)
+            if lemma is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(word)
+            self.hits += 1
+            return lemma
+
+    def _store(self, word: str, lemma: str):
+        with self._lock:
+            self.cache[word] = lemma
+            self.cache.move_to_end(word)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def lemmatize(self, word: str) -> str:
+        lemma = self._lookup(word)
+        if lemma is None:
+            parsed = self.morph.parse(word)
+            lemma = parsed[0].normal_form if parsed else word
+            self._store(word, lemma)
+        return lemma
+
+    def tokenize(self, text: str) -> List[str]:
+        """Токенизация текста с лемматизацией для русского языка"""
+        return [self.lemmatize(word) for word in WORD_PATTERN.findall(text.lower())]
+
+    def tokenize_batch(self, texts: List[str]) -> List[List[str]]:
+        """Токенизация корпуса: каждая уникальная словоформа лемматизируется один раз
+
+        Словоформы, которых нет в кэше, при workers > 0 лемматизируются пулом процессов.
+        """
+        corpus_words = [WORD_PATTERN.findall(text.lower()) for text in texts]
+
+        lemmas: Dict[str, str] = {}
+        unknown = []
+        for words in corpus_words:
+            for word in words:
+                if word in lemmas:
+                    continue
+                lemma = self._lookup(word)
+                if lemma is None:
+                    unknown.append(word)
+                    lemmas[word] = word
+                else:
+                    lemmas[word] = lemma
+
+        if unknown:
+            if self.workers > 0 and len(unknown) > 1000:
+                chunk_size = max(1, len(unknown) // (self.workers * 4))
+                chunks = [unknown[i:i + chunk_size] for i in range(0, len(unknown), chunk_size)]
+                # spawn: пул запускается из потока инициализации сервисов, пока в соседних
+                # потоках загружаются модели, а fork многопоточного процесса может повесить воркеры
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_init_worker) as pool:
+                    resolved = [lemma for chunk in pool.map(_lemmatize_words, chunks) for lemma in chunk]
+            else:
+                resolved = []
+                for word in unknown:
+                    parsed = self.morph.parse(word)
+                    resolved.append(parsed[0].normal_form if parsed else word)
+
+            for word, lemma in zip(unknown, resolved, strict=True):
+                lemmas[word] = lemma
+                self._store(word, lemma)
+
+        log.info(f"Токенизировано {len(texts)} текстов, новых словоформ: {len(unknown)}")
+        return [[lemmas[word] for word in words] for words in corpus_words]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def save(self, path: Path):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                data = dict(self.cache)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            log.error(f"Ошибка при сохранении кэша лемм: {e}")
+
+    def load(self, path: Path) -> bool:
+        try:
+            if not path.exists():
+                return False
+
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            with self._lock:
+                self.cache = OrderedDict(list(data.items())[-self.cache_size:])
+
+            log.info(f"Кэш лемм загружен: {len(self.cache)} словоформ")
+            return True
+
+        except Exception as e:
+            log.error(f"Ошибка при загрузке кэша лемм: {e}")
+            return False
@@ -0,0 +1,114 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.services.InferenceBackend import load_model
+from utils.logger import get_logger
+
+log = get_logger("ModelRegistry")
+
+
+@dataclass
+class LoadedModel:
+    kind: str
+    name: str
+    device: str
+    instance: Any
+    load_seconds: float
+    memory_bytes: int
+
+
+def model_memory_bytes(model) -> int:
+    """Размер весов и буферов torch-модели в байтах (0 для объектов без параметров)"""
+    total = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(model, attr, None)
+        if callable(tensors):
+            total += sum(t.numel() * t.element_size() for t in tensors())
+    return total
+
+
+class ModelRegistry:
+    """Общий реестр ML-моделей сервисов
+
+    Модели дедуплицируются по (тип, имя, устройство, бэкенд): сервисы, использующие одну
+    и ту же модель, получают один экземпляр. Для подсчёта токенов загружается только
+    собственный токенизатор, без весов модели.
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, str, str], LoadedModel] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+
+    def _get_or_load(self, kind: str, name: str, device: str, loader: Callable[[], Any], memory: Callable[[Any], int]):
+        key = (kind, name, device)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Разные модели грузятся параллельно, одна и та же — ровно один раз
+        with key_lock:
+            loaded = self._models.get(key)
+            if loaded is not None:
+                log.info(f"Модель {name} ({kind}, {device}) уже загружена, используется общий экземпляр")
+                return loaded.instance
+
+            start = time.perf_counter()
+            instance = loader()
+            loaded = LoadedModel(kind, name, device, instance, time.perf_counter() - start, memory(instance))
+            with self._lock:
+                self._models[key] = loaded
+
+        log.info(f"Модель {name} ({kind}, {device}) загружена за {loaded.load_seconds:.1f} с, "
+                 f"{loaded.memory_bytes / 2 ** 20:.0f} МБ")
+        return instance
+
+    def _load_with_backend(self, kind: str, label: str, name: str, device: Optional[str], backend: str,
+                           quantization: str, **kwargs):
+        loaded: Dict[str, int] = {}
+
+        def loader():
+            model, loaded["onnx_bytes"] = load_model(kind, name, backend, quantization, device, **kwargs)
+            return model
+
+        def memory(model) -> int:
+            return loaded["onnx_bytes"] or model_memory_bytes(getattr(model, "model", model))
+
+        suffix = "" if backend == "torch" else f"/{backend}"
+        return self._get_or_load(f"{label}{suffix}", name, device or "auto", loader, memory)
+
+    def get_sentence_transformer(self, name: str, device: str, backend: str = "torch", quantization: str = "avx2"):
+        return self._load_with_backend("sentence_transformer", "sentence_transformer", name, device, backend, quantization)
+
+    def get_cross_encoder(self, name: str, max_length: int, device: Optional[str] = None, backend: str = "torch",
+                          quantization: str = "avx2"):
+        return self._load_with_backend("cross_encoder", f"cross_encoder[{max_length}]", name, device, backend, quantization,
+                                       max_length=max_length)
+
+    def get_tokenizer(self, name: str):
+        """Отдельный экземпляр токенизатора модели, без загрузки весов
+
+        Токенизатор загруженной SentenceTransformer не переиспользуется: быстрые токенизаторы HF
+        нельзя вызывать из разных потоков с разными настройками truncation/padding
+        ("Already borrowed"), а эмбеддер и чанкер работают в разных потоках.
+        """
+        from transformers import AutoTokenizer
+        return self._get_or_load("tokenizer", name, "cpu", lambda: AutoTokenizer.from_pretrained(name), lambda _: 0)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "kind": loaded.kind,
+                    "name": loaded.name,
+                    "device": loaded.device,
+                    "load_seconds": round(loaded.load_seconds, 2),
+                    "memory_mb": round(loaded.memory_bytes / 2 ** 20, 1)
+                }
+                for loaded in self._models.values()
+            ]
+
+    def total_memory_mb(self) -> float:
+        with self._lock:
+            return round(sum(loaded.memory_bytes for loaded in self._models.values()) / 2 ** 20, 1)
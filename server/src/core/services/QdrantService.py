@@ -1,14 +1,19 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple, Optional
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import time
 import uuid
 import asyncio
 import json
 
 import torch
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from sentence_transformers import SentenceTransformer
+from qdrant_client.models import Distance, VectorParams, PointStruct, PointIdsList, Filter, FieldCondition, MatchValue
 
+from core.services.EmbeddingBatcher import QueryEmbeddingBatcher
+from core.services.ModelRegistry import ModelRegistry
+from core.services.СhunksService import CHUNKS_FILENAME
 from utils.logger import get_logger
 from config.Config import CONFIG
 
@@ -22,10 +27,17 @@ def get_device():
     else:
         return "cpu"
 
+# Метка точек, загруженных синхронизацией из директории чанков: только они удаляются как устаревшие
+CORPUS_SOURCE = "corpus"
+
+def chunk_point_id(url: str, text: str) -> str:
+    """Детерминированный id точки по содержимому чанка: повторная загрузка не создаёт дублей"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{url}\n{text}"))
+
 log = get_logger("QdrantService")
 
 class QdrantService:
-    def __init__(self):
+    def __init__(self, models: Optional[ModelRegistry] = None):
         self.host = CONFIG.qdrant.host
         self.port = CONFIG.qdrant.port
         self.collection_name = CONFIG.qdrant.collection_name
@@ -33,22 +45,44 @@ class QdrantService:
         self.vector_size = CONFIG.qdrant.vector_size
         self.top_samples = CONFIG.qdrant.top_samples
         self.batch_size = CONFIG.qdrant.batch_size
+        self.encode_batch_size = CONFIG.qdrant.encode_batch_size
+        self.encode_processes = CONFIG.qdrant.encode_processes
+        self.upload_parallelism = CONFIG.qdrant.upload_parallelism
+        # Хотя бы одна попытка: иначе батч не загружается, а _upsert_batch возвращает None
+        self.upload_retries = max(1, CONFIG.qdrant.upload_retries)
 
         try:
-            self.client = QdrantClient(host=self.host, port=self.port, timeout=60)
-            log.info(f"Подключение к Qdrant установлено: {self.host}:{self.port}")
+            self.client = QdrantClient(
+                host=self.host,
+                port=self.port,
+                grpc_port=CONFIG.qdrant.grpc_port,
+                prefer_grpc=CONFIG.qdrant.prefer_grpc,
+                timeout=60
+            )
+            transport = f"gRPC :{CONFIG.qdrant.grpc_port}" if CONFIG.qdrant.prefer_grpc else "HTTP"
+            log.info(f"Подключение к Qdrant установлено: {self.host}:{self.port} ({transport})")
         except Exception as e:
             log.error(f"Ошибка подключения к Qdrant: {e}")
             raise
 
         try:
             device = get_device()
-            self.model = SentenceTransformer(self.model_name, device=device)
-            log.info(f"Модель {self.model_name} загружена успешно на устройство: {device}")
+            self.device = device
+            self.model = (models or ModelRegistry()).get_sentence_transformer(
+                self.model_name, device, CONFIG.qdrant.backend, CONFIG.qdrant.quantization
+            )
+            log.info(f"Модель {self.model_name} загружена успешно на устройство: {device} (бэкенд {CONFIG.qdrant.backend})")
         except Exception as e:
             log.error(f"Ошибка загрузки модели {self.model_name}: {e}")
             raise
 
+        self.query_batcher = QueryEmbeddingBatcher(
+            encode=lambda texts: self.model.encode(texts, batch_size=len(texts)),
+            batch_size=CONFIG.qdrant.query_batch_size,
+            wait_ms=CONFIG.qdrant.query_batch_wait_ms,
+            cache_size=CONFIG.qdrant.query_cache_size
+        )
+
         self._ensure_collection_exists()
 
     def _ensure_collection_exists(self) -> None:
@@ -92,104 +126,131 @@ class QdrantService:
             Список документов для индексации в других сервисах
         """
         try:
-            chunks_path = Path(chunks_dir)
-            if not chunks_path.exists():
-                log.error(f"Директория {chunks_dir} не существует")
+            chunks_data = self._load_chunk_files(chunks_dir)
+            if not chunks_data:
                 return []
 
-            chunk_files = list(chunks_path.glob("*.json"))
+            return self._embed_and_upload(chunks_data)
 
-            if not chunk_files:
-                log.warning(f"Не найдено файлов чанков в директории {chunks_dir}")
-                return []
+        except Exception as e:
+            log.error(f"Ошибка при добавлении чанков: {e}")
+            return []
 
-            log.info(f"Найдено {len(chunk_files)} файлов чанков")
+    def sync_vectorized_chunks(self, chunks_dir) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Дельта-синхронизация коллекции с директорией чанков
 
-            # Load all chunks data first
-            chunks_data = []
-            for chunk_file in chunk_files:
-                try:
-                    with open(chunk_file, 'r', encoding='utf-8') as f:
-                        chunk_data = json.load(f)
-
-                    content = chunk_data.get("content", "")
-
-                    if not content:
-                        log.warning(f"Файл {chunk_file.name} имеет пустой content, пропускаем")
-                        continue
-
-                    chunks_data.append({
-                        "content": content,
-                        "url": chunk_data.get("url", ""),
-                        "title": chunk_data.get("title", ""),
-                        "parsed_at": chunk_data.get("parsed_at", ""),
-                        "filename": chunk_file.name,
-                        "chunk_id": chunk_file.stem
-                    })
-
-                except Exception as e:
-                    log.error(f"Ошибка при обработке файла {chunk_file}: {e}")
-                    continue
+        Кодируются и загружаются только новые или изменённые чанки, точки исчезнувших
+        чанков удаляются. Загруженные точки помечаются source="corpus"; чанки загруженных
+        пользователями документов и добавленные вручную этой метки не имеют и не трогаются.
 
+        Returns:
+            Кортеж (документы для индексации в других сервисах, id удалённых точек)
+        """
+        try:
+            chunks_data = self._load_chunk_files(chunks_dir)
             if not chunks_data:
-                log.error("Не удалось обработать ни одного файла чанков")
-                return []
+                log.warning("Директория чанков пуста, синхронизация пропущена")
+                return [], []
 
-            # Batch encode all texts at once
-            log.info(f"Кодирование {len(chunks_data)} чанков...")
-            texts = [chunk["content"] for chunk in chunks_data]
-            embeddings = self.model.encode(texts, show_progress_bar=True, batch_size=16)
-            log.info("Кодирование завершено")
-
-            # Create points
-            points = []
-            for i, chunk in enumerate(chunks_data):
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embeddings[i].tolist(),
-                    payload={
-                        "text": chunk["content"],
-                        "url": chunk["url"],
-                        "title": chunk["title"],
-                        "parsed_at": chunk["parsed_at"],
-                        "filename": chunk["filename"],
-                        "chunk_id": chunk["chunk_id"]
-                    }
-                )
-                points.append(point)
+            for chunk in chunks_data:
+                chunk["source"] = CORPUS_SOURCE
+            docs = self._embed_and_upload(chunks_data)
 
-            # Upload to Qdrant in batches
-            total_uploaded = 0
+            keep_ids = {chunk_point_id(chunk["url"], chunk["text"]) for chunk in chunks_data}
+            self._tag_corpus_points(keep_ids)
+            deleted_ids = self.delete_stale_chunks(keep_ids)
 
-            for i in range(0, len(points), self.batch_size):
-                batch = points[i:i + self.batch_size]
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=batch,
-                    wait=True
-                )
-                total_uploaded += len(batch)
-                log.info(f"Загружено {total_uploaded}/{len(points)} чанков")
-
-            log.info(f"Успешно добавлено {len(points)} чанков в Qdrant")
-
-            # Return documents for other services to index
-            return [
-                {
-                    "text": point.payload["text"],
-                    "id": point.id,
-                    "url": point.payload.get("url", ""),
-                    "title": point.payload.get("title", ""),
-                    "filename": point.payload.get("filename", ""),
-                    "chunk_id": point.payload.get("chunk_id", "")
-                }
-                for point in points
-            ]
+            return docs, deleted_ids
 
         except Exception as e:
-            log.error(f"Ошибка при добавлении чанков: {e}")
+            log.error(f"Ошибка при синхронизации чанков: {e}")
+            return [], []
+
+    def _load_chunk_files(self, chunks_dir) -> List[Dict[str, Any]]:
+        """Чтение чанков в список payload
+
+        Если в директории есть chunks.jsonl (или передан путь к самому файлу),
+        чанки читаются из него, иначе — из отдельных *.json файлов.
+        """
+        chunks_path = Path(chunks_dir)
+        if not chunks_path.exists():
+            log.error(f"Директория {chunks_dir} не существует")
             return []
 
+        if chunks_path.is_file():
+            return self._load_chunks_jsonl(chunks_path)
+        if (chunks_path / CHUNKS_FILENAME).exists():
+            return self._load_chunks_jsonl(chunks_path / CHUNKS_FILENAME)
+
+        chunk_files = list(chunks_path.glob("*.json"))
+
+        if not chunk_files:
+            log.warning(f"Не найдено файлов чанков в директории {chunks_dir}")
+            return []
+
+        log.info(f"Найдено {len(chunk_files)} файлов чанков")
+
+        chunks_data = []
+        for chunk_file in chunk_files:
+            try:
+                with open(chunk_file, 'r', encoding='utf-8') as f:
+                    chunk_data = json.load(f)
+
+                content = chunk_data.get("content", "")
+
+                if not content:
+                    log.warning(f"Файл {chunk_file.name} имеет пустой content, пропускаем")
+                    continue
+
+                chunks_data.append({
+                    "text": content,
+                    "url": chunk_data.get("url", ""),
+                    "title": chunk_data.get("title", ""),
+                    "parsed_at": chunk_data.get("parsed_at", ""),
+                    "filename": chunk_file.name,
+                    "chunk_id": chunk_file.stem,
+                    "section_path": chunk_data.get("section_path", [])
+                })
+
+            except Exception as e:
+                log.error(f"Ошибка при обработке файла {chunk_file}: {e}")
+                continue
+
+        if not chunks_data:
+            log.error("Не удалось обработать ни одного файла чанков")
+
+        return chunks_data
+
+    def _load_chunks_jsonl(self, chunks_file: Path) -> List[Dict[str, Any]]:
+        """Построчное чтение чанков из JSONL-файла, записанного ChunkProcessor"""
+        chunks_data = []
+        with open(chunks_file, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    chunk_data = json.loads(line)
+                except json.JSONDecodeError as e:
+                    log.error(f"Ошибка в строке {line_no} файла {chunks_file.name}: {e}")
+                    continue
+
+                content = chunk_data.get("content", "")
+                if not content:
+                    continue
+
+                chunks_data.append({
+                    "text": content,
+                    "url": chunk_data.get("url", ""),
+                    "title": chunk_data.get("title", ""),
+                    "parsed_at": chunk_data.get("parsed_at", ""),
+                    "filename": chunks_file.name,
+                    "chunk_id": chunk_data.get("chunk_id", f"{chunks_file.stem}_{line_no}"),
+                    "section_path": chunk_data.get("section_path", [])
+                })
+
+        log.info(f"Прочитано {len(chunks_data)} чанков из {chunks_file.name}")
+        return chunks_data
+
     def add_chunks_directly(self, chunks: List[Dict[str, str]]) -> List[Dict[str, Any]]:
         """Добавление чанков напрямую в Qdrant
 
@@ -197,7 +258,7 @@ class QdrantService:
             Список документов для индексации в других сервисах
         """
         try:
-            points = []
+            payloads = []
 
             for chunk_data in chunks:
                 content = chunk_data.get("text", "")
@@ -206,56 +267,208 @@ class QdrantService:
                     log.warning("Пропущен чанк с пустым текстом")
                     continue
 
-                embedding = self.model.encode(content).tolist()
-
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload={
-                        "text": content,
-                        "url": chunk_data.get("url", ""),
-                        "title": chunk_data.get("title", ""),
-                        "parsed_at": "",
-                        "filename": "manual",
-                        "chunk_id": str(uuid.uuid4())
-                    }
-                )
-
-                points.append(point)
+                url = chunk_data.get("url", "")
+                payloads.append({
+                    "text": content,
+                    "url": url,
+                    "title": chunk_data.get("title", ""),
+                    "parsed_at": "",
+                    "filename": "manual",
+                    "chunk_id": chunk_point_id(url, content)
+                })
 
-            if not points:
+            if not payloads:
                 log.error("Не удалось обработать ни одного чанка")
                 return []
 
-            total_uploaded = 0
+            return self._embed_and_upload(payloads)
 
-            for i in range(0, len(points), self.batch_size):
-                batch = points[i:i + self.batch_size]
+        except Exception as e:
+            log.error(f"Ошибка при добавлении чанков: {e}")
+            raise
+
+    def _embed_in_batches(self, texts: List[str]) -> Iterator[Tuple[List[int], Any]]:
+        """Кодирование текстов батчами, отсортированными по длине, чтобы уменьшить паддинг
+
+        Yields:
+            Кортежи (индексы текстов в исходном списке, эмбеддинги)
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+
+        use_pool = self.encode_processes > 0 and self.device == "cpu" and len(texts) > self.encode_batch_size * self.encode_processes
+        pool = self.model.start_multi_process_pool(["cpu"] * self.encode_processes) if use_pool else None
+        window = self.encode_batch_size * self.encode_processes if pool else self.encode_batch_size
+
+        try:
+            for start in range(0, len(order), window):
+                indices = order[start:start + window]
+                batch_texts = [texts[i] for i in indices]
+                if pool is not None:
+                    embeddings = self.model.encode(batch_texts, pool=pool, batch_size=self.encode_batch_size)
+                else:
+                    embeddings = self.model.encode(batch_texts, batch_size=self.encode_batch_size)
+                yield indices, embeddings
+        finally:
+            if pool is not None:
+                self.model.stop_multi_process_pool(pool)
+
+    def _upsert_batch(self, points: List[PointStruct], wait: bool = False) -> int:
+        """Загрузка одного батча с повторами и экспоненциальной задержкой"""
+        for attempt in range(1, self.upload_retries + 1):
+            try:
                 self.client.upsert(
                     collection_name=self.collection_name,
-                    points=batch,
-                    wait=True
+                    points=points,
+                    wait=wait
                 )
-                total_uploaded += len(batch)
-                log.info(f"Загружено {total_uploaded}/{len(points)} чанков")
-
-            log.info(f"Успешно добавлено {len(points)} чанков в Qdrant")
-
-            return [
-                {
-                    "text": point.payload["text"],
-                    "id": point.id,
-                    "url": point.payload.get("url", ""),
-                    "title": point.payload.get("title", ""),
-                    "filename": point.payload.get("filename", ""),
-                    "chunk_id": point.payload.get("chunk_id", "")
-                }
-                for point in points
-            ]
+                return len(points)
+            except Exception as e:
+                if attempt == self.upload_retries:
+                    raise
+                delay = 0.5 * 2 ** (attempt - 1)
+                log.warning(f"Ошибка загрузки батча ({attempt}/{self.upload_retries}): {e}. Повтор через {delay:.1f} с")
+                time.sleep(delay)
 
-        except Exception as e:
-            log.error(f"Ошибка при добавлении чанков: {e}")
-            raise
+    def _embed_and_upload(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Общий путь массовой загрузки: кодирование батчами и конвейерная загрузка в Qdrant
+
+        Батчи отправляются с wait=False, одновременно в полёте не больше
+        upload_parallelism запросов. В конце последний батч повторно отправляется
+        с wait=True: операции применяются в порядке WAL, поэтому после его
+        подтверждения применены и все предыдущие.
+
+        id точки вычисляется из url и текста чанка, поэтому уже загруженные чанки
+        пропускаются до кодирования.
+
+        Args:
+            payloads: payload точек, поле "text" кодируется в вектор
+
+        Returns:
+            Список новых документов для индексации в других сервисах
+        """
+        unique_payloads = {}
+        for payload in payloads:
+            unique_payloads.setdefault(chunk_point_id(payload.get("url", ""), payload["text"]), payload)
+
+        existing_ids = self._existing_ids(list(unique_payloads))
+        ids = [point_id for point_id in unique_payloads if point_id not in existing_ids]
+        payloads = [unique_payloads[point_id] for point_id in ids]
+        texts = [payload["text"] for payload in payloads]
+
+        log.info(f"Новых чанков: {len(ids)}, без изменений: {len(existing_ids)}")
+        if not ids:
+            return []
+
+        log.info(f"Кодирование и загрузка {len(texts)} чанков...")
+        total_uploaded = 0
+        last_batch = None
+        in_flight = deque()
+        start_time = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.upload_parallelism, thread_name_prefix="qdrant-upsert") as uploader:
+            for indices, embeddings in self._embed_in_batches(texts):
+                points = [
+                    PointStruct(id=ids[i], vector=embeddings[j].tolist(), payload=payloads[i])
+                    for j, i in enumerate(indices)
+                ]
+
+                for i in range(0, len(points), self.batch_size):
+                    while len(in_flight) >= self.upload_parallelism:
+                        total_uploaded += in_flight.popleft().result()
+                    last_batch = points[i:i + self.batch_size]
+                    in_flight.append(uploader.submit(self._upsert_batch, last_batch))
+
+                elapsed = time.perf_counter() - start_time
+                log.info(f"Загружено {total_uploaded}/{len(payloads)} чанков, {total_uploaded / elapsed:.0f} чанков/с")
+
+            while in_flight:
+                total_uploaded += in_flight.popleft().result()
+
+        if last_batch is not None:
+            self._upsert_batch(last_batch, wait=True)
+
+        log.info(f"Успешно добавлено {total_uploaded} чанков в Qdrant за {time.perf_counter() - start_time:.1f} с")
+
+        return [
+            {
+                "text": payload["text"],
+                "id": ids[i],
+                "url": payload.get("url", ""),
+                "title": payload.get("title", ""),
+                "filename": payload.get("filename", ""),
+                "chunk_id": payload.get("chunk_id", ""),
+                "section_path": payload.get("section_path", [])
+            }
+            for i, payload in enumerate(payloads)
+        ]
+
+    def _existing_ids(self, ids: List[str]) -> set:
+        """Id из списка, которые уже есть в коллекции"""
+        existing = set()
+        for i in range(0, len(ids), self.batch_size):
+            records = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=ids[i:i + self.batch_size],
+                with_payload=False,
+                with_vectors=False
+            )
+            existing.update(str(record.id) for record in records)
+        return existing
+
+    def _scroll_ids(self, scroll_filter: Filter) -> Iterator[str]:
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            for point in points:
+                yield str(point.id)
+            if offset is None:
+                break
+
+    def _tag_corpus_points(self, corpus_ids: set):
+        """Метка source="corpus" для уже загруженных точек корпуса без неё
+
+        Такие точки пропускаются при загрузке как неизменённые: они загружены до появления
+        метки или совпали с чанком загруженного документа.
+        """
+        corpus_filter = FieldCondition(key="source", match=MatchValue(value=CORPUS_SOURCE))
+        untagged_ids = [point_id for point_id in self._scroll_ids(Filter(must_not=[corpus_filter])) if point_id in corpus_ids]
+
+        for i in range(0, len(untagged_ids), self.batch_size):
+            self.client.set_payload(
+                collection_name=self.collection_name,
+                payload={"source": CORPUS_SOURCE},
+                points=untagged_ids[i:i + self.batch_size],
+                wait=True
+            )
+
+        if untagged_ids:
+            log.info(f"Помечено {len(untagged_ids)} чанков корпуса, загруженных без метки source")
+
+    def delete_stale_chunks(self, keep_ids: set) -> List[str]:
+        """Удаление точек корпуса (source="corpus"), отсутствующих в keep_ids
+
+        Returns:
+            Список id удалённых точек
+        """
+        corpus_filter = Filter(must=[FieldCondition(key="source", match=MatchValue(value=CORPUS_SOURCE))])
+        stale_ids = [point_id for point_id in self._scroll_ids(corpus_filter) if point_id not in keep_ids]
+
+        for i in range(0, len(stale_ids), self.batch_size):
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=stale_ids[i:i + self.batch_size]),
+                wait=True
+            )
+
+        log.info(f"Удалено {len(stale_ids)} устаревших чанков из Qdrant")
+        return stale_ids
 
     def get_collection_info(self) -> Dict[str, Any]:
         try:
@@ -273,47 +486,57 @@ class QdrantService:
             log.error(f"Ошибка при получении информации о коллекции: {e}")
             return {}
 
-    def search_similar(self, query: str) -> List[Dict[str, Any]]:
+    def search_similar(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         try:
-            query_embedding = self.model.encode(query).tolist()
+            query_embedding = self.query_batcher.embed_sync(query)
+            return self._search_by_vector(query_embedding, limit or self.top_samples)
 
-            search_results = self.client.query_points(
-                collection_name=self.collection_name,
-                query=query_embedding,
-                limit=self.top_samples
-            )
-
-            results = []
-            for result in search_results.points:
-                results.append({
-                    "id": result.id,
-                    "score": result.score,
-                    "text": result.payload.get("text", ""),
-                    "link": result.payload.get("url", ""),
-                    "title": result.payload.get("title", ""),
-                    "parsed_at": result.payload.get("parsed_at", ""),
-                    "filename": result.payload.get("filename", ""),
-                    "chunk_id": result.payload.get("chunk_id", "")
-                })
+        except Exception as e:
+            log.error(f"Ошибка при поиске: {e}")
+            return []
 
-            return results
+    async def asearch_similar(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Асинхронный поиск: эмбеддинг через микро-батчер, запрос к Qdrant в отдельном потоке"""
+        try:
+            query_embedding = await self.query_batcher.embed(query)
+            return await asyncio.to_thread(self._search_by_vector, query_embedding, limit or self.top_samples)
 
         except Exception as e:
             log.error(f"Ошибка при поиске: {e}")
             return []
 
+    def _search_by_vector(self, query_embedding: List[float], limit: int) -> List[Dict[str, Any]]:
+        search_results = self.client.query_points(
+            collection_name=self.collection_name,
+            query=query_embedding,
+            limit=limit
+        )
+
+        results = []
+        for result in search_results.points:
+            results.append({
+                "id": result.id,
+                "score": result.score,
+                "text": result.payload.get("text", ""),
+                "link": result.payload.get("url", ""),
+                "title": result.payload.get("title", ""),
+                "parsed_at": result.payload.get("parsed_at", ""),
+                "filename": result.payload.get("filename", ""),
+                "chunk_id": result.payload.get("chunk_id", ""),
+                "section_path": result.payload.get("section_path", [])
+            })
+
+        return results
+
 
 async def main():
     qdrant_service = QdrantService()
 
     chunks_dir = "./core/data/chunks"
 
-    log.info("Очистка существующих чанков из Qdrant...")
-    qdrant_service.clear_all_chunks()
-
-    log.info("Добавление чанков в Qdrant...")
-    docs = qdrant_service.add_vectorized_chunks(chunks_dir)
-    log.info(f"Чанки успешно добавлены в векторную БД: {len(docs)} документов")
+    log.info("Синхронизация чанков с Qdrant...")
+    docs, deleted_ids = qdrant_service.sync_vectorized_chunks(chunks_dir)
+    log.info(f"Синхронизация завершена: добавлено {len(docs)}, удалено {len(deleted_ids)} документов")
 
     info = qdrant_service.get_collection_info()
     log.info(f"Информация о коллекции: {info}")
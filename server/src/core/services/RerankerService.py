@@ -1,31 +1,98 @@
+import time
+import asyncio
+import hashlib
+import threading
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from sentence_transformers import CrossEncoder
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Any, Optional
 
 from config.Config import CONFIG
 from utils.logger import get_logger
+from core.services.ModelRegistry import ModelRegistry
 
 log = get_logger("RerankerService")
 
 class RerankerService:
 
-    def __init__(self):
+    def __init__(self, models: Optional[ModelRegistry] = None):
         self.model_name = CONFIG.reranker.model_name
         self.top_samples = CONFIG.reranker.top_samples
+        self.batch_size = CONFIG.reranker.batch_size
+        self.truncate_chars = CONFIG.reranker.truncate_chars
+        self.cache_size = CONFIG.reranker.cache_size
+        self.cache_ttl = CONFIG.reranker.cache_ttl_seconds
+        self.early_exit_margin = float(CONFIG.reranker.early_exit_margin)
+        self._executor = ThreadPoolExecutor(max_workers=CONFIG.reranker.inference_threads, thread_name_prefix="reranker")
+
+        self._cache: OrderedDict[Tuple[str, str], Tuple[float, float]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.early_exits = 0
 
         try:
-            self.model = CrossEncoder(self.model_name)
+            self.model = (models or ModelRegistry()).get_cross_encoder(
+                self.model_name, CONFIG.reranker.max_length,
+                backend=CONFIG.reranker.backend, quantization=CONFIG.reranker.quantization
+            )
             log.info(f"Модель {self.model_name} загружена успешно")
         except Exception as e:
             log.error(f"Ошибка загрузки модели {self.model_name}: {e}")
             raise
 
-    def rerank(self, query: str, documents: List[str]) -> List[Tuple[int, str, float]]:
+    async def arerank(self, query: str, documents: List[str], chunk_ids: Optional[List[str]] = None,
+                      retrieval_scores: Optional[List[float]] = None) -> List[Tuple[int, str, float]]:
+        """Реранкинг в выделенном пуле потоков инференса"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.rerank, query, documents, chunk_ids, retrieval_scores)
+
+    def rerank(self, query: str, documents: List[str], chunk_ids: Optional[List[str]] = None,
+               retrieval_scores: Optional[List[float]] = None) -> List[Tuple[int, str, float]]:
+        """Реранкинг документов кросс-энкодером
+
+        Args:
+            query: Запрос пользователя
+            documents: Тексты кандидатов
+            chunk_ids: Id чанков для кэша оценок (по умолчанию — хэш текста)
+            retrieval_scores: Score кандидатов после слияния, по убыванию; если лидер
+                отрывается от второго кандидата больше чем на early_exit_margin, реранкинг пропускается
+
+        Returns:
+            Список кортежей (исходный индекс, текст, score)
+        """
+        if not documents:
+            return []
+
+        if self._is_confident(retrieval_scores):
+            self.early_exits += 1
+            log.info("Score поиска уверенно разделены, реранкинг пропущен")
+            return [(idx, documents[idx], float(retrieval_scores[idx])) for idx in range(min(self.top_samples, len(documents)))]
+
+        query_hash = hashlib.sha1(query.strip().lower().encode("utf-8")).hexdigest()
+        keys = [
+            (query_hash, str(chunk_ids[i]) if chunk_ids else hashlib.sha1(doc.encode("utf-8")).hexdigest())
+            for i, doc in enumerate(documents)
+        ]
+
+        scores = np.zeros(len(documents), dtype=np.float32)
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self._get_cached(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
 
-        pairs = [[query, doc] for doc in documents]
+        if missing:
+            pairs = [[query, documents[i][:self.truncate_chars]] for i in missing]
+            predicted = self.model.predict(pairs, batch_size=self.batch_size)
+            for i, score in zip(missing, predicted, strict=True):
+                scores[i] = score
+                self._put_cached(keys[i], float(score))
 
-        scores = self.model.predict(pairs)
+        log.info(f"Реранкинг: {len(documents) - len(missing)} оценок из кэша, {len(missing)} вычислено")
 
         ranked_indices = np.argsort(scores)[::-1]
 
@@ -39,3 +106,38 @@ class RerankerService:
             log.info(f"{i} чанк. [Score: {score:.4f}] (Исходный индекс: {original_idx})")
 
         return results
+
+    def _is_confident(self, retrieval_scores: Optional[List[float]]) -> bool:
+        if self.early_exit_margin <= 0 or not retrieval_scores or len(retrieval_scores) < 2:
+            return False
+        top, second = float(retrieval_scores[0]), float(retrieval_scores[1])
+        return top > 0 and (top - second) / top >= self.early_exit_margin
+
+    def _get_cached(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._cache[key]
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return entry[0]
+
+    def _put_cached(self, key: Tuple[str, str], score: float):
+        with self._cache_lock:
+            self._cache[key] = (score, time.monotonic() + self.cache_ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "cache_size": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            "early_exits": self.early_exits
+        }
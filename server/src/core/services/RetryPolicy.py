@@ -0,0 +1,235 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+
+from utils.logger import get_logger
+
+log = get_logger("RetryPolicy")
+
+T = TypeVar("T")
+
+RETRYABLE_ERRORS = ("rate_limit", "timeout", "connection", "server", "other")
+
+# Ошибки, говорящие о проблемах провайдера: только они открывают circuit breaker
+BREAKER_ERRORS = ("rate_limit", "timeout", "connection", "server")
+
+
+class CircuitOpenError(Exception):
+    """Запрос отклонён без обращения к провайдеру: circuit breaker открыт"""
+
+
+class DeadlineExceededError(Exception):
+    """Истёк общий дедлайн запроса с учётом всех повторов"""
+
+
+def classify_error(error: Exception) -> str:
+    """Класс ошибки: rate_limit, timeout, connection, server, client или other"""
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limit"
+    if isinstance(error, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection"
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code == 429:
+            return "rate_limit"
+        if error.status_code in (408, 409) or error.status_code >= 500:
+            return "server"
+        return "client"
+    if isinstance(error, (CircuitOpenError, DeadlineExceededError)):
+        return "client"
+    return "other"
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Значение Retry-After (или retry-after-ms) из ответа провайдера"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class CircuitBreaker:
+    """Circuit breaker: после failure_threshold сбоев подряд запросы отклоняются
+    reset_seconds, затем пропускается один пробный запрос (half_open); пока он
+    выполняется, остальные запросы по-прежнему отклоняются"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Проверка перед запросом
+
+        Returns:
+            True, если запрос пропущен как пробный (его исход нужно передать с probe=True)
+        """
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    raise CircuitOpenError("LLM-провайдер временно недоступен (circuit breaker открыт)")
+                self.state = "half_open"
+                self.probe_in_flight = False
+
+            if self.state == "half_open":
+                if self.probe_in_flight:
+                    raise CircuitOpenError("LLM-провайдер временно недоступен (выполняется пробный запрос)")
+                self.probe_in_flight = True
+                log.info("Circuit breaker: пробный запрос к провайдеру")
+                return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                log.info("Circuit breaker закрыт: провайдер снова отвечает")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def release_probe(self, probe: bool):
+        """Пробный запрос завершился без вердикта о провайдере (ошибка клиента или отмена):
+        следующий запрос снова может стать пробным"""
+        if probe:
+            with self._lock:
+                self.probe_in_flight = False
+
+    def record_failure(self, probe: bool = False):
+        with self._lock:
+            if probe:
+                self.probe_in_flight = False
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    log.warning(f"Circuit breaker открыт на {self.reset_seconds} с после {self.consecutive_failures} сбоев подряд")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Повторы запросов к LLM: классификация ошибок, экспоненциальная задержка с jitter,
+    учёт Retry-After, общий дедлайн запроса и circuit breaker"""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, deadline_seconds: float,
+                 breaker: CircuitBreaker):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds
+        self.breaker = breaker
+
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.retries: Dict[str, int] = {error_class: 0 for error_class in RETRYABLE_ERRORS}
+        self.errors: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, llm_config) -> "RetryPolicy":
+        return cls(
+            max_attempts=llm_config.max_attempts,
+            base_delay=float(llm_config.backoff_base_seconds),
+            max_delay=float(llm_config.backoff_max_seconds),
+            deadline_seconds=float(llm_config.request_deadline_seconds),
+            breaker=CircuitBreaker(llm_config.breaker_failure_threshold, float(llm_config.breaker_reset_seconds))
+        )
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        """Задержка перед повтором: Retry-After провайдера или full jitter от base * 2^attempt"""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call(self, request: Callable[[float], Awaitable[T]], request_id: Any = None) -> T:
+        """Выполнение запроса с повторами
+
+        Args:
+            request: Функция, выполняющая запрос; принимает оставшееся до дедлайна время в секундах
+                (используется как таймаут одного запроса)
+        """
+        self.calls += 1
+        deadline = time.monotonic() + self.deadline_seconds
+        attempt = 0
+
+        while True:
+            try:
+                probe = self.breaker.before_call()
+            except CircuitOpenError:
+                self.rejected += 1
+                raise
+
+            remaining = deadline - time.monotonic()
+            try:
+                result = await asyncio.wait_for(request(remaining), timeout=remaining)
+            except Exception as e:
+                error_class = classify_error(e)
+                self.errors[error_class] = self.errors.get(error_class, 0) + 1
+                if error_class in BREAKER_ERRORS:
+                    self.breaker.record_failure(probe)
+                else:
+                    self.breaker.release_probe(probe)
+
+                attempt += 1
+                if error_class not in RETRYABLE_ERRORS or attempt >= self.max_attempts:
+                    self.failures += 1
+                    raise
+
+                delay = self.backoff(attempt - 1, e)
+                if time.monotonic() + delay >= deadline:
+                    self.failures += 1
+                    raise DeadlineExceededError(f"Дедлайн {self.deadline_seconds} с исчерпан после {attempt} попыток: {e}") from e
+
+                self.retries[error_class] += 1
+                log.warning(f"Ошибка при запросе к llm ({request_id}, {error_class}): {e}. "
+                            f"Повтор {attempt}/{self.max_attempts - 1} через {delay:.2f} с")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Отмена запроса не говорит о состоянии провайдера
+                self.breaker.release_probe(probe)
+                raise
+
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected_by_breaker": self.rejected,
+            "retries": dict(self.retries),
+            "errors": dict(self.errors),
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened
+        }
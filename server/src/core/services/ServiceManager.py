@@ -1,14 +1,26 @@
-from typing import Optional
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable
 
 from core.services.QdrantService import QdrantService
 from core.services.RerankerService import RerankerService
 from core.services.СhunksService import ChunkProcessor
 from core.services.LLMService import LLMService
 from core.services.BM25Service import BM25Service
+from core.services.ModelRegistry import ModelRegistry
+from core.services.AnswerCache import AnswerCache
+from config.Config import CONFIG
 from utils.logger import get_logger
 
 log = get_logger("ServiceManager")
 
+SERVICE_NAMES = ("qdrant", "reranker", "llm", "bm25", "chunker")
+
+# Сервисы, без которых нельзя ответить на вопрос пользователя
+QUERY_PATH_SERVICES = ("qdrant", "reranker", "llm", "bm25")
+
 
 class ServiceManager:
 
@@ -28,33 +40,108 @@ class ServiceManager:
             self._chunk_processor: Optional[ChunkProcessor] = None
             self._llm_service: Optional[LLMService] = None
             self._bm25_service: Optional[BM25Service] = None
+            self.models = ModelRegistry()
+            self.answer_cache = AnswerCache(
+                max_size=CONFIG.answer_cache.max_size,
+                ttl_seconds=CONFIG.answer_cache.ttl_seconds,
+                similarity_threshold=float(CONFIG.answer_cache.similarity_threshold)
+            )
+            self._status: Dict[str, Dict[str, Any]] = {
+                name: {"state": "pending", "load_seconds": None, "error": None} for name in SERVICE_NAMES
+            }
+            self._lazy_lock = threading.Lock()
+            self._startup_task: Optional[asyncio.Task] = None
             ServiceManager._initialized = True
 
-    def initialize(self):
-        log.info("Загрузка ML-моделей и инициализация сервисов...")
-
-        log.info("1/5 Инициализация QdrantService...")
-        self._qdrant_service = QdrantService()
-
-        log.info("2/5 Инициализация RerankerService...")
-        self._reranker_service = RerankerService()
-
-        log.info("3/5 Инициализация ChunkProcessor...")
-        self._chunk_processor = ChunkProcessor()
+    def _load(self, name: str, attr: str, factory: Callable[[], Any]):
+        """Создание сервиса с учётом состояния и времени загрузки для /ready"""
+        status = self._status[name]
+        status["state"] = "loading"
+        start = time.perf_counter()
+
+        try:
+            service = factory()
+        except Exception as e:
+            status.update(state="failed", load_seconds=round(time.perf_counter() - start, 2), error=str(e))
+            log.error(f"Ошибка инициализации {name}: {e}")
+            raise
+
+        setattr(self, attr, service)
+        status.update(state="ready", load_seconds=round(time.perf_counter() - start, 2), error=None)
+        log.info(f"Сервис {name} готов за {status['load_seconds']} с")
+        return service
+
+    def _create_bm25_service(self) -> BM25Service:
+        bm25_service = BM25Service()
+        bm25_service.sync_with_qdrant(self.qdrant_service)
+        return bm25_service
 
-        log.info("4/5 Инициализация LLMService...")
-        self._llm_service = LLMService()
-
-        log.info("5/5 Инициализация BM25Service...")
-        self._bm25_service = BM25Service()
-        self._bm25_service.sync_with_qdrant(self._qdrant_service)
+    def initialize(self):
+        """Загрузка сервисов
 
-        log.info("Все сервисы успешно инициализированы и готовы к работе!")
+        Qdrant, реранкер и LLM не зависят друг от друга и при startup.parallel грузятся
+        параллельно; BM25 синхронизируется с Qdrant, поэтому стартует после него.
+        ChunkProcessor при startup.lazy_chunker создаётся при первом обращении.
+        """
+        log.info("Загрузка ML-моделей и инициализация сервисов...")
+        start = time.perf_counter()
+
+        if CONFIG.startup.parallel:
+            with ThreadPoolExecutor(max_workers=3, thread_name_prefix="service-init") as pool:
+                qdrant = pool.submit(self._load, "qdrant", "_qdrant_service", lambda: QdrantService(self.models))
+                reranker = pool.submit(self._load, "reranker", "_reranker_service", lambda: RerankerService(self.models))
+                llm = pool.submit(self._load, "llm", "_llm_service", lambda: LLMService("rag"))
+
+                qdrant.result()
+                bm25 = pool.submit(self._load, "bm25", "_bm25_service", self._create_bm25_service)
+
+                for future in (reranker, llm, bm25):
+                    future.result()
+        else:
+            self._load("qdrant", "_qdrant_service", lambda: QdrantService(self.models))
+            self._load("reranker", "_reranker_service", lambda: RerankerService(self.models))
+            self._load("llm", "_llm_service", lambda: LLMService("rag"))
+            self._load("bm25", "_bm25_service", self._create_bm25_service)
+
+        if CONFIG.startup.lazy_chunker:
+            self._status["chunker"]["state"] = "lazy"
+        else:
+            self._load("chunker", "_chunk_processor", lambda: ChunkProcessor(self.models))
+
+        for model in self.models.stats():
+            log.info(f"Модель {model['name']} ({model['kind']}, {model['device']}): {model['memory_mb']} МБ, "
+                     f"загрузка {model['load_seconds']} с")
+        log.info(f"Память моделей: {self.models.total_memory_mb()} МБ")
+
+        log.info(f"Все сервисы успешно инициализированы за {time.perf_counter() - start:.1f} с и готовы к работе!")
+
+    def start_background_initialization(self) -> asyncio.Task:
+        """Инициализация в фоновом потоке: приложение сразу принимает запросы, готовность — через /ready"""
+        if self._startup_task is None:
+            self._startup_task = asyncio.create_task(asyncio.to_thread(self.initialize))
+            self._startup_task.add_done_callback(self._on_startup_done)
+        return self._startup_task
+
+    @staticmethod
+    def _on_startup_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            log.error(f"Фоновая инициализация сервисов завершилась с ошибкой: {task.exception()}")
+
+    def is_ready(self) -> bool:
+        return all(self._status[name]["state"] == "ready" for name in QUERY_PATH_SERVICES)
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready(),
+            "services": {name: dict(status) for name, status in self._status.items()},
+            "models": self.models.stats()
+        }
 
     def clear_all_chunks(self):
         """Очистка всех чанков из Qdrant и BM25"""
         self.qdrant_service.clear_all_chunks()
         self.bm25_service.clear()
+        self.answer_cache.invalidate()
         log.info("Все чанки очищены из Qdrant и BM25")
 
     def add_vectorized_chunks(self, chunks_dir):
@@ -62,13 +149,26 @@ class ServiceManager:
         docs = self.qdrant_service.add_vectorized_chunks(chunks_dir)
         if docs:
             self.bm25_service.add_documents(docs)
+            self.answer_cache.invalidate()
         return len(docs)
 
+    def sync_vectorized_chunks(self, chunks_dir):
+        """Дельта-синхронизация Qdrant и BM25 с директорией чанков"""
+        docs, deleted_ids = self.qdrant_service.sync_vectorized_chunks(chunks_dir)
+        if deleted_ids:
+            self.bm25_service.delete_documents(deleted_ids)
+        if docs:
+            self.bm25_service.add_documents(docs)
+        if docs or deleted_ids:
+            self.answer_cache.invalidate()
+        return len(docs), len(deleted_ids)
+
     def add_chunks_directly(self, chunks):
         """Добавление чанков напрямую в Qdrant и BM25"""
         docs = self.qdrant_service.add_chunks_directly(chunks)
         if docs:
             self.bm25_service.add_documents(docs)
+            self.answer_cache.invalidate()
         return len(docs)
 
     @property
@@ -86,7 +186,9 @@ class ServiceManager:
     @property
     def chunk_processor(self) -> ChunkProcessor:
         if self._chunk_processor is None:
-            raise RuntimeError("ChunkProcessor не инициализирован. Вызовите initialize() сначала.")
+            with self._lazy_lock:
+                if self._chunk_processor is None:
+                    self._load("chunker", "_chunk_processor", lambda: ChunkProcessor(self.models))
         return self._chunk_processor
 
     @property
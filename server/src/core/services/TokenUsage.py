@@ -0,0 +1,46 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+class TokenUsage:
+    """Счётчики токенов LLM в разрезе агентов"""
+
+    def __init__(self):
+        self.by_agent: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, agent: str, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            counters = self.by_agent.setdefault(agent, {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            counters["requests"] += 1
+            counters["prompt_tokens"] += prompt_tokens
+            counters["completion_tokens"] += completion_tokens
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(c["prompt_tokens"] + c["completion_tokens"] for c in self.by_agent.values())
+
+    def as_dict(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {agent: dict(counters) for agent, counters in self.by_agent.items()}
+
+
+_request_usage: ContextVar[Optional[TokenUsage]] = ContextVar("llm_request_usage", default=None)
+
+
+@contextmanager
+def track_request_usage() -> Iterator[TokenUsage]:
+    """Учёт токенов одного запроса пользователя: все вызовы LLM внутри блока
+    (в том числе из узлов графа, запущенных в отдельных задачах) попадают в один TokenUsage"""
+    usage = TokenUsage()
+    token = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(token)
+
+
+def current_request_usage() -> Optional[TokenUsage]:
+    return _request_usage.get()
@@ -6,6 +6,7 @@ class KnowledgeBaseItem(scrapy.Item):
     title = scrapy.Field()
     image = scrapy.Field()
     content = scrapy.Field()
+    blocks = scrapy.Field()
     category = scrapy.Field()
     scraped_at = scrapy.Field()
     metadata = scrapy.Field()
\ No newline at end of file
@@ -20,4 +20,7 @@ class GuParserPipeline:
             'content': item.get('content')
         }
 
+        if item.get('blocks'):
+            filtered_item['blocks'] = item['blocks']
+
         return filtered_item
\ No newline at end of file
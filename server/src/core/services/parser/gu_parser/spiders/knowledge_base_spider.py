@@ -1,6 +1,7 @@
 import scrapy
 import os
 from core.services.parser.gu_parser.items import KnowledgeBaseItem
+from core.services.parser.gu_parser.structure import extract_blocks
 
 
 class KnowledgeBaseSpider(scrapy.Spider):
@@ -85,6 +86,7 @@ class KnowledgeBaseSpider(scrapy.Spider):
                 content_blocks.append(cleaned)
 
         item['content'] = ' '.join(content_blocks)
+        item['blocks'] = extract_blocks(response)
 
         paragraphs = response.css('main p').getall()
         if not paragraphs:
@@ -0,0 +1,31 @@
+BLOCK_XPATH = (
+    './/*[self::h2 or self::h3 or self::h4 or self::h5 or self::h6 or self::p'
+    ' or (self::li and not(.//p) and not(.//li))]'
+)
+
+
+def extract_blocks(response) -> list[dict]:
+    """Структура статьи: заголовки, абзацы и пункты списков в порядке следования
+
+    Каждый блок — {"type": "heading" | "paragraph" | "list_item", "level": int, "text": str},
+    level заполняется только для заголовков (2..6), для остальных блоков он равен 0.
+    """
+    root = response.css('main')
+    if not root:
+        root = response.css('article')
+
+    blocks = []
+    for element in root.xpath(BLOCK_XPATH):
+        tag = element.xpath('name()').get().lower()
+        text = ' '.join(t.strip() for t in element.xpath('.//text()').getall() if t.strip())
+        if not text:
+            continue
+
+        if tag.startswith('h'):
+            blocks.append({'type': 'heading', 'level': int(tag[1]), 'text': text})
+        elif tag == 'li':
+            blocks.append({'type': 'list_item', 'level': 0, 'text': text})
+        else:
+            blocks.append({'type': 'paragraph', 'level': 0, 'text': text})
+
+    return blocks
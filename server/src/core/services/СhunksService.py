@@ -1,65 +1,293 @@
 import os
+import re
 import json
 import asyncio
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+from typing import Iterator, Optional
 
 from utils.logger import get_logger
 from config.Config import CONFIG
+from core.services.ModelRegistry import ModelRegistry
 
 log = get_logger("ChunksService")
 
+CHUNKS_FILENAME = "chunks.jsonl"
 
-class ChunkProcessor:
-    def __init__(self):
-        self.chunk_size = CONFIG.chunks.chunk_size
-        self.overlap = CONFIG.chunks.overlap
-        self.model_name = CONFIG.chunks.model_name
-        log.info(f"Загрузка модели {self.model_name}...")
-        self.encoder = SentenceTransformer(self.model_name)
-        self.encoder.max_seq_length = CONFIG.chunks.encoder_max_seq_length
-        log.info(f"Модель загружена. Max sequence length: {self.encoder.get_max_seq_length()}")
+CHUNKING_STRATEGIES = ("window", "structure")
 
-    def count_tokens(self, text: str) -> int:
-        tokens = self.encoder.tokenizer.encode(text)
-        return len(tokens)
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?…;])\s+(?=[А-ЯЁA-Z0-9«"(\-—•])')
+
+_worker_tokenizer = None
 
-    def create_chunks_with_overlap(self, text: str) -> list[str]:
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_tokens = 0
 
-        for word in words:
-            word_with_space = word + " "
-            word_tokens = self.count_tokens(word_with_space)
+def _snap_to_word_start(text: str, offsets: list, idx: int, lower: int) -> int:
+    """Ближайший слева от idx (но не левее lower) токен, с которого начинается слово"""
+    i = idx
+    while i > lower:
+        char_start = offsets[i][0]
+        if char_start == 0 or text[char_start - 1].isspace():
+            return i
+        i -= 1
+    return idx
+
 
-            if current_tokens + word_tokens > self.chunk_size and current_chunk:
-                chunk_text = " ".join(current_chunk)
-                chunks.append(chunk_text)
+def token_window_spans(tokenizer, text: str, chunk_size: int, overlap: int) -> list[tuple[int, int, int]]:
+    """Разбиение текста на окна по токенам за один вызов токенизатора
 
-                overlap_words = []
-                overlap_tokens = 0
-                for w in reversed(current_chunk):
-                    w_with_space = w + " "
-                    w_tokens = self.count_tokens(w_with_space)
-                    if overlap_tokens + w_tokens > self.overlap:
+    Текст токенизируется целиком с offset mapping, окна по chunk_size токенов
+    с перекрытием overlap режутся по индексам токенов и переводятся обратно
+    в символьные границы. Границы окон сдвигаются к началу слова, чтобы
+    не разрезать слова.
+
+    Returns:
+        Список (start, end, число токенов) для каждого чанка
+    """
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    offsets = encoding["offset_mapping"]
+    n_tokens = len(offsets)
+
+    spans = []
+    start = 0
+    while start < n_tokens:
+        end = min(start + chunk_size, n_tokens)
+        if end < n_tokens:
+            end = _snap_to_word_start(text, offsets, end, start + 1)
+
+        spans.append((offsets[start][0], offsets[end - 1][1], end - start))
+
+        if end >= n_tokens:
+            break
+
+        next_start = max(end - overlap, start + 1)
+        start = _snap_to_word_start(text, offsets, next_start, start + 1)
+
+    return spans
+
+
+def chunk_document(tokenizer, document: dict, chunk_size: int, overlap: int, strategy: str = "window") -> list[dict]:
+    """Чанки документа парсера с числом токенов, посчитанным при разбиении
+
+    Args:
+        strategy: "window" — окна фиксированного размера по токенам,
+            "structure" — границы по заголовкам, абзацам и предложениям (см. structure_chunks)
+    """
+    if strategy == "structure":
+        return structure_chunks(tokenizer, document, chunk_size, overlap)
+
+    content = document.get('content', '')
+    if not content:
+        return []
+
+    chunks = []
+    for start, end, token_count in token_window_spans(tokenizer, content, chunk_size, overlap):
+        chunk_text = content[start:end].strip()
+        if chunk_text:
+            chunks.append({
+                'url': document.get('url', ''),
+                'title': document.get('title', ''),
+                'content': chunk_text,
+                'token_count': token_count
+            })
+    return chunks
+
+
+def _count_tokens(tokenizer, text: str) -> int:
+    return len(tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"])
+
+
+def document_sections(document: dict) -> list[tuple[list[str], list[str]]]:
+    """Разделы документа: (путь заголовков от названия статьи, текстовые блоки раздела)
+
+    Если парсер сохранил структуру статьи (blocks), разделы строятся по заголовкам,
+    иначе весь content считается одним блоком без подзаголовков.
+    """
+    title = document.get('title', '')
+    root = [title] if title else []
+    blocks = document.get('blocks')
+
+    if not blocks:
+        content = document.get('content', '')
+        return [(root, [content])] if content else []
+
+    sections = []
+    headings: dict[int, str] = {}
+    path = root
+    texts = []
+
+    for block in blocks:
+        if block.get('type') == 'heading':
+            if texts:
+                sections.append((path, texts))
+                texts = []
+            level = block.get('level', 2)
+            headings = {lvl: text for lvl, text in headings.items() if lvl < level}
+            headings[level] = block['text']
+            path = root + [headings[lvl] for lvl in sorted(headings)]
+        elif block.get('type') == 'list_item':
+            texts.append(f"- {block['text']}")
+        else:
+            texts.append(block['text'])
+
+    if texts:
+        sections.append((path, texts))
+
+    return sections
+
+
+def _split_block(tokenizer, text: str, budget: int, overlap: int) -> list[tuple[str, int]]:
+    """Блок, не влезающий в бюджет, делится по предложениям, а слишком длинные предложения — окнами"""
+    token_count = _count_tokens(tokenizer, text)
+    if token_count <= budget:
+        return [(text, token_count)]
+
+    units = []
+    for sentence in SENTENCE_PATTERN.split(text):
+        sentence_tokens = _count_tokens(tokenizer, sentence)
+        if sentence_tokens <= budget:
+            units.append((sentence, sentence_tokens))
+            continue
+        for start, end, window_tokens in token_window_spans(tokenizer, sentence, budget, overlap):
+            units.append((sentence[start:end].strip(), window_tokens))
+    return units
+
+
+def _section_chunk(document: dict, path: list[str], header: str, header_tokens: int,
+                   units: list[tuple[str, int, bool]]) -> dict:
+    body = "".join(("\n" if new_block else " ") + text for text, _, new_block in units)[1:]
+    return {
+        'url': document.get('url', ''),
+        'title': document.get('title', ''),
+        'content': f"{header}\n{body}" if header else body,
+        'token_count': header_tokens + sum(tokens for _, tokens, _ in units),
+        'section_path': path
+    }
+
+
+def structure_chunks(tokenizer, document: dict, chunk_size: int, overlap: int) -> list[dict]:
+    """Чанки с учётом структуры статьи
+
+    Блоки одного раздела упаковываются в чанк, пока помещаются в chunk_size токенов;
+    новый заголовок всегда начинает новый чанк. В начало чанка добавляется путь раздела,
+    перекрытие между соседними чанками раздела — целыми блоками/предложениями до overlap токенов.
+    """
+    chunks = []
+
+    for path, texts in document_sections(document):
+        header = " > ".join(path)
+        header_tokens = _count_tokens(tokenizer, header) if header else 0
+        budget = max(chunk_size - header_tokens, chunk_size // 2)
+
+        units = []
+        for text in texts:
+            pieces = _split_block(tokenizer, text, budget, overlap)
+            units.extend((piece, tokens, i == 0) for i, (piece, tokens) in enumerate(pieces))
+
+        current: list[tuple[str, int, bool]] = []
+        current_tokens = 0
+
+        for text, tokens, new_block in units:
+            if current and current_tokens + tokens > budget:
+                chunks.append(_section_chunk(document, path, header, header_tokens, current))
+
+                carry = []
+                carry_tokens = 0
+                for prev in reversed(current):
+                    if carry_tokens + prev[1] > overlap or carry_tokens + prev[1] + tokens > budget:
                         break
-                    overlap_words.insert(0, w)
-                    overlap_tokens += w_tokens
+                    carry.insert(0, prev)
+                    carry_tokens += prev[1]
+                current, current_tokens = carry, carry_tokens
+
+            current.append((text, tokens, new_block))
+            current_tokens += tokens
+
+        if current:
+            chunks.append(_section_chunk(document, path, header, header_tokens, current))
+
+    return chunks
+
 
-                current_chunk = overlap_words
-                current_tokens = overlap_tokens
+def _init_chunk_worker(model_name: str):
+    global _worker_tokenizer
+    from transformers import AutoTokenizer
+    _worker_tokenizer = AutoTokenizer.from_pretrained(model_name)
 
-            current_chunk.append(word)
-            current_tokens += word_tokens
 
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+def _chunk_in_worker(document: dict, chunk_size: int, overlap: int, strategy: str) -> list[dict]:
+    return chunk_document(_worker_tokenizer, document, chunk_size, overlap, strategy)
+
+
+def iter_feed_documents(path: Path, buffer_size: int = 1 << 16) -> Iterator[dict]:
+    """Потоковое чтение фида scrapy: JSON Lines построчно, JSON-массив — по одному объекту"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix == ".jsonl":
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buffer = f.read(buffer_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"Файл {path.name} не содержит массив документов")
+
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip().lstrip(",").lstrip()
+            if buffer.startswith("]"):
+                return
+            try:
+                document, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                data = f.read(buffer_size)
+                eof = not data
+                buffer += data
+                continue
+
+            yield document
+            buffer = buffer[end:]
+
+
+class ChunkProcessor:
+    def __init__(self, models: Optional[ModelRegistry] = None):
+        self.chunk_size = CONFIG.chunks.chunk_size
+        self.overlap = CONFIG.chunks.overlap
+        self.model_name = CONFIG.chunks.model_name
+        self.workers = CONFIG.chunks.workers or os.cpu_count() or 1
+        self.strategy = CONFIG.chunks.strategy
+
+        if self.strategy not in CHUNKING_STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия чанкинга: {self.strategy}")
+
+        if self.chunk_size > CONFIG.chunks.encoder_max_seq_length:
+            log.warning(f"chunk_size={self.chunk_size} больше encoder_max_seq_length={CONFIG.chunks.encoder_max_seq_length}, "
+                        f"хвосты чанков будут обрезаны при кодировании")
+
+        log.info(f"Загрузка токенизатора {self.model_name}...")
+        self.tokenizer = (models or ModelRegistry()).get_tokenizer(self.model_name)
+
+    def count_tokens(self, text: str) -> int:
+        tokens = self.tokenizer.encode(text, add_special_tokens=False, verbose=False)
+        return len(tokens)
+
+    def create_chunks_with_overlap(self, text: str) -> list[str]:
+        chunks = [text[start:end].strip() for start, end in self.chunk_spans(text)]
+        chunks = [chunk for chunk in chunks if chunk]
 
         log.info(f"Создано {len(chunks)} чанков")
         return chunks
 
+    def chunk_spans(self, text: str) -> list[tuple[int, int]]:
+        """Символьные диапазоны (start, end) чанков текста, см. token_window_spans"""
+        return [(start, end) for start, end, _ in token_window_spans(self.tokenizer, text, self.chunk_size, self.overlap)]
+
     def process_kb_page(self, kb_page_path: str) -> list[dict]:
         try:
             with open(kb_page_path, 'r', encoding='utf-8') as f:
@@ -105,7 +333,7 @@ class ChunkProcessor:
             with open(chunk_filename, 'w', encoding='utf-8') as f:
                 json.dump(chunk_data, f, ensure_ascii=False, indent=2)
 
-            token_count = self.count_tokens(chunk_data['content'])
+            token_count = chunk_data.get('token_count') or self.count_tokens(chunk_data['content'])
             log.info(f"Сохранен {chunk_filename.name}: {token_count} токенов")
 
     async def process_kb_directory(self, kb_dir: str, output_dir: str):
@@ -136,34 +364,13 @@ class ChunkProcessor:
 
     def process_document(self, document_data: dict) -> list[dict]:
         try:
-            url = document_data.get('url', '')
             title = document_data.get('title', '')
-            content = document_data.get('content', '')
 
-            if not content:
+            if not document_data.get('content'):
                 log.warning(f"Пустой контент для документа: {title}")
                 return []
 
-            token_count = self.count_tokens(content)
-            log.info(f"Обработка документа '{title}': {token_count} токенов")
-
-            if token_count < self.chunk_size:
-                log.info(f"Текст меньше {self.chunk_size} токенов, создается один чанк")
-                return [{
-                    'url': url,
-                    'title': title,
-                    'content': content
-                }]
-
-            chunks = self.create_chunks_with_overlap(content)
-
-            result = []
-            for chunk_text in chunks:
-                result.append({
-                    'url': url,
-                    'title': title,
-                    'content': chunk_text,
-                })
+            result = chunk_document(self.tokenizer, document_data, self.chunk_size, self.overlap, self.strategy)
 
             log.info(f"Создано {len(result)} чанков для '{title}'")
             return result
@@ -173,48 +380,84 @@ class ChunkProcessor:
             return []
 
     async def process_parser_output(self, parser_data_dir: str, output_dir: str):
+        """Потоковая обработка фидов парсера в один JSONL-файл чанков
+
+        Документы читаются из фидов по одному, разбиваются на чанки в пуле процессов
+        и дописываются в output_dir/chunks.jsonl вместе с числом токенов.
+        """
         parser_path = Path(parser_data_dir)
 
         if not parser_path.exists():
             log.error(f"Директория {parser_data_dir} не существует")
             return
 
-        json_files = sorted(parser_path.glob("*.json"))
-        log.info(f"Найдено {len(json_files)} JSON файлов для обработки")
+        feed_files = sorted(parser_path.glob("*.json")) + sorted(parser_path.glob("*.jsonl"))
+        log.info(f"Найдено {len(feed_files)} файлов фидов для обработки")
 
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
 
-        total_chunks = 0
-
-        for json_file in json_files:
-            try:
-                log.info(f"Обработка файла: {json_file.name}")
+        chunks_file = output_path / CHUNKS_FILENAME
+        tmp_file = output_path / f"{CHUNKS_FILENAME}.tmp"
 
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+        total_chunks = await asyncio.to_thread(self._write_chunks_file, feed_files, tmp_file)
+        os.replace(tmp_file, chunks_file)
 
-                if not isinstance(data, list):
-                    log.warning(f"Файл {json_file.name} не содержит массив документов, пропускаем")
-                    continue
-
-                for i, document in enumerate(data, 1):
-                    chunks = self.process_document(document)
-
-                    if not chunks:
-                        continue
-
-                    base_name = f"{json_file.stem}_doc_{i}"
-                    self.save_chunks(chunks, output_dir, base_name)
-                    total_chunks += len(chunks)
-
-                log.info(f"Файл {json_file.name} обработан: {len(data)} документов")
+        log.info(f"Обработка завершена! Всего создано {total_chunks} чанков в {chunks_file}")
 
+    def _iter_feed_jobs(self, feed_files: list[Path]) -> Iterator[tuple[str, dict]]:
+        for feed_file in feed_files:
+            log.info(f"Обработка файла: {feed_file.name}")
+            count = 0
+            try:
+                for count, document in enumerate(iter_feed_documents(feed_file), 1):
+                    yield f"{feed_file.stem}_doc_{count}", document
             except Exception as e:
-                log.error(f"Ошибка при обработке {json_file.name}: {e}")
+                log.error(f"Ошибка при обработке {feed_file.name}: {e}")
                 continue
 
-        log.info(f"Обработка завершена! Всего создано {total_chunks} чанков")
+            log.info(f"Файл {feed_file.name} обработан: {count} документов")
+
+    def _write_chunks_file(self, feed_files: list[Path], output_file: Path) -> int:
+        total_chunks = 0
+
+        with open(output_file, 'w', encoding='utf-8') as out:
+            def write(base_name: str, chunks: list[dict]) -> int:
+                for j, chunk in enumerate(chunks, 1):
+                    out.write(json.dumps({**chunk, 'chunk_id': f"{base_name}_chunk_{j}"}, ensure_ascii=False) + "\n")
+                return len(chunks)
+
+            if self.workers <= 1:
+                for base_name, document in self._iter_feed_jobs(feed_files):
+                    try:
+                        total_chunks += write(base_name, chunk_document(self.tokenizer, document, self.chunk_size, self.overlap, self.strategy))
+                    except Exception as e:
+                        log.error(f"Ошибка при обработке документа {base_name}: {e}")
+                return total_chunks
+
+            # spawn вместо fork: сервер многопоточный (torch, токенизаторы, фоновая инициализация),
+            # а fork копирует захваченные другими потоками блокировки и может повесить воркеры
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_chunk_worker, initargs=(self.model_name,)) as pool:
+                in_flight = deque()
+
+                def drain_one() -> int:
+                    base_name, future = in_flight.popleft()
+                    try:
+                        return write(base_name, future.result())
+                    except Exception as e:
+                        log.error(f"Ошибка при обработке документа {base_name}: {e}")
+                        return 0
+
+                for base_name, document in self._iter_feed_jobs(feed_files):
+                    if len(in_flight) >= self.workers * 4:
+                        total_chunks += drain_one()
+                    in_flight.append((base_name, pool.submit(_chunk_in_worker, document, self.chunk_size, self.overlap, self.strategy)))
+
+                while in_flight:
+                    total_chunks += drain_one()
+
+        return total_chunks
 
 
 async def main():
@@ -3,6 +3,7 @@ from endpoints.api.clear_base import router as clear_base_router
 from endpoints.api.health import router as health_router
 from endpoints.api.info_base import router as info_base_router
 from endpoints.api.rag_answer import router as rag_answer_router
+from endpoints.api.ready import router as ready_router
 
 
 main_router = APIRouter()
@@ -10,4 +11,5 @@ main_router = APIRouter()
 main_router.include_router(clear_base_router)
 main_router.include_router(health_router)
 main_router.include_router(info_base_router)
-main_router.include_router(rag_answer_router)
\ No newline at end of file
+main_router.include_router(rag_answer_router)
+main_router.include_router(ready_router)
\ No newline at end of file
@@ -1,7 +1,13 @@
-from fastapi import APIRouter
+import json
+from contextlib import aclosing
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
 from utils.logger import get_logger
 from endpoints.rag_answer_endpoint import RagAnswerEndpoint
+from core.services.ServiceManager import service_manager
 
 router = APIRouter()
 
@@ -9,8 +15,41 @@ log = get_logger("rag_answer_endpoint")
 
 @router.get("/get_answer")
 async def get_answer(user_question: str):
+    if not service_manager.is_ready():
+        raise HTTPException(status_code=503, detail="Сервисы ещё загружаются, повторите запрос позже")
+
     rag_answer_endpoint = RagAnswerEndpoint()
     answer = await rag_answer_endpoint.get_answer(user_question)
     return {
         "answer": answer
-    }
\ No newline at end of file
+    }
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/get_answer/stream")
+async def stream_answer(user_question: str):
+    """Ответ в формате Server-Sent Events: события с фрагментами текста, затем done"""
+    if not service_manager.is_ready():
+        raise HTTPException(status_code=503, detail="Сервисы ещё загружаются, повторите запрос позже")
+
+    rag_answer_endpoint = RagAnswerEndpoint()
+
+    async def events():
+        try:
+            async with aclosing(rag_answer_endpoint.stream_answer(user_question)) as stream:
+                async for part in stream:
+                    yield sse_event({"token": part})
+            yield sse_event({}, event="done")
+        except Exception as e:
+            log.error(f"Ошибка при потоковой генерации ответа: {e}")
+            yield sse_event({"detail": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from core.services.ServiceManager import service_manager
+from utils.logger import get_logger
+
+router = APIRouter()
+
+log = get_logger("ready_endpoint")
+
+@router.get("/ready")
+async def ready():
+    readiness = service_manager.readiness()
+    if not readiness["ready"]:
+        log.info("Readiness check: сервисы ещё не готовы")
+
+    return JSONResponse(content=readiness, status_code=200 if readiness["ready"] else 503)
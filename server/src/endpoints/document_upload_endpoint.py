@@ -13,7 +13,11 @@ log = get_logger("DocumentUploadEndpoint")
 class DocumentUploadEndpoint:
     def __init__(self):
         self.service_manager = service_manager
-        self.chunk_processor = service_manager.chunk_processor
+
+    @property
+    def chunk_processor(self):
+        # ChunkProcessor загружается лениво, только при загрузке документов
+        return self.service_manager.chunk_processor
 
     async def process_uploaded_file(self, file_path: str, filename: str) -> dict:
         try:
@@ -102,7 +106,12 @@ class DocumentUploadEndpoint:
                 "collection_name": info.get("name", ""),
                 "documents_count": info.get("points_count", 0),
                 "vectors_count": info.get("vectors_count", 0),
-                "status": info.get("status", "unknown")
+                "status": info.get("status", "unknown"),
+                "query_embedding_stats": self.service_manager.qdrant_service.query_batcher.stats(),
+                "reranker_stats": self.service_manager.reranker_service.stats(),
+                "answer_cache_stats": self.service_manager.answer_cache.stats(),
+                "llm_stats": self.service_manager.llm_service.stats(),
+                "models": self.service_manager.models.stats()
             }
         except Exception as e:
             log.error(f"Ошибка при получении информации о базе знаний: {e}")
@@ -7,4 +7,9 @@ class KnowledgeBaseInfo(BaseModel):
     documents_count: Optional[int] = None
     vectors_count: Optional[int] = None
     status: Optional[str] = None
+    query_embedding_stats: Optional[dict] = None
+    reranker_stats: Optional[dict] = None
+    answer_cache_stats: Optional[dict] = None
+    llm_stats: Optional[dict] = None
+    models: Optional[List[dict]] = None
     message: Optional[str] = None
\ No newline at end of file
@@ -1,8 +1,12 @@
 import asyncio
 import json
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from urllib.parse import unquote
 
 from core.services.ServiceManager import service_manager
+from core.services.HybridRetriever import HybridRetriever
+from config.Config import CONFIG
 from utils.prompt_loader import render_prompt
 from utils.logger import get_logger
 
@@ -14,40 +18,73 @@ class RagAnswerEndpoint:
         self.qdrant_service = service_manager.qdrant_service
         self.reranker = service_manager.reranker_service
         self.bm25_service = service_manager.bm25_service
+        self.retriever = HybridRetriever(self.bm25_service, self.qdrant_service)
+        self.answer_cache = service_manager.answer_cache
 
     async def get_answer(self, user_question: str):
-        bm25_results = self.bm25_service.search(user_question)
-
-        if not bm25_results:
-            log.warning("BM25 не вернул результатов, используем только векторный поиск")
-            top_chunks_raw = self.qdrant_service.search_similar(user_question)
-        else:
-            log.info(f"BM25 вернул {len(bm25_results)} кандидатов")
-
-            bm25_ids = [result[3].get("id") for result in bm25_results]
-
-            vector_results = self.qdrant_service.search_similar(user_question)
-
-            vector_ids = {chunk["id"] for chunk in vector_results}
-            bm25_chunks = []
-            for result in bm25_results:
-                _, text, score, metadata = result
-                if metadata.get("id") in vector_ids:
-                    for chunk in vector_results:
-                        if chunk["id"] == metadata.get("id"):
-                            bm25_chunks.append(chunk)
-                            break
-
-            if not bm25_chunks:
-                log.warning("Нет пересечений BM25 и векторного поиска, используем только векторный")
-                top_chunks_raw = vector_results
-            else:
-                log.info(f"Найдено {len(bm25_chunks)} пересечений BM25 и векторного поиска")
-                top_chunks_raw = bm25_chunks
+        cached, generation, query_vector = await self.lookup_cache(user_question)
+        if cached is not None:
+            return cached
+
+        prompt = await self.build_prompt(user_question)
+        answer, usage = await self.llm_service.fetch_completion_with_usage(prompt)
+        self.store_in_cache(user_question, query_vector, answer, generation, usage)
+        return answer
+
+    async def stream_answer(self, user_question: str) -> AsyncIterator[str]:
+        """Ответ фрагментами по мере генерации LLM; ответ из кэша отдаётся одним фрагментом"""
+        cached, generation, query_vector = await self.lookup_cache(user_question)
+        if cached is not None:
+            yield cached
+            return
+
+        prompt = await self.build_prompt(user_question)
+        usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        parts = []
+        async with aclosing(self.llm_service.stream_completion(prompt, usage=usage)) as stream:
+            async for part in stream:
+                parts.append(part)
+                yield part
+
+        self.store_in_cache(user_question, query_vector, "".join(parts), generation, usage)
+
+    async def lookup_cache(self, user_question: str) -> Tuple[Optional[str], int, Optional[List[float]]]:
+        """Поиск ответа в кэше: (ответ или None, поколение кэша, эмбеддинг вопроса)"""
+        if not CONFIG.answer_cache.enabled:
+            return None, self.answer_cache.generation, None
+
+        cached = self.answer_cache.get_exact(user_question)
+        if cached is not None:
+            log.info("Ответ из кэша (точное совпадение вопроса)")
+            return cached, self.answer_cache.generation, None
+
+        generation = self.answer_cache.generation
+        query_vector = await self.qdrant_service.query_batcher.embed(user_question)
+        similar = self.answer_cache.get_similar(query_vector)
+        if similar is not None:
+            answer, similarity = similar
+            log.info(f"Ответ из кэша (похожий вопрос, сходство {similarity:.3f})")
+            return answer, generation, query_vector
+
+        return None, generation, query_vector
+
+    def store_in_cache(self, user_question: str, query_vector: Optional[List[float]], answer: str, generation: int,
+                       usage: Dict[str, int]):
+        if query_vector is not None and answer:
+            self.answer_cache.put(user_question, query_vector, answer, generation, **usage)
+
+    async def build_prompt(self, user_question: str) -> str:
+        """Гибридный поиск и реранкинг, затем промпт для LLM с найденными документами"""
+        top_chunks_raw = await self.retriever.retrieve(user_question)
 
         documents = [chunk["text"] for chunk in top_chunks_raw]
 
-        reranked_results = self.reranker.rerank(user_question, documents)
+        reranked_results = await self.reranker.arerank(
+            user_question,
+            documents,
+            chunk_ids=[chunk["id"] for chunk in top_chunks_raw],
+            retrieval_scores=[chunk["score"] for chunk in top_chunks_raw]
+        )
         reranked_indices = [idx for idx, _, _ in reranked_results]
 
         reranked_chunks_raw = [top_chunks_raw[idx] for idx in reranked_indices]
@@ -58,9 +95,7 @@ class RagAnswerEndpoint:
         top_docs = [{"title":top_titles[i], "link": top_links[i],'text':top_chunks[i]} for i in range(len(top_chunks))]
 
         top_docs_json = json.dumps(top_docs, indent=3, ensure_ascii=False)
-        prompt = render_prompt("rag_answer_prompt", question=user_question, data=top_docs_json)
-        llm_answer = await self.llm_service.fetch_completion(prompt)
-        return llm_answer
+        return render_prompt("rag_answer_prompt", question=user_question, data=top_docs_json)
 
 async def main():
     ser = RagAnswerEndpoint()
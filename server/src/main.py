@@ -6,6 +6,8 @@ from contextlib import asynccontextmanager
 
 from endpoints.api import main_router
 from core.services.ServiceManager import service_manager
+from core.services.CityApiClient import close_city_client
+from config.Config import CONFIG
 from utils.logger import get_logger
 
 log = get_logger("main")
@@ -14,10 +16,15 @@ log = get_logger("main")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     log.info("Запуск приложения: инициализация сервисов...")
-    service_manager.initialize()
-    log.info("Приложение готово к работе!")
+    if CONFIG.startup.background:
+        service_manager.start_background_initialization()
+        log.info("Сервисы загружаются в фоне, готовность — /api/v1/ready")
+    else:
+        service_manager.initialize()
+        log.info("Приложение готово к работе!")
     yield
     log.info("Завершение работы приложения")
+    await close_city_client()
 
 
 app = FastAPI(lifespan=lifespan)
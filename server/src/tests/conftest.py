@@ -0,0 +1,18 @@
+import os
+import sys
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent
+SRC_DIR = TESTS_DIR.parent
+
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# ConfigLoader читает config.yml из рабочей директории при импорте,
+# поэтому конфигурация загружается один раз из tests/config.yml
+_cwd = os.getcwd()
+os.chdir(TESTS_DIR)
+try:
+    import config.Config  # noqa: F401,E402
+finally:
+    os.chdir(_cwd)
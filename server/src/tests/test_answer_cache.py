@@ -0,0 +1,100 @@
+import pytest
+
+from core.services.AnswerCache import AnswerCache
+
+QUESTION = "Как записаться в МФЦ?"
+VECTOR = [1.0, 0.0, 0.0]
+
+
+def make_cache(max_size: int = 10, ttl_seconds: int = 60, similarity_threshold: float = 0.9) -> AnswerCache:
+    return AnswerCache(max_size, ttl_seconds, similarity_threshold)
+
+
+def age(cache: AnswerCache, seconds: float):
+    """Состаривание всех записей кэша на seconds секунд"""
+    for entry in cache._entries.values():
+        entry.created_at -= seconds
+
+
+def test_exact_hit_uses_normalized_question():
+    cache = make_cache()
+    cache.put(QUESTION, VECTOR, "ответ", cache.generation, prompt_tokens=100, completion_tokens=20)
+
+    assert cache.get_exact("  как   записаться в мфц?") == "ответ"
+    assert cache.get_exact("Как записаться к врачу?") is None
+
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1
+    assert stats["saved_prompt_tokens"] == 100
+    assert stats["saved_completion_tokens"] == 20
+
+
+def test_semantic_hit_above_threshold():
+    cache = make_cache(similarity_threshold=0.9)
+    cache.put(QUESTION, VECTOR, "ответ", cache.generation)
+    cache.put("Где ближайшая поликлиника?", [0.0, 1.0, 0.0], "поликлиника", cache.generation)
+
+    answer, similarity = cache.get_similar([2.0, 0.3, 0.0])
+
+    assert answer == "ответ"
+    assert similarity == pytest.approx(2.0 / (2.0 ** 2 + 0.3 ** 2) ** 0.5, rel=1e-6)
+    assert cache.get_similar([1.0, 1.0, 0.0]) is None
+    assert cache.stats()["semantic_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_empty_cache_is_a_miss():
+    cache = make_cache()
+
+    assert cache.get_similar(VECTOR) is None
+    assert cache.stats()["hit_rate"] == 0.0
+
+
+def test_entries_expire_after_ttl():
+    cache = make_cache(ttl_seconds=60)
+    cache.put(QUESTION, VECTOR, "ответ", cache.generation)
+
+    age(cache, 59)
+    assert cache.get_exact(QUESTION) == "ответ"
+
+    age(cache, 2)
+    assert cache.get_exact(QUESTION) is None
+    assert cache.get_similar(VECTOR) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(max_size=2)
+    cache.put("первый", [1.0, 0.0, 0.0], "1", cache.generation)
+    cache.put("второй", [0.0, 1.0, 0.0], "2", cache.generation)
+    cache.get_exact("первый")
+
+    cache.put("третий", [0.0, 0.0, 1.0], "3", cache.generation)
+
+    assert cache.get_exact("второй") is None
+    assert cache.get_exact("первый") == "1"
+    assert cache.get_exact("третий") == "3"
+
+
+def test_invalidate_drops_entries():
+    cache = make_cache()
+    cache.put(QUESTION, VECTOR, "ответ", cache.generation)
+
+    cache.invalidate()
+
+    assert cache.get_exact(QUESTION) is None
+    assert cache.get_similar(VECTOR) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_answer_computed_before_invalidation_is_not_stored():
+    cache = make_cache()
+    generation = cache.generation
+
+    cache.invalidate()
+    cache.put(QUESTION, VECTOR, "устаревший ответ", generation)
+
+    assert cache.get_exact(QUESTION) is None
+
+    cache.put(QUESTION, VECTOR, "ответ", cache.generation)
+    assert cache.get_exact(QUESTION) == "ответ"
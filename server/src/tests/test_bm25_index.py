@@ -0,0 +1,167 @@
+import json
+
+import pytest
+
+from core.services import BM25Index as bm25_index_module
+from core.services.BM25Index import IncrementalBM25Index
+
+DOCS = [
+    ({"id": "1", "text": "парковка у дома"}, ["парковка", "дом"]),
+    ({"id": "2", "text": "вывоз мусора во дворе"}, ["вывоз", "мусор", "двор"]),
+    ({"id": "3", "text": "ремонт дороги у дома"}, ["ремонт", "дорога", "дом"]),
+]
+
+
+def make_index(tmp_path, docs=DOCS, **kwargs) -> IncrementalBM25Index:
+    index = IncrementalBM25Index(tmp_path, **kwargs)
+    index.add([doc for doc, _ in docs], [tokens for _, tokens in docs])
+    return index
+
+
+def ids(results):
+    return [doc["id"] for _, _, doc in results]
+
+
+def test_search_returns_documents_ranked_by_score(tmp_path):
+    index = make_index(tmp_path)
+
+    results = index.search(["мусор", "двор"], k=3)
+
+    assert ids(results) == ["2"]
+    slot, score, doc = results[0]
+    assert index.metadata[slot] is doc
+    assert score > 0
+
+
+def test_search_on_empty_index(tmp_path):
+    assert IncrementalBM25Index(tmp_path).search(["дом"], k=5) == []
+
+
+def test_add_with_existing_id_replaces_document(tmp_path):
+    index = make_index(tmp_path)
+
+    index.add([{"id": "1", "text": "эвакуатор"}], [["эвакуатор"]])
+
+    assert len(index) == 3
+    assert ids(index.search(["парковка"], k=3)) == []
+    assert [doc["text"] for _, _, doc in index.search(["эвакуатор"], k=3)] == ["эвакуатор"]
+
+
+def test_delete_updates_statistics(tmp_path):
+    index = make_index(tmp_path)
+
+    assert index.delete(["3", "missing"]) == 1
+    assert index.delete(["3"]) == 0
+
+    # Статистика после удаления совпадает с индексом, построенным без удалённого документа
+    fresh = make_index(tmp_path / "fresh", DOCS[:2])
+    assert len(index) == len(fresh) == 2
+    assert index.total_length == fresh.total_length
+    assert [(doc, score) for _, score, doc in index.search(["дом"], k=3)] == \
+           [(doc, score) for _, score, doc in fresh.search(["дом"], k=3)]
+
+
+def test_save_compacts_deleted_slots(tmp_path):
+    index = make_index(tmp_path)
+    index.delete(["1"])
+
+    index.save()
+
+    assert None not in index.metadata
+    assert [doc["id"] for doc in index.metadata] == ["2", "3"]
+    assert ids(index.search(["дом"], k=3)) == ["3"]
+    assert not index.delta_path.exists()
+    assert index.snapshot_path.exists()
+
+
+def test_load_replays_delta_after_snapshot(tmp_path):
+    index = make_index(tmp_path)
+    index.save()
+    index.add([{"id": "4", "text": "освещение во дворе"}], [["освещение", "двор"]])
+    index.delete(["2"])
+
+    loaded = IncrementalBM25Index(tmp_path)
+
+    assert loaded.load()
+    assert sorted(doc["id"] for doc in loaded.documents()) == ["1", "3", "4"]
+    assert ids(loaded.search(["двор"], k=3)) == ["4"]
+    assert loaded.delta_ops == 2
+
+
+def test_load_without_files(tmp_path):
+    assert not IncrementalBM25Index(tmp_path).load()
+
+
+def test_load_skips_corrupted_delta_record(tmp_path):
+    index = make_index(tmp_path)
+    with open(index.delta_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "doc": {"id": "5"')
+
+    loaded = IncrementalBM25Index(tmp_path)
+
+    assert loaded.load()
+    assert len(loaded) == 3
+
+
+def test_background_compaction_on_threshold(tmp_path):
+    index = make_index(tmp_path, compaction_threshold=4)
+    index.delete(["2"])
+
+    index._compaction_thread.join(timeout=5)
+
+    assert index.snapshot_path.exists()
+    assert not index.delta_path.exists()
+    assert index.delta_ops == 0
+    loaded = IncrementalBM25Index(tmp_path)
+    loaded.load()
+    assert sorted(doc["id"] for doc in loaded.documents()) == ["1", "3"]
+
+
+def interrupt_compaction(index: IncrementalBM25Index):
+    """Состояние после падения процесса между ротацией лога и записью снапшота"""
+    index.delta_path.rename(index.compacting_delta_path)
+
+
+def test_load_replays_log_of_interrupted_compaction(tmp_path):
+    index = make_index(tmp_path)
+    interrupt_compaction(index)
+    index.add([{"id": "4", "text": "освещение"}], [["освещение"]])
+
+    loaded = IncrementalBM25Index(tmp_path)
+
+    assert loaded.load()
+    assert sorted(doc["id"] for doc in loaded.documents()) == ["1", "2", "3", "4"]
+
+
+def test_compaction_keeps_log_of_interrupted_compaction_until_snapshot(tmp_path, monkeypatch):
+    make_index(tmp_path)
+    interrupt_compaction(IncrementalBM25Index(tmp_path))
+
+    index = IncrementalBM25Index(tmp_path)
+    index.load()
+    index.add([{"id": "4", "text": "освещение"}], [["освещение"]])
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    # Снапшот не записан: оба лога должны остаться на диске
+    monkeypatch.setattr(bm25_index_module.json, "dump", fail)
+    index.save()
+    monkeypatch.undo()
+
+    assert not index.snapshot_path.exists()
+    assert not index.delta_path.exists()
+    loaded = IncrementalBM25Index(tmp_path)
+    assert loaded.load()
+    assert sorted(doc["id"] for doc in loaded.documents()) == ["1", "2", "3", "4"]
+
+    loaded.save()
+
+    assert not loaded.compacting_delta_path.exists()
+    with open(loaded.snapshot_path, "r", encoding="utf-8") as f:
+        assert sorted(doc["id"] for doc in json.load(f)["documents"]) == ["1", "2", "3", "4"]
+
+
+@pytest.mark.parametrize("k", [1, 2])
+def test_search_limits_results(tmp_path, k):
+    assert len(make_index(tmp_path).search(["дом"], k=k)) == k
@@ -0,0 +1,75 @@
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config.Config import CONFIG
+from core.services import СhunksService as chunks_module
+from core.services.СhunksService import ChunkProcessor
+
+
+class FakeTokenizer:
+    """Токен — до трёх символов слова; offset mapping как у fast-токенизаторов HF"""
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=True, verbose=False):
+        offsets = [(i, min(i + 3, word.end())) for word in re.finditer(r"\S+", text) for i in range(word.start(), word.end(), 3)]
+        return {"offset_mapping": offsets, "input_ids": list(range(len(offsets)))}
+
+
+class FakeModels:
+    def get_tokenizer(self, model_name):
+        return FakeTokenizer()
+
+
+class ThreadPool(ThreadPoolExecutor):
+    """Пул потоков вместо процессов: токенизатор воркеров подменяется без загрузки модели"""
+
+    mp_contexts = []
+
+    def __init__(self, max_workers, mp_context, initializer, initargs):
+        self.mp_contexts.append(mp_context.get_start_method())
+        super().__init__(max_workers=max_workers)
+
+
+@pytest.fixture
+def feed_dir(tmp_path):
+    documents = [
+        {"url": "http://city/1", "title": "МФЦ", "content": "Запись в МФЦ через портал госуслуг."},
+        ["не", "документ"],
+        {"url": "http://city/2", "title": "Школы", "content": "Запись в первый класс начинается весной."},
+    ]
+    with open(tmp_path / "feed.jsonl", "w", encoding="utf-8") as f:
+        for document in documents:
+            f.write(json.dumps(document, ensure_ascii=False) + "\n")
+    return tmp_path
+
+
+def read_chunks(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_malformed_document_is_skipped(feed_dir, tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(CONFIG.chunks, "workers", workers)
+    monkeypatch.setattr(chunks_module, "ProcessPoolExecutor", ThreadPool)
+    monkeypatch.setattr(chunks_module, "_worker_tokenizer", FakeTokenizer())
+    processor = ChunkProcessor(FakeModels())
+
+    total = processor._write_chunks_file(sorted(feed_dir.glob("*.jsonl")), tmp_path / "chunks.jsonl")
+
+    chunks = read_chunks(tmp_path / "chunks.jsonl")
+    assert total == len(chunks) == 2
+    assert [chunk["chunk_id"] for chunk in chunks] == ["feed_doc_1_chunk_1", "feed_doc_3_chunk_1"]
+
+
+def test_worker_pool_uses_spawn(feed_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(CONFIG.chunks, "workers", 2)
+    monkeypatch.setattr(chunks_module, "ProcessPoolExecutor", ThreadPool)
+    monkeypatch.setattr(chunks_module, "_worker_tokenizer", FakeTokenizer())
+    ThreadPool.mp_contexts.clear()
+
+    ChunkProcessor(FakeModels())._write_chunks_file(sorted(feed_dir.glob("*.jsonl")), tmp_path / "chunks.jsonl")
+
+    assert ThreadPool.mp_contexts == ["spawn"]
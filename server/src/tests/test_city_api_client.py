@@ -0,0 +1,55 @@
+import asyncio
+import functools
+
+import httpx
+import pytest
+
+from config.Config import CONFIG
+from core.langgraph_multi_agent.agents.retrieval_agent import tools
+from core.services import CityApiClient as city_module
+from core.services.CityApiClient import close_city_client, get_city_client
+
+
+@pytest.fixture
+def city_requests(monkeypatch):
+    """Городские API подменены MockTransport; city_requests — параметры полученных запросов"""
+    received = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        received.append(dict(request.url.params))
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json=[{"district": request.url.params["district"]}])
+
+    monkeypatch.setattr(CONFIG.city_api, "per_host_limit", 1)
+    monkeypatch.setattr(city_module.httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(handler)))
+    return received
+
+
+def test_tools_work_across_event_loops(city_requests):
+    async def call_tools():
+        # Несколько одновременных запросов к одному хосту: семафор ограничения ждёт в этом loop
+        results = await asyncio.gather(*(tools.get_dou(district) for district in ("Центральный", "Невский", "Выборгский")))
+        return results, get_city_client()
+
+    first_results, first_client = asyncio.run(call_tools())
+    second_results, second_client = asyncio.run(call_tools())
+
+    assert first_results == second_results == [[{"district": "Центральный"}], [{"district": "Невский"}], [{"district": "Выборгский"}]]
+    assert first_client is not second_client
+    assert len(city_requests) == 6
+    assert city_requests[0]["age_year"] == "0"
+
+
+def test_client_is_shared_within_loop_and_closed_on_shutdown(city_requests):
+    async def main():
+        client = get_city_client()
+        assert get_city_client() is client
+        await tools.get_dou("Центральный")
+
+        await close_city_client()
+
+        assert client.http.is_closed
+        assert get_city_client() is not client
+        await close_city_client()
+
+    asyncio.run(main())
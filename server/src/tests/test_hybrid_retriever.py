@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from core.services.HybridRetriever import HybridRetriever, bm25_result_to_chunk, intersection_fusion, reciprocal_rank_fusion, weighted_score_fusion
+
+
+def chunks(*ids_and_scores):
+    return [{"id": chunk_id, "score": score, "text": f"текст {chunk_id}"} for chunk_id, score in ids_and_scores]
+
+
+BM25 = chunks(("a", 12.0), ("b", 8.0), ("c", 2.0))
+VECTOR = chunks(("c", 0.91), ("d", 0.85), ("a", 0.6))
+
+
+class FakeBM25Service:
+    async def asearch(self, query, k):
+        return [(i, chunk["text"], chunk["score"], {"id": chunk["id"], "url": f"http://{chunk['id']}"})
+                for i, chunk in enumerate(BM25[:k])]
+
+
+class FakeQdrantService:
+    async def asearch_similar(self, query, k):
+        return VECTOR[:k]
+
+
+def ids(fused):
+    return [chunk["id"] for chunk in fused]
+
+
+def test_rrf_rewards_documents_found_by_both_searches():
+    fused = reciprocal_rank_fusion([BM25, VECTOR], [0.4, 0.6], k=60)
+
+    assert ids(fused) == ["c", "a", "d", "b"]
+    assert fused[0]["score"] == pytest.approx(0.4 / 63 + 0.6 / 61)
+    assert fused[0]["text"] == "текст c"
+
+
+def test_rrf_weights_and_k():
+    assert ids(reciprocal_rank_fusion([BM25, VECTOR], [0.0, 1.0], k=60)) == ["c", "d", "a", "b"]
+    # С малым k первое место в одном списке весит больше, чем средние места в обоих
+    ranked_lists = [chunks(("x", 1), ("y", 1)), chunks(("z", 1), ("w", 1), ("y", 1))]
+    assert ids(reciprocal_rank_fusion(ranked_lists, [1.0, 1.0], k=0))[0] == "x"
+    assert ids(reciprocal_rank_fusion(ranked_lists, [1.0, 1.0], k=60))[0] == "y"
+
+
+def test_weighted_fusion_normalizes_scores_per_list():
+    fused = weighted_score_fusion([BM25, VECTOR], [0.4, 0.6])
+    scores = {chunk["id"]: chunk["score"] for chunk in fused}
+
+    assert scores["a"] == pytest.approx(0.4 * 1.0 + 0.6 * 0.0)
+    assert scores["b"] == pytest.approx(0.4 * 0.6)
+    assert scores["c"] == pytest.approx(0.4 * 0.0 + 0.6 * 1.0)
+    assert scores["d"] == pytest.approx(0.6 * 0.25 / 0.31)
+    assert ids(fused) == ["c", "d", "a", "b"]
+
+
+def test_weighted_fusion_with_equal_or_missing_scores():
+    fused = weighted_score_fusion([chunks(("a", 5.0), ("b", 5.0)), []], [0.4, 0.6])
+
+    assert [chunk["score"] for chunk in fused] == [pytest.approx(0.4), pytest.approx(0.4)]
+
+
+def test_fusion_requires_weight_per_list():
+    with pytest.raises(ValueError):
+        reciprocal_rank_fusion([BM25, VECTOR], [1.0])
+    with pytest.raises(ValueError):
+        weighted_score_fusion([BM25, VECTOR], [1.0])
+
+
+def test_intersection_fusion():
+    assert ids(intersection_fusion(BM25, VECTOR)) == ["a", "c"]
+    assert intersection_fusion(chunks(("x", 1.0)), VECTOR) == VECTOR
+
+
+def test_bm25_result_to_chunk():
+    chunk = bm25_result_to_chunk((3, "текст", 1.5, {"id": 7, "url": "http://x", "title": "Заголовок", "chunk_id": "7-0"}))
+
+    assert chunk["id"] == 7
+    assert chunk["score"] == 1.5
+    assert chunk["text"] == "текст"
+    assert chunk["link"] == "http://x"
+    assert chunk["title"] == "Заголовок"
+    assert chunk["section_path"] == []
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        HybridRetriever(FakeBM25Service(), FakeQdrantService(), strategy="unknown")
+
+
+@pytest.mark.parametrize("strategy, expected", [
+    ("rrf", ["c", "a"]),
+    ("weighted", ["c", "d"]),
+    ("intersection", ["a", "c"]),
+])
+def test_retrieve_fuses_both_searches(strategy, expected):
+    retriever = HybridRetriever(FakeBM25Service(), FakeQdrantService(), strategy=strategy)
+    retriever.fused_candidates = 2
+
+    fused = asyncio.run(retriever.retrieve("запрос"))
+
+    assert ids(fused) == expected
@@ -0,0 +1,58 @@
+import asyncio
+from contextlib import aclosing
+from types import SimpleNamespace
+
+from core.services.LLMService import LLMService
+
+
+class FakeStream:
+    """Поток ответа LLM, запоминающий, был ли он закрыт"""
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        self.closed = True
+
+    async def __aiter__(self):
+        for part in self.parts:
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+
+
+def make_service(stream: FakeStream) -> LLMService:
+    async def create(**kwargs):
+        return stream
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return LLMService("test", client)
+
+
+def test_stream_is_closed_after_full_answer():
+    stream = FakeStream(["Добрый ", "день"])
+    service = make_service(stream)
+
+    async def main():
+        return [part async for part in service.stream_completion("вопрос")]
+
+    assert asyncio.run(main()) == ["Добрый ", "день"]
+    assert stream.closed
+
+
+def test_stream_is_closed_when_client_disconnects():
+    stream = FakeStream(["Добрый ", "день", "!"])
+    service = make_service(stream)
+
+    async def main():
+        async with aclosing(service.stream_completion("вопрос")) as parts:
+            part = await anext(parts)
+        # Поток должен закрыться сразу, а не при сборке мусора или остановке event loop
+        return part, stream.closed
+
+    assert asyncio.run(main()) == ("Добрый ", True)
@@ -0,0 +1,190 @@
+import json
+import threading
+import time
+import zlib
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from config.Config import CONFIG
+from core.services import QdrantService as qdrant_module
+from core.services.QdrantService import CORPUS_SOURCE, QdrantService, chunk_point_id
+
+VECTOR_SIZE = 4
+
+
+class FakeModel:
+    """Детерминированные эмбеддинги по crc32 текста"""
+
+    def __init__(self):
+        self.encoded_batches = 0
+
+    def encode(self, texts, batch_size=None, pool=None):
+        self.encoded_batches += 1
+        return np.array([np.random.default_rng(zlib.crc32(text.encode())).random(VECTOR_SIZE) for text in texts], dtype=np.float32)
+
+
+class FakeModels:
+    def __init__(self):
+        self.model = FakeModel()
+
+    def get_sentence_transformer(self, *args):
+        return self.model
+
+
+class RecordingClient:
+    """In-memory Qdrant, записывающий вызовы upsert; fail_upserts — сколько первых вызовов упадут"""
+
+    def __init__(self):
+        self.client = QdrantClient(":memory:")
+        self.upserts = []
+        self.fail_upserts = 0
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def upsert(self, collection_name, points, wait=True):
+        with self._lock:
+            self.upserts.append((len(points), wait))
+            if self.fail_upserts:
+                self.fail_upserts -= 1
+                raise ConnectionError("qdrant недоступен")
+        self.release.wait(timeout=5)
+        return self.client.upsert(collection_name, points=points, wait=wait)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """QdrantService поверх in-memory Qdrant с фиктивной моделью"""
+    monkeypatch.setattr(CONFIG.qdrant, "vector_size", VECTOR_SIZE)
+    monkeypatch.setattr(CONFIG.qdrant, "batch_size", 2)
+    monkeypatch.setattr(CONFIG.qdrant, "encode_batch_size", 2)
+    monkeypatch.setattr(CONFIG.qdrant, "upload_parallelism", 2)
+    monkeypatch.setattr(qdrant_module, "QdrantClient", lambda **kwargs: RecordingClient())
+    monkeypatch.setattr(qdrant_module, "get_device", lambda: "cpu")
+    return QdrantService(FakeModels())
+
+
+def write_chunks(directory, *texts):
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "chunks.jsonl", "w", encoding="utf-8") as f:
+        for text in texts:
+            f.write(json.dumps({"content": text, "url": f"http://city/{text}", "title": text}, ensure_ascii=False) + "\n")
+    return directory
+
+
+def payloads(service):
+    points, _ = service.client.scroll(service.collection_name, limit=100, with_payload=True)
+    return {point.payload["text"]: point.payload for point in points}
+
+
+def test_sync_tags_corpus_points_and_deletes_stale(service, tmp_path):
+    docs, deleted = service.sync_vectorized_chunks(write_chunks(tmp_path / "v1", "мфц", "школы", "парковки"))
+    assert len(docs) == 3
+    assert deleted == []
+    assert {payload["source"] for payload in payloads(service).values()} == {CORPUS_SOURCE}
+
+    docs, deleted = service.sync_vectorized_chunks(write_chunks(tmp_path / "v2", "мфц", "школы", "поликлиники"))
+
+    assert [doc["text"] for doc in docs] == ["поликлиники"]
+    assert deleted == [chunk_point_id("http://city/парковки", "парковки")]
+    assert set(payloads(service)) == {"мфц", "школы", "поликлиники"}
+
+
+def test_uploaded_and_manual_chunks_survive_sync(service, tmp_path):
+    service.sync_vectorized_chunks(write_chunks(tmp_path / "corpus", "мфц", "школы"))
+    assert len(service.add_vectorized_chunks(write_chunks(tmp_path / "upload", "регламент"))) == 1
+    assert len(service.add_chunks_directly([{"text": "ручной чанк", "url": "http://manual"}])) == 1
+
+    docs, deleted = service.sync_vectorized_chunks(write_chunks(tmp_path / "corpus", "мфц"))
+
+    assert docs == []
+    assert deleted == [chunk_point_id("http://city/школы", "школы")]
+    assert set(payloads(service)) == {"мфц", "регламент", "ручной чанк"}
+    assert "source" not in payloads(service)["регламент"]
+
+
+def test_sync_tags_corpus_points_loaded_without_source(service, tmp_path):
+    # Точки корпуса, загруженные до появления метки source
+    service.add_vectorized_chunks(write_chunks(tmp_path / "legacy", "мфц", "школы"))
+
+    docs, deleted = service.sync_vectorized_chunks(write_chunks(tmp_path / "corpus", "мфц", "школы"))
+    assert docs == []
+    assert deleted == []
+    assert {payload.get("source") for payload in payloads(service).values()} == {CORPUS_SOURCE}
+
+    _, deleted = service.sync_vectorized_chunks(write_chunks(tmp_path / "corpus", "мфц"))
+
+    assert deleted == [chunk_point_id("http://city/школы", "школы")]
+
+
+def upload_payloads(count):
+    return [{"text": f"чанк {i}", "url": f"http://city/{i}"} for i in range(count)]
+
+
+def test_upload_batches_and_final_barrier(service):
+    docs = service._embed_and_upload(upload_payloads(5))
+
+    assert len(docs) == 5
+    assert service.client.count(service.collection_name).count == 5
+    # Батчи по batch_size без ожидания, затем последний батч повторно с wait=True
+    assert service.client.upserts == [(2, False), (2, False), (1, False), (1, True)]
+
+
+def test_upload_skips_existing_points(service):
+    service._embed_and_upload(upload_payloads(3))
+    service.client.upserts.clear()
+
+    docs = service._embed_and_upload(upload_payloads(4))
+
+    assert [doc["text"] for doc in docs] == ["чанк 3"]
+    assert service.client.upserts == [(1, False), (1, True)]
+
+
+def test_upload_keeps_in_flight_batches_bounded(service):
+    service.client.release.clear()
+    uploader = threading.Thread(target=service._embed_and_upload, args=(upload_payloads(10),))
+    uploader.start()
+
+    try:
+        # Пока Qdrant не отвечает, кодирование останавливается после upload_parallelism батчей в полёте
+        time.sleep(0.2)
+        assert len(service.client.upserts) == 2
+        assert service.model.encoded_batches == 3
+    finally:
+        service.client.release.set()
+        uploader.join(timeout=5)
+
+    assert service.client.count(service.collection_name).count == 10
+
+
+def test_upload_retries_with_backoff(service, monkeypatch):
+    delays = []
+    monkeypatch.setattr(qdrant_module.time, "sleep", delays.append)
+    service.client.fail_upserts = 2
+
+    docs = service._embed_and_upload(upload_payloads(1))
+
+    assert len(docs) == 1
+    assert delays == [0.5, 1.0]
+    assert service.client.upserts == [(1, False), (1, False), (1, False), (1, True)]
+
+
+def test_upload_fails_after_last_retry(service, monkeypatch):
+    monkeypatch.setattr(qdrant_module.time, "sleep", lambda delay: None)
+    service.client.fail_upserts = service.upload_retries
+
+    with pytest.raises(ConnectionError):
+        service._embed_and_upload(upload_payloads(1))
+
+
+def test_upload_retries_at_least_once(service, monkeypatch):
+    monkeypatch.setattr(CONFIG.qdrant, "upload_retries", 0)
+    clamped = QdrantService(FakeModels())
+
+    assert clamped.upload_retries == 1
+    assert len(clamped._embed_and_upload(upload_payloads(3))) == 3
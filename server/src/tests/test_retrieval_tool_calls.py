@@ -0,0 +1,146 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from config.Config import CONFIG
+from core.langgraph_multi_agent.agents.retrieval_agent import retrieval_graph
+from core.langgraph_multi_agent.agents.retrieval_agent.retrieval_graph import RetrievalAgent
+
+
+def tool_call(name: str, arguments) -> SimpleNamespace:
+    if not isinstance(arguments, str):
+        arguments = json.dumps(arguments, ensure_ascii=False)
+    return SimpleNamespace(function=SimpleNamespace(name=name, arguments=arguments))
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(CONFIG.city_api, "tool_call_timeout_seconds", 0.2)
+    monkeypatch.setattr(CONFIG.city_api, "tool_calls_deadline_seconds", 0.4)
+    return RetrievalAgent()
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    """Подмена функций городских API; calls — аргументы каждого фактического вызова"""
+    calls = []
+    cancelled = []
+
+    async def get_mfc_by_district(district: str):
+        calls.append(("get_mfc_by_district", district))
+        return [f"МФЦ {district}"]
+
+    async def get_dou(district: str):
+        calls.append(("get_dou", district))
+        raise RuntimeError("API недоступен")
+
+    async def get_schools_by_district(district: str):
+        calls.append(("get_schools_by_district", district))
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("get_schools_by_district")
+            raise
+
+    async def afisha_all(start_date: str, end_date: str):
+        calls.append(("afisha_all", start_date))
+        try:
+            # "fast" укладывается в таймаут одного вызова, "slow" — нет
+            await asyncio.sleep(0.1 if start_date == "fast" else 0.3)
+        except asyncio.CancelledError:
+            cancelled.append("afisha_all")
+            raise
+        return ["событие"]
+
+    for name, function in (("get_mfc_by_district", get_mfc_by_district), ("get_dou", get_dou),
+                           ("get_schools_by_district", get_schools_by_district), ("afisha_all", afisha_all)):
+        monkeypatch.setitem(retrieval_graph.FUNCTION_MAP, name, function)
+
+    return SimpleNamespace(calls=calls, cancelled=cancelled)
+
+
+def test_duplicate_calls_run_once(agent, tools):
+    results = asyncio.run(agent.execute_tool_calls([
+        tool_call("get_mfc_by_district", {"district": "Центральный"}),
+        tool_call("get_mfc_by_district", '{ "district": "Центральный" }'),
+        tool_call("get_mfc_by_district", {"district": "Невский"}),
+    ]))
+
+    assert tools.calls == [("get_mfc_by_district", "Центральный"), ("get_mfc_by_district", "Невский")]
+    assert [result["result"] for result in results] == [["МФЦ Центральный"], ["МФЦ Невский"]]
+
+
+def test_errors_are_reported_per_call(agent, tools):
+    results = asyncio.run(agent.execute_tool_calls([
+        tool_call("get_mfc_by_district", {"district": "Центральный"}),
+        tool_call("get_dou", {"district": "Центральный"}),
+        tool_call("unknown_tool", {}),
+        tool_call("get_mfc_by_district", "{broken"),
+    ]))
+
+    assert results[0]["result"] == ["МФЦ Центральный"]
+    assert results[1]["error"] == "API недоступен"
+    assert results[2] == {"function": "unknown_tool", "error": "Function not found"}
+    assert results[3]["error"].startswith("Invalid arguments")
+
+
+def test_slow_call_times_out_without_losing_other_results(agent, tools):
+    results = asyncio.run(agent.execute_tool_calls([
+        tool_call("get_schools_by_district", {"district": "Центральный"}),
+        tool_call("get_mfc_by_district", {"district": "Центральный"}),
+    ]))
+
+    assert results[0]["error"] == "Timeout"
+    assert results[1]["result"] == ["МФЦ Центральный"]
+    assert tools.cancelled == ["get_schools_by_district"]
+
+
+def test_deadline_keeps_finished_results(agent, tools, monkeypatch):
+    monkeypatch.setattr(CONFIG.city_api, "tool_calls_deadline_seconds", 0.1)
+
+    results = asyncio.run(agent.execute_tool_calls([
+        tool_call("afisha_all", {"start_date": "slow", "end_date": "-"}),
+        tool_call("get_mfc_by_district", {"district": "Центральный"}),
+    ]))
+
+    assert results[0] == {"function": "afisha_all", "arguments": {"start_date": "slow", "end_date": "-"},
+                          "error": "Deadline exceeded"}
+    assert results[1]["result"] == ["МФЦ Центральный"]
+    assert tools.cancelled == ["afisha_all"]
+
+
+def test_calls_run_concurrently(agent, tools):
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await agent.execute_tool_calls([
+            tool_call("afisha_all", {"start_date": "fast", "end_date": str(i)}) for i in range(3)
+        ])
+        return results, loop.time() - started
+
+    results, elapsed = asyncio.run(main())
+
+    assert all(result["result"] == ["событие"] for result in results)
+    assert elapsed < 0.25
+
+
+def test_cancellation_cancels_pending_calls(agent, tools):
+    async def main():
+        task = asyncio.create_task(agent.execute_tool_calls([
+            tool_call("get_schools_by_district", {"district": "Центральный"}),
+            tool_call("afisha_all", {"start_date": "slow", "end_date": "-"}),
+        ]))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    assert sorted(tools.cancelled) == ["afisha_all", "get_schools_by_district"]
+
+
+def test_no_tool_calls(agent, tools):
+    assert asyncio.run(agent.execute_tool_calls([])) == []
@@ -0,0 +1,259 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from core.services.RetryPolicy import CircuitBreaker, CircuitOpenError, DeadlineExceededError, RetryPolicy, classify_error, retry_after_seconds
+
+REQUEST = httpx.Request("POST", "http://llm/v1/chat/completions")
+
+
+def status_error(status_code: int, headers: dict = None) -> openai.APIStatusError:
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    error_class = openai.RateLimitError if status_code == 429 else openai.APIStatusError
+    return error_class(f"HTTP {status_code}", response=response, body=None)
+
+
+def make_policy(max_attempts: int = 3, deadline: float = 5.0, failure_threshold: int = 2, reset_seconds: float = 60.0) -> RetryPolicy:
+    return RetryPolicy(max_attempts, base_delay=0.001, max_delay=0.01, deadline_seconds=deadline,
+                       breaker=CircuitBreaker(failure_threshold, reset_seconds))
+
+
+def scripted(*outcomes):
+    """Запрос, по очереди возвращающий значения или выбрасывающий исключения из outcomes"""
+    calls = []
+
+    async def request(timeout: float):
+        outcome = outcomes[len(calls)]
+        calls.append(timeout)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return request, calls
+
+
+def expire(breaker: CircuitBreaker):
+    breaker.opened_at -= breaker.reset_seconds
+
+
+@pytest.mark.parametrize("error, expected", [
+    (status_error(429), "rate_limit"),
+    (status_error(500), "server"),
+    (status_error(503), "server"),
+    (status_error(408), "server"),
+    (status_error(400), "client"),
+    (status_error(401), "client"),
+    (openai.APITimeoutError(request=REQUEST), "timeout"),
+    (asyncio.TimeoutError(), "timeout"),
+    (openai.APIConnectionError(request=REQUEST), "connection"),
+    (CircuitOpenError(), "client"),
+    (DeadlineExceededError(), "client"),
+    (ValueError("bad json"), "other"),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(status_error(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(status_error(429, {"retry-after-ms": "1500", "retry-after": "9"})) == 1.5
+    assert retry_after_seconds(status_error(429, {"retry-after": "soon"})) is None
+    assert retry_after_seconds(status_error(429)) is None
+    assert retry_after_seconds(ValueError()) is None
+
+
+def test_backoff_respects_retry_after_and_max_delay():
+    policy = make_policy()
+
+    assert policy.backoff(0, status_error(429, {"retry-after": "0.005"})) == 0.005
+    assert policy.backoff(0, status_error(429, {"retry-after": "100"})) == policy.max_delay
+    for attempt in range(10):
+        assert 0 <= policy.backoff(attempt, ValueError()) <= min(policy.max_delay, policy.base_delay * 2 ** attempt)
+
+
+def test_retries_transient_errors():
+    policy = make_policy(failure_threshold=3)
+    request, calls = scripted(status_error(503), openai.APITimeoutError(request=REQUEST), "ok")
+
+    assert asyncio.run(policy.call(request)) == "ok"
+
+    assert len(calls) == 3
+    assert policy.retries["server"] == 1
+    assert policy.retries["timeout"] == 1
+    assert policy.failures == 0
+    assert policy.breaker.state == "closed"
+    assert policy.breaker.consecutive_failures == 0
+
+
+def test_client_error_is_not_retried():
+    policy = make_policy()
+    request, calls = scripted(status_error(400), "ok")
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(policy.call(request))
+
+    assert len(calls) == 1
+    assert policy.failures == 1
+    assert policy.breaker.consecutive_failures == 0
+
+
+def test_gives_up_after_max_attempts():
+    policy = make_policy(max_attempts=2, failure_threshold=10)
+    request, calls = scripted(status_error(500), status_error(502), "ok")
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(policy.call(request))
+
+    assert len(calls) == 2
+    assert policy.failures == 1
+
+
+def test_deadline_stops_retries():
+    policy = make_policy(deadline=0.5, failure_threshold=10)
+    request, calls = scripted(status_error(429, {"retry-after": "1"}), "ok")
+    policy.max_delay = 1.0
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(policy.call(request))
+
+    assert len(calls) == 1
+    assert 0 < calls[0] <= 0.5
+
+
+def test_request_timeout_is_limited_by_deadline():
+    policy = make_policy(max_attempts=1, deadline=0.05)
+
+    async def slow(timeout: float):
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(policy.call(slow))
+
+    assert policy.errors == {"timeout": 1}
+
+
+def test_breaker_opens_after_consecutive_failures():
+    policy = make_policy(max_attempts=1, failure_threshold=2)
+
+    for _ in range(2):
+        request, _ = scripted(status_error(500))
+        with pytest.raises(openai.APIStatusError):
+            asyncio.run(policy.call(request))
+
+    assert policy.breaker.state == "open"
+    request, calls = scripted("ok")
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(policy.call(request))
+    assert calls == []
+    assert policy.rejected == 1
+    assert policy.stats()["breaker_opened"] == 1
+
+
+def test_breaker_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    expire(breaker)
+
+    assert breaker.before_call() is True
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert not breaker.probe_in_flight
+    assert breaker.before_call() is False
+
+
+def test_breaker_reopens_when_probe_fails():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    for _ in range(3):
+        breaker.record_failure()
+    expire(breaker)
+
+    probe = breaker.before_call()
+    breaker.record_failure(probe)
+
+    assert breaker.state == "open"
+    assert not breaker.probe_in_flight
+    assert breaker.times_opened == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_released_probe_lets_next_request_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    expire(breaker)
+
+    probe = breaker.before_call()
+    breaker.release_probe(probe)
+
+    assert breaker.state == "half_open"
+    assert breaker.before_call() is True
+
+
+def test_concurrent_requests_get_single_probe():
+    policy = make_policy(max_attempts=1, failure_threshold=1)
+    policy.breaker.record_failure()
+    expire(policy.breaker)
+
+    async def main():
+        release = asyncio.Event()
+        started = []
+
+        async def request(timeout: float):
+            started.append(timeout)
+            await release.wait()
+            return "ok"
+
+        probe = asyncio.create_task(policy.call(request))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await policy.call(request)
+        release.set()
+        return await probe, started
+
+    result, started = asyncio.run(main())
+
+    assert result == "ok"
+    assert len(started) == 1
+    assert policy.breaker.state == "closed"
+
+
+def test_cancelled_probe_is_released():
+    policy = make_policy(max_attempts=1, failure_threshold=1)
+    policy.breaker.record_failure()
+    expire(policy.breaker)
+
+    async def main():
+        async def hang(timeout: float):
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(policy.call(hang))
+        await asyncio.sleep(0)
+        assert policy.breaker.probe_in_flight
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    assert policy.breaker.state == "half_open"
+    assert not policy.breaker.probe_in_flight
+
+
+def test_client_error_on_probe_keeps_breaker_half_open():
+    policy = make_policy(max_attempts=1, failure_threshold=1)
+    policy.breaker.record_failure()
+    expire(policy.breaker)
+    request, _ = scripted(status_error(400))
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(policy.call(request))
+
+    assert policy.breaker.state == "half_open"
+    assert not policy.breaker.probe_in_flight
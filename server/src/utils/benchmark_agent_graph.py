@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from core.langgraph_multi_agent.main import UrbanAdvisorSystem, create_initial_state
+from core.services.TokenUsage import track_request_usage
+
+DEFAULT_MESSAGES = [
+    "Где находится ближайший МФЦ к Невскому проспекту 1?",
+    "Как оформить пособие по уходу за ребенком?",
+    "Какие школы есть в Центральном районе?",
+    "Куда сходить на выходных с детьми?",
+    "Какие документы нужны для регистрации брака?",
+    "Как записаться к врачу?",
+    "А там что?",
+    "Ты тупой бот, от тебя никакой пользы",
+]
+
+
+def outcome(result: dict) -> str:
+    if result.get("is_toxic"):
+        return "toxic"
+    if result.get("in_clarification_mode"):
+        return "clarify"
+    return "answer"
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run_once(graph, message: str) -> Dict:
+    state = create_initial_state(message, [])
+    with track_request_usage() as usage:
+        start = time.perf_counter()
+        result = await graph.ainvoke(state)
+        elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "tokens": usage.total(), "outcome": outcome(result)}
+
+
+async def benchmark(messages: List[str], rounds: int) -> Dict[str, List[Dict]]:
+    graphs = {
+        "sequential": UrbanAdvisorSystem(speculative=False).build_graph(),
+        "speculative": UrbanAdvisorSystem(speculative=True).build_graph(),
+    }
+    samples = {mode: [] for mode in graphs}
+
+    for round_number in range(rounds):
+        for message in messages:
+            # Режимы чередуются на каждом сообщении, чтобы колебания задержки LLM делились поровну
+            modes = list(graphs) if round_number % 2 == 0 else list(reversed(graphs))
+            for mode in modes:
+                sample = await run_once(graphs[mode], message)
+                sample["message"] = message
+                samples[mode].append(sample)
+                print(f"[{mode:<11}] {sample['seconds']:6.2f} с | {sample['tokens']:>6} токенов | "
+                      f"{sample['outcome']:<7} | {message}")
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сквозная задержка графа агентов: последовательная цепочка против спекулятивного режима")
+    parser.add_argument("--messages", nargs="+", default=DEFAULT_MESSAGES)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = asyncio.run(benchmark(args.messages, args.rounds))
+
+    print(f"\n{'режим':<11} | {'исход':<7} | {'n':>3} | {'p50, с':>7} | {'p95, с':>7} | {'среднее, с':>10} | {'токенов/запр':>12}")
+    for mode, rows in samples.items():
+        for kind in ("all", "answer", "clarify", "toxic"):
+            selected = [row for row in rows if kind == "all" or row["outcome"] == kind]
+            if not selected:
+                continue
+            seconds = [row["seconds"] for row in selected]
+            tokens = sum(row["tokens"] for row in selected) / len(selected)
+            print(f"{mode:<11} | {kind:<7} | {len(selected):>3} | {percentile(seconds, 0.5):>7.2f} | "
+                  f"{percentile(seconds, 0.95):>7.2f} | {sum(seconds) / len(seconds):>10.2f} | {tokens:>12.0f}")
+
+    sequential = percentile([row["seconds"] for row in samples["sequential"]], 0.5)
+    speculative = percentile([row["seconds"] for row in samples["speculative"]], 0.5)
+    print(f"\nУскорение по медиане: {sequential / speculative:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import multiprocessing
+import os
+import time
+from typing import Any, Dict
+
+from config.Config import CONFIG
+from core.services.InferenceBackend import BACKENDS, load_model
+from utils.export_onnx import DEFAULT_CHUNKS, load_pairs
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def run_backend(target: str, backend: str, pairs, duration: float, results) -> None:
+    """Замер в отдельном процессе, чтобы память одного бэкенда не влияла на другой"""
+    start_rss = rss_mb()
+    start = time.perf_counter()
+
+    if target == "embedder":
+        model, _ = load_model("sentence_transformer", CONFIG.qdrant.model_name, backend, CONFIG.qdrant.quantization, "cpu")
+        queries = [query for query, _ in pairs]
+
+        def step(i: int) -> int:
+            model.encode([queries[i % len(queries)]])
+            return 1
+    else:
+        model, _ = load_model("cross_encoder", CONFIG.reranker.model_name, backend, CONFIG.reranker.quantization, "cpu",
+                              max_length=CONFIG.reranker.max_length)
+        group = CONFIG.hybrid.fused_candidates
+
+        def step(i: int) -> int:
+            query = pairs[i % len(pairs)][0]
+            model.predict([(query, pairs[(i + j) % len(pairs)][1]) for j in range(group)], batch_size=CONFIG.reranker.batch_size)
+            return 1
+
+    load_seconds = time.perf_counter() - start
+    step(0)
+
+    done = 0
+    latencies = []
+    bench_start = time.perf_counter()
+    while time.perf_counter() - bench_start < duration:
+        call_start = time.perf_counter()
+        done += step(done)
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - bench_start
+
+    latencies.sort()
+    results.put({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "rss_mb": rss_mb() - start_rss,
+        "qps": done / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение бэкендов инференса: запросов в секунду и память")
+    parser.add_argument("--target", choices=["embedder", "reranker"], default="embedder")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--chunks", default=DEFAULT_CHUNKS)
+    parser.add_argument("--duration", type=float, default=20, help="Длительность замера на бэкенд, с")
+    parser.add_argument("--threads", type=int, default=0, help="Число потоков torch/onnxruntime (0 — по умолчанию)")
+    args = parser.parse_args()
+
+    if args.threads:
+        os.environ["OMP_NUM_THREADS"] = str(args.threads)
+
+    pairs = load_pairs(args.chunks, 512)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+
+    unit = "запросов эмбеддинга" if args.target == "embedder" else f"реранкингов по {CONFIG.hybrid.fused_candidates} документов"
+    print(f"{args.target}: {unit}, {args.duration:.0f} с на бэкенд")
+    print(f"{'бэкенд':<10} | {'загрузка, с':>11} | {'RSS, МБ':>8} | {'запр/с':>8} | {'p50, мс':>8} | {'p95, мс':>8}")
+
+    for backend in args.backends:
+        process = context.Process(target=run_backend, args=(args.target, backend, pairs, args.duration, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            print(f"{backend:<10} | ошибка, код выхода {process.exitcode}")
+            continue
+
+        row: Dict[str, Any] = results.get()
+        print(f"{row['backend']:<10} | {row['load_seconds']:>11.1f} | {row['rss_mb']:>8.0f} | {row['qps']:>8.1f} | "
+              f"{row['p50_ms']:>8.1f} | {row['p95_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
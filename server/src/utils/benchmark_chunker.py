@@ -0,0 +1,77 @@
+import argparse
+import json
+import statistics
+import time
+
+from core.services.СhunksService import ChunkProcessor
+
+DEFAULT_CORPUS = "./core/data/knowledge_base.json"
+
+
+def word_by_word_chunks(processor: ChunkProcessor, text: str) -> list[str]:
+    """Прежняя реализация: вызов токенизатора на каждое слово и при подборе перекрытия"""
+    words = text.split()
+    chunks = []
+    current_chunk = []
+    current_tokens = 0
+
+    for word in words:
+        word_tokens = processor.count_tokens(word + " ")
+
+        if current_tokens + word_tokens > processor.chunk_size and current_chunk:
+            chunks.append(" ".join(current_chunk))
+
+            overlap_words = []
+            overlap_tokens = 0
+            for w in reversed(current_chunk):
+                w_tokens = processor.count_tokens(w + " ")
+                if overlap_tokens + w_tokens > processor.overlap:
+                    break
+                overlap_words.insert(0, w)
+                overlap_tokens += w_tokens
+
+            current_chunk = overlap_words
+            current_tokens = overlap_tokens
+
+        current_chunk.append(word)
+        current_tokens += word_tokens
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+
+    return chunks
+
+
+def run(name: str, chunker, processor: ChunkProcessor, texts: list[str]):
+    start = time.perf_counter()
+    all_chunks = [chunk for text in texts for chunk in chunker(text)]
+    elapsed = time.perf_counter() - start
+
+    token_counts = [processor.count_tokens(chunk) for chunk in all_chunks]
+    print(f"{name:<14} | {elapsed:8.2f} с | {len(all_chunks):6d} чанков | "
+          f"токенов в чанке: среднее {statistics.mean(token_counts):.0f}, макс {max(token_counts)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение скорости чанкеров на корпусе парсера")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--limit", type=int, default=0, help="Ограничение на число документов")
+    args = parser.parse_args()
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        documents = json.load(f)
+
+    texts = [doc.get("content", "") for doc in documents if doc.get("content")]
+    if args.limit:
+        texts = texts[:args.limit]
+
+    processor = ChunkProcessor()
+    print(f"Документов: {len(texts)}, символов: {sum(len(t) for t in texts)}, "
+          f"chunk_size={processor.chunk_size}, overlap={processor.overlap}")
+
+    run("word-by-word", lambda text: word_by_word_chunks(processor, text), processor, texts)
+    run("token-offsets", processor.create_chunks_with_overlap, processor, texts)
+
+
+if __name__ == "__main__":
+    main()
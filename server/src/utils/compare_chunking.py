@@ -0,0 +1,89 @@
+import argparse
+import json
+import statistics
+from pathlib import Path
+from urllib.parse import unquote
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from config.Config import CONFIG
+from core.services.СhunksService import CHUNKING_STRATEGIES, ChunkProcessor, chunk_document, iter_feed_documents
+from utils.evaluate_retrieval import load_dataset
+
+DEFAULT_CORPUS = "./core/data/knowledge_base.json"
+
+
+def ends_on_boundary(chunk: dict) -> bool:
+    """Чанк заканчивается концом предложения или пункта, а не обрывается на середине"""
+    tail = chunk["content"].rstrip()
+    return not tail or tail[-1] in ".!?…:;»)\""
+
+
+def recall_at_k(ranked_urls: list[str], relevant_urls: list[str], k: int) -> float:
+    relevant = {unquote(url) for url in relevant_urls}
+    if not relevant:
+        return 0.0
+    found = {unquote(url) for url in ranked_urls[:k]}
+    return len(relevant & found) / len(relevant)
+
+
+def evaluate(model: SentenceTransformer, chunks: list[dict], dataset: list[dict], ks: list[int], top: int) -> dict[int, float]:
+    """Recall@k векторного поиска по чанкам одной стратегии (точный поиск в памяти)"""
+    vectors = model.encode([chunk["content"] for chunk in chunks], batch_size=CONFIG.qdrant.encode_batch_size,
+                           normalize_embeddings=True, show_progress_bar=True)
+    questions = model.encode([item["question"] for item in dataset], normalize_embeddings=True)
+
+    recalls = {k: [] for k in ks}
+    for item, question in zip(dataset, questions, strict=True):
+        scores = vectors @ question
+        ranked_urls = [chunks[i]["url"] for i in np.argsort(-scores)[:top]]
+        for k in ks:
+            recalls[k].append(recall_at_k(ranked_urls, item.get("relevant_urls", []), k))
+
+    return {k: statistics.mean(values) for k, values in recalls.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение фиксированных окон и чанкинга по структуре статьи")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Фид парсера (.json или .jsonl)")
+    parser.add_argument("--dataset", help="JSONL с вопросами и релевантными ссылками для оценки recall@k")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--limit", type=int, default=0, help="Ограничение на число документов")
+    args = parser.parse_args()
+
+    documents = [doc for doc in iter_feed_documents(Path(args.corpus)) if doc.get("content")]
+    if args.limit:
+        documents = documents[:args.limit]
+
+    with_blocks = sum(1 for doc in documents if doc.get("blocks"))
+    processor = ChunkProcessor()
+    tokenizer = processor.tokenizer
+    print(f"Документов: {len(documents)} (со структурой: {with_blocks}), "
+          f"chunk_size={processor.chunk_size}, overlap={processor.overlap}")
+
+    dataset = load_dataset(args.dataset) if args.dataset else []
+    model = SentenceTransformer(CONFIG.qdrant.model_name) if dataset else None
+
+    header = " | ".join(f"recall@{k}" for k in args.k) if dataset else ""
+    print(f"{'стратегия':<10} | {'чанков':>7} | {'токенов':>9} | {'ср./макс.':>9} | {'обрывы':>6} | {'индекс, МБ':>10} | {header}")
+
+    for strategy in CHUNKING_STRATEGIES:
+        chunks = [chunk for doc in documents
+                  for chunk in chunk_document(tokenizer, doc, processor.chunk_size, processor.overlap, strategy)]
+        token_counts = [chunk["token_count"] for chunk in chunks]
+        broken = sum(1 for chunk in chunks if not ends_on_boundary(chunk)) / len(chunks)
+
+        payload_bytes = sum(len(json.dumps(chunk, ensure_ascii=False).encode("utf-8")) for chunk in chunks)
+        index_mb = (len(chunks) * CONFIG.qdrant.vector_size * 4 + payload_bytes) / 2 ** 20
+
+        line = (f"{strategy:<10} | {len(chunks):>7} | {sum(token_counts):>9} | "
+                f"{statistics.mean(token_counts):>4.0f}/{max(token_counts):<4} | {broken:>6.1%} | {index_mb:>10.1f} | ")
+        if dataset:
+            recalls = evaluate(model, chunks, dataset, args.k, max(args.k))
+            line += " | ".join(f"{recalls[k]:>8.3f}" for k in args.k)
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from core.langgraph_multi_agent.agents.clarification_agent import ClarificationAgent
+from core.langgraph_multi_agent.agents.preclassifier_agent import PreClassifierAgent
+from core.langgraph_multi_agent.agents.router_agent import RouterAgent
+from core.langgraph_multi_agent.agents.toxicity_agent import ToxicityAgent
+from core.services.LLMService import get_shared_client
+from core.services.TokenUsage import track_request_usage
+from utils.benchmark_agent_graph import DEFAULT_MESSAGES, percentile
+
+DECISIONS = ["is_toxic", "requires_rag", "requires_api", "requires_web_search", "is_clear", "in_clarification_mode"]
+
+
+def load_dataset(path: Optional[str]) -> List[Dict[str, Any]]:
+    """Датасет в формате JSONL: {"message": "...", "history": [...]} и, при наличии,
+    эталонные решения с ключами из DECISIONS"""
+    if not path:
+        return [{"message": message, "history": []} for message in DEFAULT_MESSAGES]
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ThreeNodePipeline:
+    """Текущая цепочка: токсичность, затем маршрутизация и уточнения, как в графе UrbanAdvisorSystem"""
+
+    def __init__(self, llm_client):
+        self.toxicity_agent = ToxicityAgent(llm_client)
+        self.router_agent = RouterAgent(llm_client)
+        self.clarification_agent = ClarificationAgent(llm_client)
+
+    async def classify(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        state = {**state, **await self.toxicity_agent.check_toxicity(state)}
+        if state["is_toxic"]:
+            return state
+        state = await self.router_agent.classify_route(state)
+        return await self.clarification_agent.check_clarification(state)
+
+
+async def run(pipeline, item: Dict[str, Any]) -> Dict[str, Any]:
+    state = {"message": item["message"], "classification": "", "history": item.get("history", [])}
+    with track_request_usage() as usage:
+        start = time.perf_counter()
+        result = await pipeline.classify(state)
+        elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "tokens": usage.total(),
+        "requests": sum(counters["requests"] for counters in usage.as_dict().values()),
+        "decisions": {decision: result.get(decision) for decision in DECISIONS}
+    }
+
+
+def comparable(decisions: Dict[str, Any], other: Dict[str, Any], decision: str) -> bool:
+    """Для токсичного сообщения цепочка не доходит до маршрутизации, сравнивается только токсичность"""
+    if decision == "is_toxic":
+        return True
+    return not decisions["is_toxic"] and not other["is_toxic"]
+
+
+async def evaluate(dataset: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    llm_client = get_shared_client()
+    pipelines = {"three_nodes": ThreeNodePipeline(llm_client), "preclassifier": PreClassifierAgent(llm_client)}
+    results = {name: [] for name in pipelines}
+
+    for i, item in enumerate(dataset):
+        # Порядок чередуется, чтобы колебания задержки LLM делились поровну
+        names = list(pipelines) if i % 2 == 0 else list(reversed(pipelines))
+        for name in names:
+            results[name].append(await run(pipelines[name], item))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Объединённый предклассификатор против цепочки токсичность → роутер → уточнения")
+    parser.add_argument("--dataset", help="JSONL с сообщениями (по умолчанию — встроенные примеры)")
+    parser.add_argument("--show-disagreements", action="store_true")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset)
+    results = asyncio.run(evaluate(dataset))
+    baseline, combined = results["three_nodes"], results["preclassifier"]
+
+    print(f"Сообщений: {len(dataset)}\n")
+    print(f"{'решение':<22} | {'согласие':>9} | {'n':>4} | {'точность цепочки':>16} | {'точность предкл.':>16}")
+    for decision in DECISIONS:
+        pairs = [(a["decisions"], b["decisions"], item) for a, b, item in zip(baseline, combined, dataset, strict=True)
+                 if comparable(a["decisions"], b["decisions"], decision)]
+        agreement = sum(a[decision] == b[decision] for a, b, _ in pairs) / len(pairs) if pairs else 0.0
+
+        labelled = [(a, b, item) for a, b, item in pairs if decision in item]
+        if labelled:
+            accuracy_a = sum(a[decision] == item[decision] for a, _, item in labelled) / len(labelled)
+            accuracy_b = sum(b[decision] == item[decision] for _, b, item in labelled) / len(labelled)
+            accuracy = f"{accuracy_a:>16.1%} | {accuracy_b:>16.1%}"
+        else:
+            accuracy = f"{'-':>16} | {'-':>16}"
+        print(f"{decision:<22} | {agreement:>9.1%} | {len(pairs):>4} | {accuracy}")
+
+    print(f"\n{'вариант':<14} | {'p50, с':>7} | {'p95, с':>7} | {'среднее, с':>10} | {'запр. LLM':>9} | {'токенов/сообщ':>13}")
+    for name, rows in results.items():
+        seconds = [row["seconds"] for row in rows]
+        print(f"{name:<14} | {percentile(seconds, 0.5):>7.2f} | {percentile(seconds, 0.95):>7.2f} | "
+              f"{sum(seconds) / len(rows):>10.2f} | {sum(row['requests'] for row in rows) / len(rows):>9.2f} | "
+              f"{sum(row['tokens'] for row in rows) / len(rows):>13.0f}")
+
+    if args.show_disagreements:
+        print("\nРасхождения:")
+        for a, b, item in zip(baseline, combined, dataset, strict=True):
+            differ = [decision for decision in DECISIONS
+                      if comparable(a["decisions"], b["decisions"], decision) and a["decisions"][decision] != b["decisions"][decision]]
+            if differ:
+                print(f"- {item['message']}: " + ", ".join(
+                    f"{decision} цепочка={a['decisions'][decision]} предкл.={b['decisions'][decision]}" for decision in differ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+from urllib.parse import unquote
+
+from core.services.BM25Service import BM25Service
+from core.services.HybridRetriever import FUSION_STRATEGIES, HybridRetriever
+from core.services.QdrantService import QdrantService
+
+
+def load_dataset(path: str) -> List[Dict[str, Any]]:
+    """Датасет в формате JSONL: {"question": "...", "relevant_urls": ["..."]}"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def recall_at_k(chunks: List[Dict[str, Any]], relevant_urls: List[str], k: int) -> float:
+    relevant = {unquote(url) for url in relevant_urls}
+    if not relevant:
+        return 0.0
+    found = {unquote(chunk.get("link", "")) for chunk in chunks[:k]}
+    return len(relevant & found) / len(relevant)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Оффлайн-оценка стратегий гибридного поиска")
+    parser.add_argument("dataset", help="JSONL с вопросами и релевантными ссылками")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10])
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset)
+
+    qdrant_service = QdrantService()
+    bm25_service = BM25Service()
+    bm25_service.sync_with_qdrant(qdrant_service)
+    retriever = HybridRetriever(bm25_service, qdrant_service)
+
+    recalls = {strategy: {k: [] for k in args.k} for strategy in FUSION_STRATEGIES}
+    fusion_latencies = {strategy: [] for strategy in FUSION_STRATEGIES}
+    candidate_latencies = []
+
+    for item in dataset:
+        start = time.perf_counter()
+        bm25_chunks, vector_chunks = await retriever.search_candidates(item["question"])
+        candidate_latencies.append(time.perf_counter() - start)
+
+        for strategy in FUSION_STRATEGIES:
+            start = time.perf_counter()
+            fused = retriever.fuse(bm25_chunks, vector_chunks, strategy)
+            fusion_latencies[strategy].append(time.perf_counter() - start)
+
+            for k in args.k:
+                recalls[strategy][k].append(recall_at_k(fused, item.get("relevant_urls", []), k))
+
+    print(f"Вопросов: {len(dataset)}, поиск кандидатов: {statistics.mean(candidate_latencies) * 1000:.1f} мс в среднем")
+    header = " | ".join(f"recall@{k}" for k in args.k)
+    print(f"{'стратегия':<14} | {header} | слияние, мс")
+    for strategy in FUSION_STRATEGIES:
+        values = " | ".join(f"{statistics.mean(recalls[strategy][k]):>8.3f}" for k in args.k)
+        print(f"{strategy:<14} | {values} | {statistics.mean(fusion_latencies[strategy]) * 1000:.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from config.Config import CONFIG
+from core.services.InferenceBackend import export_model, load_model
+from core.services.СhunksService import CHUNKS_FILENAME
+
+DEFAULT_CHUNKS = f"./core/data/chunks/{CHUNKS_FILENAME}"
+
+DEFAULT_PAIRS = [
+    ("Как записаться к врачу?", "Записаться на прием к врачу можно через портал госуслуг или по телефону поликлиники."),
+    ("Как оформить пособие по уходу за ребенком?", "Пособие по уходу за ребенком до полутора лет назначается по месту работы родителя."),
+    ("Какие документы нужны для регистрации брака?", "Для регистрации брака нужны паспорта и квитанция об оплате госпошлины."),
+    ("Как получить парковочное разрешение для инвалида?", "Парковочное разрешение оформляется в МФЦ при наличии сведений в ФГИС ФРИ."),
+]
+
+
+def load_pairs(path: str, limit: int) -> List[Tuple[str, str]]:
+    """Пары (заголовок, текст чанка) из chunks.jsonl или встроенные примеры"""
+    if not Path(path).exists():
+        return DEFAULT_PAIRS
+
+    pairs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            chunk = json.loads(line)
+            pairs.append((chunk.get("title") or chunk["content"][:100], chunk["content"]))
+            if len(pairs) >= limit:
+                break
+    return pairs or DEFAULT_PAIRS
+
+
+def validate_embedder(texts: List[str], backends: List[str], quantization: str, min_cosine: float) -> bool:
+    name = CONFIG.qdrant.model_name
+    reference, _ = load_model("sentence_transformer", name, "torch", quantization, "cpu")
+    expected = reference.encode(texts, normalize_embeddings=True)
+
+    ok = True
+    for backend in backends:
+        path = export_model("sentence_transformer", name, backend, quantization)
+        model, size = load_model("sentence_transformer", name, backend, quantization, "cpu")
+        cosine = (expected * model.encode(texts, normalize_embeddings=True)).sum(axis=1)
+
+        passed = float(cosine.min()) >= min_cosine
+        ok = ok and passed
+        print(f"embedder {backend:<10} | {path.name} {size / 2 ** 20:.0f} МБ | cosine: среднее {cosine.mean():.5f}, "
+              f"мин {cosine.min():.5f}, p1 {np.percentile(cosine, 1):.5f} | {'OK' if passed else 'ДРЕЙФ'}")
+    return ok
+
+
+def validate_reranker(pairs: List[Tuple[str, str]], backends: List[str], quantization: str, min_correlation: float) -> bool:
+    name = CONFIG.reranker.model_name
+    max_length = CONFIG.reranker.max_length
+    reference, _ = load_model("cross_encoder", name, "torch", quantization, "cpu", max_length=max_length)
+    expected = np.asarray(reference.predict(pairs))
+
+    ok = True
+    for backend in backends:
+        path = export_model("cross_encoder", name, backend, quantization, max_length=max_length)
+        model, size = load_model("cross_encoder", name, backend, quantization, "cpu", max_length=max_length)
+        scores = np.asarray(model.predict(pairs))
+
+        correlation = float(np.corrcoef(expected, scores)[0, 1]) if len(pairs) > 1 else 1.0
+        passed = correlation >= min_correlation
+        ok = ok and passed
+        print(f"reranker {backend:<10} | {path.name} {size / 2 ** 20:.0f} МБ | корреляция score {correlation:.5f}, "
+              f"макс. отклонение {np.abs(expected - scores).max():.4f} | {'OK' if passed else 'ДРЕЙФ'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт моделей в ONNX/int8 и проверка дрейфа относительно fp32")
+    parser.add_argument("--target", choices=["embedder", "reranker", "all"], default="all")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"], choices=["onnx", "onnx-int8"])
+    parser.add_argument("--chunks", default=DEFAULT_CHUNKS, help="chunks.jsonl с примерами текстов")
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Минимальный косинус к fp32-эмбеддингу")
+    parser.add_argument("--min-correlation", type=float, default=0.98, help="Минимальная корреляция score реранкера")
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.chunks, args.samples)
+    print(f"Примеров для проверки: {len(pairs)}")
+
+    ok = True
+    if args.target in ("embedder", "all"):
+        texts = [text for pair in pairs for text in pair]
+        ok = validate_embedder(texts, args.backends, CONFIG.qdrant.quantization, args.min_cosine) and ok
+    if args.target in ("reranker", "all"):
+        ok = validate_reranker(pairs, args.backends, CONFIG.reranker.quantization, args.min_correlation) and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
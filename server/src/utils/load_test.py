@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+DEFAULT_URL = "http://localhost:6500/api/v1/get_answer"
+
+DEFAULT_QUESTIONS = [
+    "Какая приоритетная группа для прохождения диспансеризации?",
+    "Как оформить пособие по уходу за ребенком?",
+    "Как записаться к врачу?",
+    "Какие документы нужны для регистрации брака?",
+    "Как получить парковочное разрешение для инвалида?",
+    "Как встать на учет в качестве самозанятого?",
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_user(client: httpx.AsyncClient, url: str, questions: List[str], requests_count: int,
+                   user_idx: int, latencies: List[float], errors: List[str]):
+    for i in range(requests_count):
+        question = questions[(user_idx + i) % len(questions)]
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, params={"user_question": question})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест /api/v1/get_answer")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--users", type=int, default=10, help="Количество одновременных пользователей")
+    parser.add_argument("--requests", type=int, default=5, help="Количество запросов на пользователя")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        await asyncio.gather(*[
+            run_user(client, args.url, DEFAULT_QUESTIONS, args.requests, user_idx, latencies, errors)
+            for user_idx in range(args.users)
+        ])
+    elapsed = time.perf_counter() - start
+
+    print(f"Пользователей: {args.users}, запросов: {len(latencies) + len(errors)}, ошибок: {len(errors)}")
+    print(f"Время теста: {elapsed:.2f} с, пропускная способность: {len(latencies) / elapsed:.2f} запр/с")
+
+    if latencies:
+        print(f"p50: {percentile(latencies, 50) * 1000:.0f} мс")
+        print(f"p95: {percentile(latencies, 95) * 1000:.0f} мс")
+        print(f"p99: {percentile(latencies, 99) * 1000:.0f} мс")
+        print(f"mean: {statistics.mean(latencies) * 1000:.0f} мс, max: {max(latencies) * 1000:.0f} мс")
+
+    for error in errors[:5]:
+        print(f"Ошибка: {error}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+import argparse
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from config.Config import CONFIG
+from core.services.EmbeddingBatcher import normalize_query
+from core.services.FastPathClassifier import ROUTE_LABELS, TOXICITY_LABELS, FastPathClassifier, load_decisions, route_rules, save_heads, toxicity_rules
+from core.services.ModelRegistry import ModelRegistry
+
+TASK_LABELS = {"toxicity": TOXICITY_LABELS, "route": ROUTE_LABELS}
+
+
+def dataset(path: str) -> Dict[str, List[Tuple[str, Dict[str, bool]]]]:
+    """Последнее решение LLM по каждому сообщению; маршруты — только для первых сообщений диалога"""
+    latest: Dict[Tuple[str, str], Tuple[str, Dict[str, bool]]] = {}
+    for record in load_decisions(path):
+        if record["task"] == "route" and record.get("has_history"):
+            continue
+        latest[(record["task"], normalize_query(record["message"]))] = (record["message"], record["decision"])
+
+    result = {task: [] for task in TASK_LABELS}
+    for (task, _), item in latest.items():
+        result[task].append(item)
+    return result
+
+
+def in_holdout(message: str, share: float) -> bool:
+    """Детерминированное разбиение по тексту сообщения, одинаковое для обеих задач"""
+    return zlib.crc32(normalize_query(message).encode("utf-8")) % 1000 < share * 1000
+
+
+def train_heads(vectors: np.ndarray, decisions: List[Dict[str, bool]], labels) -> Dict[str, Tuple[np.ndarray, float]]:
+    heads = {}
+    for label in labels:
+        y = np.array([int(decision[label]) for decision in decisions])
+        if len(set(y)) < 2:
+            print(f"  {label}: в данных один класс, голова не обучается (решает только LLM)")
+            continue
+        model = LogisticRegression(C=1.0, class_weight="balanced", max_iter=1000).fit(vectors, y)
+        heads[label] = (model.coef_[0].astype(np.float32), float(model.intercept_[0]))
+    return heads
+
+
+def fast_decision(task: str, message: str, vector: np.ndarray, heads, threshold: float) -> Tuple[Optional[Dict[str, bool]], str]:
+    """То же решение, что принимает FastPathClassifier: правила, затем уверенные головы"""
+    if task == "toxicity":
+        rule = toxicity_rules(message)
+        decision = {} if rule is None else {"is_toxic": rule}
+    else:
+        decision = route_rules(message)
+
+    missing = [label for label in TASK_LABELS[task] if label not in decision]
+    if not missing:
+        return decision, "rules"
+    if any(label not in heads for label in missing):
+        return None, "deferred"
+
+    probabilities = {label: float(1 / (1 + np.exp(-(vector @ heads[label][0] + heads[label][1])))) for label in missing}
+    if not FastPathClassifier.confident(probabilities, threshold):
+        return None, "deferred"
+    decision.update({label: p >= 0.5 for label, p in probabilities.items()})
+    return decision, "model"
+
+
+def report(task: str, items, vectors: np.ndarray, heads, thresholds: List[float]) -> None:
+    print(f"\n{task}: {len(items)} сообщений в отложенной выборке")
+    print(f"{'порог':>6} | {'покрытие':>9} | {'правила':>8} | {'модель':>7} | {'согласие с LLM':>15} | {'ошибок':>6}")
+    for threshold in thresholds:
+        counts = {"rules": 0, "model": 0, "deferred": 0}
+        agreed = 0
+        for (message, expected), vector in zip(items, vectors, strict=True):
+            decision, source = fast_decision(task, message, vector, heads, threshold)
+            counts[source] += 1
+            if decision is not None:
+                agreed += all(decision[label] == expected[label] for label in TASK_LABELS[task])
+
+        covered = counts["rules"] + counts["model"]
+        agreement = f"{agreed / covered:>15.1%}" if covered else f"{'-':>15}"
+        print(f"{threshold:>6.2f} | {covered / len(items):>9.1%} | {counts['rules']:>8} | {counts['model']:>7} | "
+              f"{agreement} | {covered - agreed:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Обучение быстрого пути (токсичность и маршрут) на журнале решений LLM")
+    parser.add_argument("--decisions", default=CONFIG.fast_path.decisions_path)
+    parser.add_argument("--output", default=CONFIG.fast_path.model_path)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Доля сообщений для оценки покрытия и согласия")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.9, 0.95, 0.99])
+    args = parser.parse_args()
+
+    data = dataset(args.decisions)
+    model_name = CONFIG.qdrant.model_name
+    model = ModelRegistry().get_sentence_transformer(model_name, CONFIG.fast_path.device, CONFIG.qdrant.backend,
+                                                     CONFIG.qdrant.quantization)
+
+    messages = sorted({message for items in data.values() for message, _ in items})
+    start = time.perf_counter()
+    vectors = dict(zip(messages, np.asarray(model.encode(messages, normalize_embeddings=True), dtype=np.float32), strict=True))
+    print(f"Сообщений: {len(messages)}, эмбеддинги за {time.perf_counter() - start:.1f} с")
+
+    start = time.perf_counter()
+    for message in messages[:100]:
+        model.encode([message], normalize_embeddings=True)
+    print(f"Эмбеддинг одного сообщения: {(time.perf_counter() - start) / max(1, min(100, len(messages))) * 1000:.1f} мс")
+
+    heads: Dict[str, Any] = {}
+    for task, labels in TASK_LABELS.items():
+        items = data[task]
+        train = [item for item in items if not in_holdout(item[0], args.holdout)]
+        holdout = [item for item in items if in_holdout(item[0], args.holdout)]
+        print(f"\n{task}: обучение на {len(train)}, проверка на {len(holdout)}")
+        if not train:
+            continue
+
+        task_heads = train_heads(np.stack([vectors[m] for m, _ in train]), [d for _, d in train], labels)
+        if holdout:
+            report(task, holdout, np.stack([vectors[m] for m, _ in holdout]), task_heads, args.thresholds)
+
+        # Итоговые головы обучаются на всех данных
+        heads.update(train_heads(np.stack([vectors[m] for m, _ in items]), [d for _, d in items], labels))
+
+    if not heads:
+        print("\nНет данных для обучения, файл модели не сохранён")
+        return
+
+    save_heads(args.output, model_name, heads)
+    print(f"\nГоловы {', '.join(heads)} сохранены в {args.output}")
+    print(f"Пороги в конфиге: toxicity_threshold={CONFIG.fast_path.toxicity_threshold}, "
+          f"route_threshold={CONFIG.fast_path.route_threshold}")
+
+
+if __name__ == "__main__":
+    main()